@@ -0,0 +1,736 @@
+from typing import List, Tuple
+from psycopg2 import sql
+from datetime import date
+
+from Utility.ReturnValue import ReturnValue
+from Utility.AsyncDBConnector import AsyncConnectionPool
+from Utility.CallTrace import call_trace
+
+from Business.Owner import Owner
+from Business.Customer import Customer
+from Business.Apartment import Apartment
+
+from Solution import (
+    query_cache,
+    exception_list,
+    handle_errors,
+    objects_from_result,
+    BAD_APARTMENT_ROW,
+    update_query,
+    owner_apartments_query,
+    reservations_per_owner_query,
+    all_location_owners_query,
+    apartment_recommendation_query,
+    write_function_query,
+    search_reviews_query,
+    nightly_price_stats_query,
+    nightly_price_stats_from,
+    NO_NIGHTLY_PRICES,
+    occupancy_query,
+    owner_portfolio_query,
+    portfolio_from,
+    dirty_columns,
+)
+
+# asyncio counterparts of the Solution.py API. they run the same queries, return the same ReturnValue and
+# Business objects and share Solution.query_cache, but wait for the database without blocking the event loop.
+# all coroutines share the connections of `pool`, set pool.max_size before the first call to resize it.
+# the schema is still managed by the synchronous Solution.create_tables/clear_tables/drop_tables
+pool = AsyncConnectionPool()
+
+
+# ---------------------------------- CRUD API: ----------------------------------
+
+
+# see Solution.call_write_function
+async def call_write_function(name: str, function: str, *args) -> ReturnValue:
+    try:
+        _, result = await pool.execute(write_function_query(function, *args), name=name)
+    except exception_list as e:
+        return handle_errors(e)
+    return ReturnValue[result[0]["Status"]]
+
+
+@call_trace.recorded
+@query_cache.invalidates("Owner")
+async def add_owner(owner: Owner) -> ReturnValue:
+    query = sql.SQL(
+        """
+    INSERT INTO Owner (OwnerID, Name)
+    VALUES ({owner_id}, {name})
+    ON CONFLICT DO NOTHING
+    RETURNING OwnerID
+    """
+    ).format(owner_id=sql.Literal(owner.get_owner_id()), name=sql.Literal(owner.get_owner_name()))
+    try:
+        inserted, _ = await pool.execute(query, name="add_owner")
+    except exception_list as e:
+        return handle_errors(e)
+    return ReturnValue["OK"] if inserted else ReturnValue["ALREADY_EXISTS"]
+
+
+@call_trace.recorded
+@query_cache.cached("Owner")
+async def get_owner(owner_id: int) -> Owner:
+    query = sql.SQL(
+        """
+    SELECT OwnerID, Name FROM Owner WHERE OwnerID = {owner_id}
+    """
+    ).format(owner_id=sql.Literal(owner_id))
+    try:
+        num_rows, result_set = await pool.execute(query, name="get_owner")
+    except exception_list:
+        query_cache.failed()
+        return Owner.bad_owner()
+    if num_rows < 1:
+        return Owner.bad_owner()
+    return objects_from_result(Owner, result_set)[0]
+
+
+@call_trace.recorded
+@query_cache.invalidates("Owner", "Owns")
+async def delete_owner(owner_id: int) -> ReturnValue:
+    return await call_write_function("delete_owner", "DeleteOwner", owner_id)
+
+
+@call_trace.recorded
+@query_cache.invalidates("Apartment")
+async def add_apartment(apartment: Apartment) -> ReturnValue:
+    query = sql.SQL(
+        """
+    INSERT INTO Apartment (ApartmentID, Address, City, Country, Size)
+    VALUES ({apartment_id}, {address}, {city}, {country}, {size})
+    ON CONFLICT DO NOTHING
+    RETURNING ApartmentID
+    """
+    ).format(
+        apartment_id=sql.Literal(apartment.get_id()),
+        address=sql.Literal(apartment.get_address()),
+        city=sql.Literal(apartment.get_city()),
+        country=sql.Literal(apartment.get_country()),
+        size=sql.Literal(apartment.get_size()),
+    )
+    try:
+        inserted, _ = await pool.execute(query, name="add_apartment")
+    except exception_list as e:
+        return handle_errors(e)
+    return ReturnValue["OK"] if inserted else ReturnValue["ALREADY_EXISTS"]
+
+
+@call_trace.recorded
+@query_cache.cached("Apartment")
+async def get_apartment(apartment_id: int) -> Apartment:
+    query = sql.SQL(
+        """
+    SELECT * FROM Apartment WHERE ApartmentID = {apartment_id}
+    """
+    ).format(apartment_id=sql.Literal(apartment_id))
+    try:
+        num_rows, result_set = await pool.execute(query, name="get_apartment")
+    except exception_list:
+        query_cache.failed()
+        return Apartment.bad_apartment()
+    if num_rows < 1:
+        return Apartment.bad_apartment()
+    return objects_from_result(Apartment, result_set)[0]
+
+
+@call_trace.recorded
+@query_cache.invalidates("Apartment", "Owns", "Reservation", "Review")
+async def delete_apartment(apartment_id: int) -> ReturnValue:
+    query = sql.SQL(
+        """
+    DELETE FROM Apartment WHERE {apartment_id} > 0 AND ApartmentID = {apartment_id}
+    """
+    ).format(apartment_id=sql.Literal(apartment_id))
+    try:
+        rows_affected, _ = await pool.execute(query, name="delete_apartment")
+    except exception_list as e:
+        return handle_errors(e)
+    if rows_affected != 1:
+        if apartment_id is None or apartment_id <= 0:
+            return ReturnValue["BAD_PARAMS"]
+        return ReturnValue["NOT_EXISTS"]
+    return ReturnValue["OK"]
+
+
+@call_trace.recorded
+@query_cache.invalidates("Customer")
+async def add_customer(customer: Customer) -> ReturnValue:
+    query = sql.SQL(
+        """
+    INSERT INTO Customer (CustomerID, Name)
+    VALUES({customer_id}, {customer_name})
+    ON CONFLICT DO NOTHING
+    RETURNING CustomerID
+    """
+    ).format(
+        customer_id=sql.Literal(customer.get_customer_id()),
+        customer_name=sql.Literal(customer.get_customer_name()),
+    )
+    try:
+        inserted, _ = await pool.execute(query, name="add_customer")
+    except exception_list as e:
+        return handle_errors(e)
+    return ReturnValue["OK"] if inserted else ReturnValue["ALREADY_EXISTS"]
+
+
+@call_trace.recorded
+@query_cache.cached("Customer")
+async def get_customer(customer_id: int) -> Customer:
+    query = sql.SQL(
+        """
+    SELECT CustomerID, Name FROM Customer WHERE CustomerID = {customer_id}
+    """
+    ).format(customer_id=sql.Literal(customer_id))
+    try:
+        rows, result_set = await pool.execute(query, name="get_customer")
+    except exception_list:
+        query_cache.failed()
+        return Customer.bad_customer()
+    if rows < 1:
+        return Customer.bad_customer()
+    return objects_from_result(Customer, result_set)[0]
+
+
+@call_trace.recorded
+@query_cache.invalidates("Customer", "Reservation", "Review")
+async def delete_customer(customer_id: int) -> ReturnValue:
+    return await call_write_function("delete_customer", "DeleteCustomer", customer_id)
+
+
+@call_trace.recorded
+@query_cache.invalidates("Reservation")
+async def customer_made_reservation(
+    customer_id: int,
+    apartment_id: int,
+    start_date: date,
+    end_date: date,
+    total_price: float,
+) -> ReturnValue:
+    return await call_write_function("customer_made_reservation",
+                                     "MakeReservation", customer_id, apartment_id, start_date, end_date, total_price)
+
+
+@call_trace.recorded
+@query_cache.invalidates("Reservation")
+async def customer_cancelled_reservation(customer_id: int, apartment_id: int, start_date: date) -> ReturnValue:
+    return await call_write_function("customer_cancelled_reservation",
+                                     "CancelReservation", customer_id, apartment_id, start_date)
+
+
+@call_trace.recorded
+@query_cache.invalidates("Review")
+async def customer_reviewed_apartment(
+    customer_id: int,
+    apartment_id: int,
+    review_date: date,
+    rating: int,
+    review_text: str,
+) -> ReturnValue:
+    return await call_write_function("customer_reviewed_apartment",
+                                     "ReviewApartment", customer_id, apartment_id, review_date, rating, review_text)
+
+
+@call_trace.recorded
+@query_cache.invalidates("Review")
+async def customer_updated_review(
+    customer_id: int,
+    apartment_id: int,
+    update_date: date,
+    new_rating: int,
+    new_text: str,
+) -> ReturnValue:
+    query = sql.SQL(
+        """
+    UPDATE Review
+    SET reviewdate = {update_date}, rating = {new_rating}, reviewtext = {new_text}
+    WHERE CustomerID = {customer_id} AND ApartmentID = {apartment_id} AND reviewdate<={update_date}
+    """
+    ).format(
+        update_date=sql.Literal(update_date),
+        new_rating=sql.Literal(new_rating),
+        new_text=sql.Literal(new_text),
+        customer_id=sql.Literal(customer_id),
+        apartment_id=sql.Literal(apartment_id),
+    )
+    try:
+        rows_affected, _ = await pool.execute(query, name="customer_updated_review")
+    except exception_list as e:
+        return handle_errors(e)
+    if rows_affected == 0:
+        if (
+            customer_id is None
+            or customer_id <= 0
+            or apartment_id is None
+            or apartment_id <= 0
+            or new_rating is None
+            or new_rating < 1
+            or new_rating > 10
+        ):
+            return ReturnValue["BAD_PARAMS"]
+        return ReturnValue["NOT_EXISTS"]
+    return ReturnValue["OK"]
+
+
+@call_trace.recorded
+@query_cache.invalidates("Owns")
+async def owner_owns_apartment(owner_id: int, apartment_id: int) -> ReturnValue:
+    query = sql.SQL(
+        """
+    INSERT INTO Owns (OwnerID, ApartmentID)
+    VALUES ({owner_id}, {apartment_id})
+    ON CONFLICT DO NOTHING
+    RETURNING ApartmentID
+    """
+    ).format(owner_id=sql.Literal(owner_id), apartment_id=sql.Literal(apartment_id))
+    try:
+        inserted, _ = await pool.execute(query, name="owner_owns_apartment")
+    except exception_list as e:
+        return handle_errors(e)
+    return ReturnValue["OK"] if inserted else ReturnValue["ALREADY_EXISTS"]
+
+
+@call_trace.recorded
+@query_cache.invalidates("Owns")
+async def owner_drops_apartment(owner_id: int, apartment_id: int) -> ReturnValue:
+    query = sql.SQL(
+        """
+    DELETE FROM Owns
+    WHERE OwnerID = {owner_id} AND ApartmentID = {apartment_id}
+    """
+    ).format(owner_id=sql.Literal(owner_id), apartment_id=sql.Literal(apartment_id))
+    try:
+        rows_affected, _ = await pool.execute(query, name="owner_drops_apartment")
+    except exception_list as e:
+        return handle_errors(e)
+    if rows_affected != 1:
+        if owner_id is None or owner_id <= 0 or apartment_id is None or apartment_id <= 0:
+            return ReturnValue["BAD_PARAMS"]
+        return ReturnValue["NOT_EXISTS"]
+    return ReturnValue["OK"]
+
+
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns")
+async def get_apartment_owner(apartment_id: int) -> Owner:
+    query = sql.SQL(
+        """
+    SELECT o.OwnerID, o.Name
+    FROM Owner o
+    JOIN Owns os ON o.OwnerID = os.OwnerID
+    WHERE os.ApartmentID = {apartment_id}
+    """
+    ).format(apartment_id=sql.Literal(apartment_id))
+    try:
+        num_rows, result_set = await pool.execute(query, name="get_apartment_owner")
+    except exception_list:
+        query_cache.failed()
+        return Owner.bad_owner()
+    if num_rows < 1:
+        return Owner.bad_owner()
+    return objects_from_result(Owner, result_set)[0]
+
+
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment")
+async def get_owner_apartments(owner_id: int, raw: bool = False, limit: int = None,
+                               after: int = None) -> List[Apartment]:
+    if limit is not None and limit <= 0:
+        return []
+    try:
+        _, apts_data = await pool.execute(owner_apartments_query(owner_id, limit, after),
+                                          name="get_owner_apartments", raw=raw)
+    except exception_list:
+        query_cache.failed()
+        return [BAD_APARTMENT_ROW if raw else Apartment.bad_apartment()]
+    return apts_data if raw else objects_from_result(Apartment, apts_data)
+
+
+# ---------------------------------- BASIC API: ----------------------------------
+
+
+@call_trace.recorded
+@query_cache.cached("Review")
+async def get_apartment_rating(apartment_id: int) -> float:
+    query = sql.SQL(
+        """
+    SELECT AvgRating FROM Ratings WHERE ApartmentID = {apartment_id}
+    """
+    ).format(apartment_id=sql.Literal(apartment_id))
+    try:
+        rows, result = await pool.execute(query, name="get_apartment_rating")
+    except exception_list as e:
+        query_cache.failed()
+        return handle_errors(e)
+    if rows < 1:
+        return 0
+    return result[0]["AvgRating"]
+
+
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment", "Review")
+async def get_owner_rating(owner_id: int) -> float:
+    query = sql.SQL(
+        """
+    SELECT COALESCE(AVG(COALESCE(r.AvgRating, 0)), 0) AS AvgRating
+    FROM Owner o
+    LEFT JOIN OwnerApartments oa ON o.OwnerID = oa.OwnerID
+    LEFT JOIN Ratings r ON oa.ApartmentID = r.ApartmentID
+    WHERE o.OwnerID = {owner_id}
+    """
+    ).format(owner_id=sql.Literal(owner_id))
+    try:
+        rows, result = await pool.execute(query, name="get_owner_rating")
+    except exception_list as e:
+        query_cache.failed()
+        return handle_errors(e)
+    if rows < 1:
+        return 0
+    return result[0]["AvgRating"]
+
+
+@call_trace.recorded
+@query_cache.cached("Customer", "Reservation")
+async def get_top_customer() -> Customer:
+    top = await top_customers(1)
+    if not top:
+        return Customer.bad_customer()
+    return top[0][0]
+
+
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment", "Reservation")
+async def reservations_per_owner(limit: int = None, after: str = None) -> List[Tuple[str, int]]:
+    if limit is not None and limit <= 0:
+        return []
+    try:
+        _, rows = await pool.execute(reservations_per_owner_query(limit, after),
+                                     name="reservations_per_owner", raw=True)
+    except Exception:
+        query_cache.failed()
+        return []
+    return rows
+
+
+# ---------------------------------- ADVANCED API: ----------------------------------
+
+
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment")
+async def get_all_location_owners(raw: bool = False, limit: int = None, after: int = None) -> List[Owner]:
+    if limit is not None and limit <= 0:
+        return []
+    try:
+        _, resultSet = await pool.execute(all_location_owners_query(limit, after),
+                                          name="get_all_location_owners", raw=raw)
+    except Exception:
+        query_cache.failed()
+        return []
+    return resultSet if raw else objects_from_result(Owner, resultSet)
+
+
+@call_trace.recorded
+@query_cache.cached("Apartment", "Reservation", "Review")
+async def best_value_for_money() -> Apartment:
+    query = sql.SQL(
+        """
+    SELECT apt.*
+    FROM Apartment apt
+    JOIN ApartmentValue av ON av.ApartmentID = apt.ApartmentID
+    ORDER BY av.Value DESC
+    LIMIT 1;
+    """
+    )
+    try:
+        _, result_set = await pool.execute(query, name="best_value_for_money")
+    except Exception:
+        query_cache.failed()
+        return Apartment.bad_apartment()
+    if result_set.isEmpty():
+        return Apartment.bad_apartment()
+    return objects_from_result(Apartment, result_set)[0]
+
+
+@call_trace.recorded
+@query_cache.cached("Reservation")
+async def profit_per_month(year: int) -> List[Tuple[int, float]]:
+    query = sql.SQL(
+        """
+    WITH MonthSeries AS (SELECT generate_series(1, 12) AS Month)
+    SELECT MS.Month, COALESCE(MRP.Profit, 0) AS Profit
+    FROM MonthSeries MS
+    LEFT JOIN MonthlyReservationProfits MRP ON MS.Month = MRP.Month AND MRP.Year = {year}
+    ORDER BY MS.Month;
+    """
+    ).format(year=sql.Literal(year))
+    try:
+        _, resultSet = await pool.execute(query, name="profit_per_month")
+    except Exception:
+        query_cache.failed()
+        return []
+    return [(row[0], row[1]) for row in resultSet.rows]
+
+
+@call_trace.recorded
+@query_cache.cached("Apartment", "Reservation", "Review")
+async def get_apartment_recommendation(customer_id: int, raw: bool = False, limit: int = None,
+                                       after: int = None) -> List[Tuple[Apartment, float]]:
+    if limit is not None and limit <= 0:
+        return []
+    try:
+        _, resultSet = await pool.execute(apartment_recommendation_query(customer_id, limit, after),
+                                          name="get_apartment_recommendation", raw=raw)
+    except Exception:
+        query_cache.failed()
+        return []
+    return resultSet if raw else objects_from_result(Apartment, resultSet, "PredictedRating")
+
+
+# ---------------------------------- LEADERBOARD API: ----------------------------------
+
+
+@call_trace.recorded
+@query_cache.cached("Customer", "Reservation")
+async def top_customers(k: int, raw: bool = False) -> List[Tuple[Customer, int]]:
+    if k is None or k <= 0:
+        return []
+    query = sql.SQL(
+        """
+    SELECT c.CustomerID, c.Name, cs.Reservations
+    FROM CustomerStats cs
+    JOIN Customer c ON c.CustomerID = cs.CustomerID
+    WHERE cs.Reservations > 0
+    ORDER BY cs.Reservations DESC, cs.CustomerID ASC
+    LIMIT {k}
+    """
+    ).format(k=sql.Literal(k))
+    try:
+        _, resultSet = await pool.execute(query, name="top_customers", raw=raw)
+    except Exception:
+        query_cache.failed()
+        return []
+    return resultSet if raw else objects_from_result(Customer, resultSet, "Reservations")
+
+
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment", "Review")
+async def top_owners_by_rating(k: int, raw: bool = False) -> List[Tuple[Owner, float]]:
+    if k is None or k <= 0:
+        return []
+    query = sql.SQL(
+        """
+    SELECT o.OwnerID, o.Name, os.AvgRating
+    FROM OwnerStats os
+    JOIN Owner o ON o.OwnerID = os.OwnerID
+    ORDER BY os.AvgRating DESC, os.OwnerID ASC
+    LIMIT {k}
+    """
+    ).format(k=sql.Literal(k))
+    try:
+        _, resultSet = await pool.execute(query, name="top_owners_by_rating", raw=raw)
+    except Exception:
+        query_cache.failed()
+        return []
+    return resultSet if raw else objects_from_result(Owner, resultSet, "AvgRating")
+
+
+@call_trace.recorded
+@query_cache.cached("Apartment", "Reservation", "Review")
+async def best_value_apartments(k: int, raw: bool = False) -> List[Tuple[Apartment, float]]:
+    if k is None or k <= 0:
+        return []
+    query = sql.SQL(
+        """
+    SELECT apt.ApartmentID, apt.Address, apt.City, apt.Country, apt.Size, s.Value
+    FROM ApartmentStats s
+    JOIN Apartment apt ON apt.ApartmentID = s.ApartmentID
+    WHERE s.Value IS NOT NULL
+    ORDER BY s.Value DESC NULLS LAST, s.ApartmentID ASC
+    LIMIT {k}
+    """
+    ).format(k=sql.Literal(k))
+    try:
+        _, resultSet = await pool.execute(query, name="best_value_apartments", raw=raw)
+    except Exception:
+        query_cache.failed()
+        return []
+    return resultSet if raw else objects_from_result(Apartment, resultSet, "Value")
+
+
+# ---------------------------------- SEARCH API: ----------------------------------
+
+
+@call_trace.recorded
+@query_cache.cached("Review")
+async def search_reviews(query: str, apartment_id: int = None, min_rating: int = None,
+                         limit: int = 20) -> List[Tuple[int, int, date, int, str, float]]:
+    search = search_reviews_query(query, apartment_id, min_rating, limit)
+    if search is None:
+        return []
+    try:
+        _, rows = await pool.execute(search, name="search_reviews", raw=True)
+    except Exception:
+        query_cache.failed()
+        return []
+    return rows
+
+
+# ---------------------------------- MARKET API: ----------------------------------
+
+
+@call_trace.recorded
+@query_cache.cached("Apartment", "Reservation")
+async def nightly_price_stats(country: str, city: str, year: int) -> Tuple[int, float, float, float, float]:
+    try:
+        _, result = await pool.execute(nightly_price_stats_query(country, city, year),
+                                       name="nightly_price_stats", raw=True)
+    except Exception:
+        query_cache.failed()
+        return NO_NIGHTLY_PRICES
+    return nightly_price_stats_from(result[0])
+
+
+# ---------------------------------- OCCUPANCY API: ----------------------------------
+
+
+@call_trace.recorded
+@query_cache.cached("Apartment", "Reservation")
+async def apartment_occupancy(apartment_id: int, year: int) -> List[Tuple[int, float]]:
+    return await occupancy("apartment_occupancy", occupancy_query("Apartment", "ApartmentID", apartment_id, year))
+
+
+@call_trace.recorded
+@query_cache.cached("Owns", "Apartment", "Reservation")
+async def owner_occupancy(owner_id: int, year: int) -> List[Tuple[int, float]]:
+    return await occupancy("owner_occupancy", occupancy_query("Owns", "OwnerID", owner_id, year))
+
+
+async def occupancy(name: str, query: sql.Composed) -> List[Tuple[int, float]]:
+    try:
+        _, rows = await pool.execute(query, name=name, raw=True)
+    except Exception:
+        query_cache.failed()
+        return []
+    return [(month, float(rate)) for month, rate in rows]
+
+
+# ---------------------------------- PORTFOLIO API: ----------------------------------
+
+
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment", "Reservation", "Review")
+async def get_owner_portfolio(owner_id: int) -> dict:
+    try:
+        _, rows = await pool.execute(owner_portfolio_query(owner_id), name="get_owner_portfolio", raw=True)
+    except Exception:
+        query_cache.failed()
+        return portfolio_from(None)
+    return portfolio_from(rows[0] if rows else None)
+
+
+# ---------------------------------- UPSERT API: ----------------------------------
+
+
+async def upsert(name: str, query: sql.Composed) -> ReturnValue:
+    try:
+        await pool.execute(query, name=name)
+    except exception_list as e:
+        return handle_errors(e)
+    return ReturnValue["OK"]
+
+
+@call_trace.recorded
+@query_cache.invalidates("Owner")
+async def upsert_owner(owner: Owner) -> ReturnValue:
+    return await upsert("upsert_owner", sql.SQL(
+        """
+    INSERT INTO Owner (OwnerID, Name)
+    VALUES ({owner_id}, {name})
+    ON CONFLICT (OwnerID) DO UPDATE SET Name = EXCLUDED.Name
+    """
+    ).format(owner_id=sql.Literal(owner.get_owner_id()), name=sql.Literal(owner.get_owner_name())))
+
+
+@call_trace.recorded
+@query_cache.invalidates("Customer")
+async def upsert_customer(customer: Customer) -> ReturnValue:
+    return await upsert("upsert_customer", sql.SQL(
+        """
+    INSERT INTO Customer (CustomerID, Name)
+    VALUES ({customer_id}, {name})
+    ON CONFLICT (CustomerID) DO UPDATE SET Name = EXCLUDED.Name
+    """
+    ).format(customer_id=sql.Literal(customer.get_customer_id()), name=sql.Literal(customer.get_customer_name())))
+
+
+@call_trace.recorded
+@query_cache.invalidates("Apartment")
+async def upsert_apartment(apartment: Apartment) -> ReturnValue:
+    return await upsert("upsert_apartment", sql.SQL(
+        """
+    INSERT INTO Apartment (ApartmentID, Address, City, Country, Size)
+    VALUES ({apartment_id}, {address}, {city}, {country}, {size})
+    ON CONFLICT (ApartmentID) DO UPDATE
+    SET Address = EXCLUDED.Address, City = EXCLUDED.City, Country = EXCLUDED.Country, Size = EXCLUDED.Size
+    """
+    ).format(
+        apartment_id=sql.Literal(apartment.get_id()),
+        address=sql.Literal(apartment.get_address()),
+        city=sql.Literal(apartment.get_city()),
+        country=sql.Literal(apartment.get_country()),
+        size=sql.Literal(apartment.get_size()),
+    ))
+
+
+@call_trace.recorded
+@query_cache.invalidates("Owns")
+async def upsert_owns(owner_id: int, apartment_id: int) -> ReturnValue:
+    return await upsert("upsert_owns", sql.SQL(
+        """
+    INSERT INTO Owns (OwnerID, ApartmentID)
+    VALUES ({owner_id}, {apartment_id})
+    ON CONFLICT (ApartmentID) DO UPDATE SET OwnerID = EXCLUDED.OwnerID
+    """
+    ).format(owner_id=sql.Literal(owner_id), apartment_id=sql.Literal(apartment_id)))
+
+
+# ---------------------------------- UPDATE API: ----------------------------------
+
+
+async def update_columns(name: str, obj, table: str, key_column: str, key: int, columns: dict) -> ReturnValue:
+    if key is None or key <= 0:
+        return ReturnValue["BAD_PARAMS"]
+    query = update_query(table, key_column, key, columns)
+    if query is None:
+        return ReturnValue["OK"]
+    try:
+        updated, _ = await pool.execute(query, name=name)
+    except exception_list as e:
+        return handle_errors(e)
+    if updated < 1:
+        return ReturnValue["NOT_EXISTS"]
+    obj.mark_clean()
+    return ReturnValue["OK"]
+
+
+@call_trace.recorded
+@query_cache.invalidates("Owner")
+async def update_owner(owner: Owner) -> ReturnValue:
+    return await update_columns("update_owner", owner, "Owner", "OwnerID", owner.get_owner_id(),
+                                dirty_columns(owner, {"owner_name": "Name"}))
+
+
+@call_trace.recorded
+@query_cache.invalidates("Customer")
+async def update_customer(customer: Customer) -> ReturnValue:
+    return await update_columns("update_customer", customer, "Customer", "CustomerID", customer.get_customer_id(),
+                                dirty_columns(customer, {"customer_name": "Name"}))
+
+
+@call_trace.recorded
+@query_cache.invalidates("Apartment")
+async def update_apartment(apartment: Apartment) -> ReturnValue:
+    return await update_columns("update_apartment", apartment, "Apartment", "ApartmentID", apartment.get_id(),
+                                dirty_columns(apartment, {"address": "Address", "city": "City", "country": "Country",
+                                                          "size": "Size"}))
@@ -1,10 +1,26 @@
 class Apartment:
+    __slots__ = ("__id", "__address", "__city", "__country", "__size", "__dirty")
+
     def __init__(self, id: int=None, address: str=None, city: str=None, country: str=None, size: float=None) -> None:
         self.__id = id
         self.__address = address
         self.__city = city
         self.__country = country
         self.__size = size
+        self.__dirty = None
+
+    # builds an apartment from a result row without going through ResultSetDict, column_index maps the lower case
+    # column names to their position in the row (ResultSet.cols)
+    @staticmethod
+    def from_row(row: tuple, column_index) -> 'Apartment':
+        apartment = Apartment.__new__(Apartment)
+        apartment.__id = row[column_index["apartmentid"]]
+        apartment.__address = row[column_index["address"]]
+        apartment.__city = row[column_index["city"]]
+        apartment.__country = row[column_index["country"]]
+        apartment.__size = row[column_index["size"]]
+        apartment.__dirty = None
+        return apartment
 
     def get_id(self):
         return self.__id
@@ -17,24 +33,41 @@ class Apartment:
     
     def set_address(self, address):
         self.__address = address
+        self.__changed("address")
 
     def get_city(self):
         return self.__city
     
     def set_city(self, city):
         self.__city = city
+        self.__changed("city")
 
     def get_country(self):
         return self.__country
     
     def set_country(self, country):
         self.__country = country
+        self.__changed("country")
 
     def get_size(self):
         return self.__size
 
     def set_size(self, size):
         self.__size = size
+        self.__changed("size")
+
+    # the set is only allocated by the first setter, most apartments are read and never changed
+    def __changed(self, field: str):
+        if self.__dirty is None:
+            self.__dirty = set()
+        self.__dirty.add(field)
+
+    # fields changed by a setter since the apartment was created or last saved, the id is not tracked
+    def dirty_fields(self) -> set:
+        return set(self.__dirty or ())
+
+    def mark_clean(self):
+        self.__dirty = None
 
     @staticmethod
     def bad_apartment():
@@ -1,7 +1,20 @@
 class Customer:
+    __slots__ = ("__id", "__name", "__dirty")
+
     def __init__(self, customer_id: int=None, customer_name: str=None) -> None:
         self.__id = customer_id
         self.__name = customer_name
+        self.__dirty = None
+
+    # builds a customer from a result row without going through ResultSetDict, column_index maps the lower case
+    # column names to their position in the row (ResultSet.cols)
+    @staticmethod
+    def from_row(row: tuple, column_index) -> 'Customer':
+        customer = Customer.__new__(Customer)
+        customer.__id = row[column_index["customerid"]]
+        customer.__name = row[column_index["name"]]
+        customer.__dirty = None
+        return customer
 
     def get_customer_id(self):
         return self.__id
@@ -14,6 +27,20 @@ class Customer:
     
     def set_customer_name(self, name):
         self.__name = name
+        self.__changed("customer_name")
+
+    # the set is only allocated by the first setter, most customers are read and never changed
+    def __changed(self, field: str):
+        if self.__dirty is None:
+            self.__dirty = set()
+        self.__dirty.add(field)
+
+    # fields changed by a setter since the customer was created or last saved, the id is not tracked
+    def dirty_fields(self) -> set:
+        return set(self.__dirty or ())
+
+    def mark_clean(self):
+        self.__dirty = None
 
     @staticmethod
     def bad_customer():
@@ -1,7 +1,20 @@
 class Owner:
+    __slots__ = ("__id", "__name", "__dirty")
+
     def __init__(self, owner_id: int=None, owner_name: str=None) -> None:
         self.__id = owner_id
         self.__name = owner_name
+        self.__dirty = None
+
+    # builds an owner from a result row without going through ResultSetDict, column_index maps the lower case
+    # column names to their position in the row (ResultSet.cols)
+    @staticmethod
+    def from_row(row: tuple, column_index) -> 'Owner':
+        owner = Owner.__new__(Owner)
+        owner.__id = row[column_index["ownerid"]]
+        owner.__name = row[column_index["name"]]
+        owner.__dirty = None
+        return owner
 
     def get_owner_id(self):
         return self.__id
@@ -14,6 +27,20 @@ class Owner:
     
     def set_owner_name(self, name):
         self.__name = name
+        self.__changed("owner_name")
+
+    # the set is only allocated by the first setter, most owners are read and never changed
+    def __changed(self, field: str):
+        if self.__dirty is None:
+            self.__dirty = set()
+        self.__dirty.add(field)
+
+    # fields changed by a setter since the owner was created or last saved, the id is not tracked
+    def dirty_fields(self) -> set:
+        return set(self.__dirty or ())
+
+    def mark_clean(self):
+        self.__dirty = None
 
     @staticmethod
     def bad_owner():
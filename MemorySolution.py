@@ -0,0 +1,890 @@
+import calendar
+import math
+import re
+from collections import Counter
+from datetime import date
+from fractions import Fraction
+from heapq import nsmallest
+from typing import List, Tuple
+
+from Utility.ReturnValue import ReturnValue
+from Utility.CallTrace import call_trace
+from Utility.MemoryIndex import SortedIndex, IntervalIndex
+
+from Business.Owner import Owner
+from Business.Customer import Customer
+from Business.Apartment import Apartment
+
+# in-process counterpart of the Solution.py API, for test runs and simulations without a database: the same
+# functions, ReturnValues and Business objects, served from dicts and the indexes of Utility/MemoryIndex.py.
+# the constraints of the schema (NOT NULL, CHECK, UNIQUE, FOREIGN KEY, ON DELETE CASCADE) are checked in the order
+# PostgreSQL checks them, so a call returns what it returns against the database. Solution.py serves its API from
+# here when $SOLUTION_BACKEND is "memory".
+# differences: the data lives in the process, there are no transactions, drop_tables empties the tables instead of
+# removing them, numbers are float instead of Decimal, nightly_price_stats has exact percentiles and search_reviews
+# has its own light stemmer and ranking instead of the english text search configuration
+
+__all__ = [
+    "create_tables", "clear_tables", "drop_tables",
+    "add_owner", "get_owner", "delete_owner", "add_apartment", "get_apartment", "delete_apartment",
+    "add_customer", "get_customer", "delete_customer",
+    "customer_made_reservation", "customer_cancelled_reservation", "customer_reviewed_apartment",
+    "customer_updated_review", "owner_owns_apartment", "owner_drops_apartment", "get_apartment_owner",
+    "get_owner_apartments",
+    "get_apartment_rating", "get_owner_rating", "get_top_customer", "reservations_per_owner",
+    "get_all_location_owners", "best_value_for_money", "profit_per_month", "get_apartment_recommendation",
+    "top_customers", "top_owners_by_rating", "best_value_apartments",
+    "search_reviews", "nightly_price_stats", "apartment_occupancy", "owner_occupancy", "get_owner_portfolio",
+    "upsert_owner", "upsert_customer", "upsert_apartment", "upsert_owns",
+    "update_owner", "update_customer", "update_apartment",
+]
+
+
+class Reservation:
+    __slots__ = ("customer_id", "apartment_id", "start_date", "end_date", "price")
+
+    def __init__(self, customer_id: int, apartment_id: int, start_date: date, end_date: date, price: float):
+        self.customer_id = customer_id
+        self.apartment_id = apartment_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.price = price
+
+    # nightly price, None for a stay of zero nights
+    def nightly_price(self):
+        nights = (self.end_date - self.start_date).days
+        return self.price / nights if nights > 0 else None
+
+
+class Review:
+    __slots__ = ("customer_id", "apartment_id", "review_date", "rating", "review_text", "terms")
+
+    def __init__(self, customer_id: int, apartment_id: int, review_date: date, rating: int, review_text: str):
+        self.customer_id = customer_id
+        self.apartment_id = apartment_id
+        self.set(review_date, rating, review_text)
+
+    def set(self, review_date: date, rating: int, review_text: str):
+        self.review_date = review_date
+        self.rating = rating
+        self.review_text = review_text
+        self.terms = search_terms(review_text)
+
+
+class Tables:
+    # the rows of the six tables and the indexes the API reads them through
+    def __init__(self):
+        # Owner and Customer: id -> name, owners also by id and by name
+        self.owners = {}
+        self.owner_ids = SortedIndex()
+        self.owners_named = {}
+        self.owner_names = SortedIndex()
+        self.customers = {}
+        # Apartment: id -> (address, city, country, size), also by id, by (address, city, country) (the UNIQUE
+        # constraint) and by location, (city, country) -> ids
+        self.apartments = {}
+        self.apartment_ids = SortedIndex()
+        self.addresses = set()
+        self.locations = {}
+        # Owns: apartment id -> owner id, owner id -> apartment ids and the Counter of their locations
+        self.owner_of = {}
+        self.owned = {}
+        self.owned_locations = {}
+        # Reservation: by apartment (IntervalIndex of the stays) and by customer
+        self.stays = {}
+        self.customer_stays = {}
+        # Review: by (customer id, apartment id), by apartment and by customer
+        self.reviews = {}
+        self.apartment_reviews = {}
+        self.customer_reviews = {}
+
+
+tables = Tables()
+
+
+def positive(value) -> bool:
+    return value is not None and value > 0
+
+
+# ---------------------------------- CRUD API: ----------------------------------
+
+
+@call_trace.recorded
+def create_tables():
+    pass
+
+
+@call_trace.recorded
+def clear_tables():
+    global tables
+    tables = Tables()
+
+
+@call_trace.recorded
+def drop_tables():
+    global tables
+    tables = Tables()
+
+
+@call_trace.recorded
+def add_owner(owner: Owner) -> ReturnValue:
+    owner_id, name = owner.get_owner_id(), owner.get_owner_name()
+    if not positive(owner_id) or name is None:
+        return ReturnValue.BAD_PARAMS
+    if owner_id in tables.owners:
+        return ReturnValue.ALREADY_EXISTS
+    insert_owner(owner_id, name)
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def get_owner(owner_id: int) -> Owner:
+    if owner_id not in tables.owners:
+        return Owner.bad_owner()
+    return Owner(owner_id, tables.owners[owner_id])
+
+
+@call_trace.recorded
+def delete_owner(owner_id: int) -> ReturnValue:
+    if not positive(owner_id):
+        return ReturnValue.BAD_PARAMS
+    if owner_id not in tables.owners:
+        return ReturnValue.NOT_EXISTS
+    for apartment_id in list(tables.owned.get(owner_id, ())):
+        drop_ownership(apartment_id)
+    rename_owner(owner_id, None)
+    del tables.owners[owner_id]
+    tables.owner_ids.discard(owner_id)
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def add_apartment(apartment: Apartment) -> ReturnValue:
+    row = apartment_row(apartment)
+    if row is None:
+        return ReturnValue.BAD_PARAMS
+    if apartment.get_id() in tables.apartments or row[:3] in tables.addresses:
+        return ReturnValue.ALREADY_EXISTS
+    tables.apartment_ids.add(apartment.get_id())
+    place_apartment(apartment.get_id(), row)
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def get_apartment(apartment_id: int) -> Apartment:
+    if apartment_id not in tables.apartments:
+        return Apartment.bad_apartment()
+    return Apartment(apartment_id, *tables.apartments[apartment_id])
+
+
+@call_trace.recorded
+def delete_apartment(apartment_id: int) -> ReturnValue:
+    if not positive(apartment_id):
+        return ReturnValue.BAD_PARAMS
+    if apartment_id not in tables.apartments:
+        return ReturnValue.NOT_EXISTS
+    if apartment_id in tables.owner_of:
+        drop_ownership(apartment_id)
+    for stay in list(tables.stays.get(apartment_id, ())):
+        remove_stay(stay)
+    for review in list(tables.apartment_reviews.get(apartment_id, {}).values()):
+        remove_review(review)
+    unplace_apartment(apartment_id)
+    tables.apartment_ids.discard(apartment_id)
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def add_customer(customer: Customer) -> ReturnValue:
+    customer_id, name = customer.get_customer_id(), customer.get_customer_name()
+    if not positive(customer_id) or name is None:
+        return ReturnValue.BAD_PARAMS
+    if customer_id in tables.customers:
+        return ReturnValue.ALREADY_EXISTS
+    tables.customers[customer_id] = name
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def get_customer(customer_id: int) -> Customer:
+    if customer_id not in tables.customers:
+        return Customer.bad_customer()
+    return Customer(customer_id, tables.customers[customer_id])
+
+
+@call_trace.recorded
+def delete_customer(customer_id: int) -> ReturnValue:
+    if not positive(customer_id):
+        return ReturnValue.BAD_PARAMS
+    if customer_id not in tables.customers:
+        return ReturnValue.NOT_EXISTS
+    for stay in list(tables.customer_stays.get(customer_id, ())):
+        remove_stay(stay)
+    for review in list(tables.customer_reviews.get(customer_id, {}).values()):
+        remove_review(review)
+    del tables.customers[customer_id]
+    return ReturnValue.OK
+
+
+# the checks of the MakeReservation function: ids, overlap with the apartment's stays, the CHECK constraints and
+# last the foreign keys
+@call_trace.recorded
+def customer_made_reservation(customer_id: int, apartment_id: int, start_date: date, end_date: date,
+                              total_price: float) -> ReturnValue:
+    if not positive(customer_id) or not positive(apartment_id):
+        return ReturnValue.BAD_PARAMS
+    stays = tables.stays.get(apartment_id)
+    if stays is not None and start_date is not None and end_date is not None and stays.overlaps(start_date, end_date):
+        return ReturnValue.BAD_PARAMS
+    if start_date is None or end_date is None or end_date < start_date or not positive(total_price):
+        return ReturnValue.BAD_PARAMS
+    if customer_id not in tables.customers or apartment_id not in tables.apartments:
+        return ReturnValue.NOT_EXISTS
+    stay = Reservation(customer_id, apartment_id, start_date, end_date, total_price)
+    tables.stays.setdefault(apartment_id, IntervalIndex()).add(start_date, end_date, stay)
+    tables.customer_stays.setdefault(customer_id, set()).add(stay)
+    return ReturnValue.OK
+
+
+# like the CancelReservation function, OK only if exactly one stay was cancelled
+@call_trace.recorded
+def customer_cancelled_reservation(customer_id: int, apartment_id: int, start_date: date) -> ReturnValue:
+    if not positive(customer_id) or not positive(apartment_id):
+        return ReturnValue.BAD_PARAMS
+    stays = tables.stays.get(apartment_id)
+    if stays is None or start_date is None:
+        return ReturnValue.NOT_EXISTS
+    cancelled = [stay for stay in stays.starting(start_date) if stay.customer_id == customer_id]
+    for stay in cancelled:
+        remove_stay(stay)
+    return ReturnValue.OK if len(cancelled) == 1 else ReturnValue.NOT_EXISTS
+
+
+@call_trace.recorded
+def customer_reviewed_apartment(customer_id: int, apartment_id: int, review_date: date, rating: int,
+                                review_text: str) -> ReturnValue:
+    stayed = review_date is not None and any(
+        stay.apartment_id == apartment_id and stay.end_date <= review_date
+        for stay in tables.customer_stays.get(customer_id, ()))
+    if not stayed:
+        if not valid_rating(rating) or not positive(apartment_id) or not positive(customer_id):
+            return ReturnValue.BAD_PARAMS
+        return ReturnValue.NOT_EXISTS
+    if not valid_rating(rating):
+        return ReturnValue.BAD_PARAMS
+    if (customer_id, apartment_id) in tables.reviews:
+        return ReturnValue.ALREADY_EXISTS
+    review = Review(customer_id, apartment_id, review_date, rating, review_text)
+    tables.reviews[customer_id, apartment_id] = review
+    tables.apartment_reviews.setdefault(apartment_id, {})[customer_id] = review
+    tables.customer_reviews.setdefault(customer_id, {})[apartment_id] = review
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def customer_updated_review(customer_id: int, apartment_id: int, update_date: date, new_rating: int,
+                            new_text: str) -> ReturnValue:
+    review = tables.reviews.get((customer_id, apartment_id))
+    if review is None or update_date is None or review.review_date > update_date:
+        if not positive(customer_id) or not positive(apartment_id) or not valid_rating(new_rating):
+            return ReturnValue.BAD_PARAMS
+        return ReturnValue.NOT_EXISTS
+    if not valid_rating(new_rating):
+        return ReturnValue.BAD_PARAMS
+    review.set(update_date, new_rating, new_text)
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def owner_owns_apartment(owner_id: int, apartment_id: int) -> ReturnValue:
+    if not positive(owner_id) or not positive(apartment_id):
+        return ReturnValue.BAD_PARAMS
+    if apartment_id in tables.owner_of:
+        return ReturnValue.ALREADY_EXISTS
+    if owner_id not in tables.owners or apartment_id not in tables.apartments:
+        return ReturnValue.NOT_EXISTS
+    take_ownership(owner_id, apartment_id)
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def owner_drops_apartment(owner_id: int, apartment_id: int) -> ReturnValue:
+    if owner_id is None or tables.owner_of.get(apartment_id) != owner_id:
+        if not positive(owner_id) or not positive(apartment_id):
+            return ReturnValue.BAD_PARAMS
+        return ReturnValue.NOT_EXISTS
+    drop_ownership(apartment_id)
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def get_apartment_owner(apartment_id: int) -> Owner:
+    if apartment_id not in tables.owner_of:
+        return Owner.bad_owner()
+    owner_id = tables.owner_of[apartment_id]
+    return Owner(owner_id, tables.owners[owner_id])
+
+
+# apartments by id, limit and after page through them like in Solution.get_owner_apartments
+@call_trace.recorded
+def get_owner_apartments(owner_id: int, raw: bool = False, limit: int = None,
+                         after: int = None) -> List[Apartment]:
+    if limit is not None and limit <= 0 or owner_id not in tables.owned:
+        return []
+    return [apartment_result(apartment_id, raw) for apartment_id in tables.owned[owner_id].page(after, limit)]
+
+
+# ---------------------------------- BASIC API: ----------------------------------
+
+
+@call_trace.recorded
+def get_apartment_rating(apartment_id: int) -> float:
+    return average_rating(apartment_id) or 0
+
+
+@call_trace.recorded
+def get_owner_rating(owner_id: int) -> float:
+    return owner_rating(owner_id)
+
+
+@call_trace.recorded
+def get_top_customer() -> Customer:
+    top = top_customer_counts(1)
+    if not top:
+        return Customer.bad_customer()
+    return Customer(top[0][1], tables.customers[top[0][1]])
+
+
+@call_trace.recorded
+def reservations_per_owner(limit: int = None, after: str = None) -> List[Tuple[str, int]]:
+    if limit is not None and limit <= 0:
+        return []
+    return [
+        (name, sum(len(tables.stays.get(apartment_id, ()))
+                   for owner_id in tables.owners_named[name]
+                   for apartment_id in tables.owned.get(owner_id, ())))
+        for name in tables.owner_names.page(after, limit)
+    ]
+
+
+# ---------------------------------- ADVANCED API: ----------------------------------
+
+
+# an owner owns in every location when its Counter of locations has as many keys as there are locations
+@call_trace.recorded
+def get_all_location_owners(raw: bool = False, limit: int = None, after: int = None) -> List[Owner]:
+    if limit is not None and limit <= 0 or not tables.locations:
+        return []
+    owners = []
+    for owner_id in tables.owner_ids.page(after):
+        if len(tables.owned_locations.get(owner_id, ())) == len(tables.locations):
+            owners.append((owner_id, tables.owners[owner_id]) if raw else Owner(owner_id, tables.owners[owner_id]))
+            if len(owners) == limit:
+                break
+    return owners
+
+
+# apartments without a stay of at least one night have no value and come first, like the NULLs of ORDER BY DESC
+@call_trace.recorded
+def best_value_for_money() -> Apartment:
+    best = None
+    for apartment_id in tables.apartment_ids:
+        if not tables.stays.get(apartment_id):
+            continue
+        value = apartment_value(apartment_id)
+        if value is None:
+            return apartment_result(apartment_id, False)
+        if best is None or value > best[0]:
+            best = (value, apartment_id)
+    return Apartment.bad_apartment() if best is None else apartment_result(best[1], False)
+
+
+@call_trace.recorded
+def profit_per_month(year: int) -> List[Tuple[int, float]]:
+    prices = {month: [] for month in range(1, 13)}
+    for stays in tables.customer_stays.values():
+        for stay in stays:
+            if stay.end_date.year == year:
+                prices[stay.end_date.month].append(stay.price)
+    return [(month, sum(prices[month]) * 0.15 if prices[month] else 0) for month in range(1, 13)]
+
+
+# as in the RatingRatio view and the query of Solution.get_apartment_recommendation: the customer's average rating
+# ratio with every other reviewer of a common apartment, applied to that reviewer's other ratings. a reviewer
+# without a common apartment predicts 1, as GREATEST(1, NULL) does. the averages are exact fractions, rounded to
+# float once at the end
+@call_trace.recorded
+def get_apartment_recommendation(customer_id: int, raw: bool = False, limit: int = None,
+                                 after: int = None) -> List[Tuple[Apartment, float]]:
+    if limit is not None and limit <= 0:
+        return []
+    ratios = {}
+    for apartment_id, review in tables.customer_reviews.get(customer_id, {}).items():
+        for other_id, other in tables.apartment_reviews[apartment_id].items():
+            if other_id != customer_id:
+                ratios.setdefault(other_id, []).append(Fraction(review.rating, other.rating))
+    ratios = {other_id: sum(values) / len(values) for other_id, values in ratios.items()}
+    stayed = {stay.apartment_id for stay in tables.customer_stays.get(customer_id, ())}
+    recommendations = []
+    for apartment_id in tables.apartment_ids.page(after):
+        if apartment_id in stayed:
+            continue
+        predictions = [
+            1 if other_id not in ratios else min(10, max(1, review.rating * ratios[other_id]))
+            for other_id, review in sorted(tables.apartment_reviews.get(apartment_id, {}).items())
+            if other_id != customer_id
+        ]
+        if predictions:
+            rating = sum(predictions) / len(predictions)
+            recommendations.append(apartment_result(apartment_id, raw, float(rating)))
+            if len(recommendations) == limit:
+                break
+    return recommendations
+
+
+# ---------------------------------- LEADERBOARD API: ----------------------------------
+
+
+@call_trace.recorded
+def top_customers(k: int, raw: bool = False) -> List[Tuple[Customer, int]]:
+    if k is None or k <= 0:
+        return []
+    top = top_customer_counts(k)
+    return [
+        (customer_id, tables.customers[customer_id], -count) if raw
+        else (Customer(customer_id, tables.customers[customer_id]), -count)
+        for count, customer_id in top
+    ]
+
+
+@call_trace.recorded
+def top_owners_by_rating(k: int, raw: bool = False) -> List[Tuple[Owner, float]]:
+    if k is None or k <= 0:
+        return []
+    top = nsmallest(k, ((-owner_rating(owner_id), owner_id) for owner_id in tables.owners))
+    return [
+        (owner_id, tables.owners[owner_id], -rating) if raw else (Owner(owner_id, tables.owners[owner_id]), -rating)
+        for rating, owner_id in top
+    ]
+
+
+@call_trace.recorded
+def best_value_apartments(k: int, raw: bool = False) -> List[Tuple[Apartment, float]]:
+    if k is None or k <= 0:
+        return []
+    values = ((apartment_value(apartment_id), apartment_id) for apartment_id in tables.stays)
+    top = nsmallest(k, ((-value, apartment_id) for value, apartment_id in values if value is not None))
+    return [apartment_result(apartment_id, raw, -value) for value, apartment_id in top]
+
+
+# ---------------------------------- SEARCH API: ----------------------------------
+
+
+STOP_WORDS = frozenset(
+    "a an and are as at be been but by for from had has have he her his i if in into is it its me my no not of on "
+    "or our she so such than that the their them then there these they this to too us very was we were will with "
+    "you your".split()
+)
+
+
+# word -> stem by dropping the common English inflections, the same word forms meet on the same stem
+def stem(word: str) -> str:
+    for suffix, replacement in (("ies", "y"), ("sses", "ss"), ("ing", ""), ("ed", ""), ("es", ""), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith(("ss", "us", "is")):
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+# the stems of a text and the positions of each, stop words are left out but keep their position
+def search_terms(text: str) -> dict:
+    terms = {}
+    for position, word in enumerate(re.findall(r"[a-z0-9]+", (text or "").lower())):
+        if word not in STOP_WORDS:
+            terms.setdefault(stem(word), []).append(position)
+    return terms
+
+
+# the web search syntax of websearch_to_tsquery: words and "quoted phrases" must all match, -word must not, or
+# separates alternatives. returns the alternatives as (required, excluded) lists of phrases, a phrase is a list of
+# (offset, stem)
+def parse_search(query: str) -> List[Tuple[list, list]]:
+    alternatives, required, excluded = [], [], []
+    for negated, quoted, word in re.findall(r'(-?)(?:"([^"]*)"|([^\s"]+))', query):
+        if not quoted and word.lower() == "or" and not negated:
+            alternatives.append((required, excluded))
+            required, excluded = [], []
+            continue
+        words = re.findall(r"[a-z0-9]+", (quoted or word).lower())
+        phrase = [(offset, stem(word)) for offset, word in enumerate(words) if word not in STOP_WORDS]
+        if phrase:
+            (excluded if negated else required).append(phrase)
+    alternatives.append((required, excluded))
+    return [(required, excluded) for required, excluded in alternatives if required or excluded]
+
+
+# the number of times the phrase occurs in terms
+def phrase_matches(terms: dict, phrase: list) -> int:
+    first_offset, first = phrase[0]
+    return sum(
+        all(position - first_offset + offset in terms.get(term, ()) for offset, term in phrase[1:])
+        for position in terms.get(first, ())
+    )
+
+
+# the rank is the number of occurrences of the matched words and phrases
+def search_rank(terms: dict, alternatives: list):
+    ranks = [
+        sum(phrase_matches(terms, phrase) for phrase in required)
+        for required, excluded in alternatives
+        if all(phrase_matches(terms, phrase) for phrase in required)
+        and not any(phrase_matches(terms, phrase) for phrase in excluded)
+    ]
+    return max(ranks) if ranks else None
+
+
+@call_trace.recorded
+def search_reviews(query: str, apartment_id: int = None, min_rating: int = None,
+                   limit: int = 20) -> List[Tuple[int, int, date, int, str, float]]:
+    if not query or not query.strip() or limit is None or limit <= 0:
+        return []
+    alternatives = parse_search(query)
+    if not alternatives:
+        return []
+    if apartment_id is None:
+        reviews = tables.reviews.values()
+    else:
+        reviews = tables.apartment_reviews.get(apartment_id, {}).values()
+    results = []
+    for review in reviews:
+        if min_rating is not None and review.rating < min_rating:
+            continue
+        rank = search_rank(review.terms, alternatives)
+        if rank is not None:
+            results.append((review.customer_id, review.apartment_id, review.review_date, review.rating,
+                            review.review_text, float(rank)))
+    results.sort(key=lambda result: (-result[5], result[1], result[0]))
+    return results[:limit]
+
+
+# ---------------------------------- MARKET API: ----------------------------------
+
+
+# as Solution.nightly_price_stats, with the exact percentiles (nearest rank) of the location's stays
+@call_trace.recorded
+def nightly_price_stats(country: str, city: str, year: int) -> Tuple[int, float, float, float, float]:
+    prices = sorted(
+        stay.nightly_price()
+        for apartment_id in tables.locations.get((city, country), ())
+        for stay in tables.stays.get(apartment_id, ())
+        if stay.start_date.year == year and stay.nightly_price() is not None
+    )
+    if not prices:
+        return 0, None, None, None, None
+    percentiles = [float(prices[max(0, math.ceil(fraction * len(prices)) - 1)]) for fraction in (0.50, 0.90, 0.99)]
+    return (len(prices), float(sum(prices) / len(prices)), *percentiles)
+
+
+# ---------------------------------- OCCUPANCY API: ----------------------------------
+
+
+@call_trace.recorded
+def apartment_occupancy(apartment_id: int, year: int) -> List[Tuple[int, float]]:
+    if apartment_id not in tables.apartments:
+        return []
+    return occupancy([apartment_id], year)
+
+
+@call_trace.recorded
+def owner_occupancy(owner_id: int, year: int) -> List[Tuple[int, float]]:
+    if not tables.owned.get(owner_id):
+        return []
+    return occupancy(list(tables.owned[owner_id]), year)
+
+
+# booked nights of the apartments in every month of year over their available nights, the stays of the year come
+# from the IntervalIndex of every apartment
+def occupancy(apartment_ids: list, year: int) -> List[Tuple[int, float]]:
+    months = [date(year, month, 1) for month in range(1, 13)] + [date(year + 1, 1, 1)]
+    nights = [0] * 12
+    for apartment_id in apartment_ids:
+        stays = tables.stays.get(apartment_id)
+        for stay in stays.overlapping(months[0], months[12]) if stays is not None else ():
+            for month in range(stay.start_date.month - 1 if stay.start_date >= months[0] else 0, 12):
+                if months[month] >= stay.end_date:
+                    break
+                nights[month] += (min(stay.end_date, months[month + 1]) - max(stay.start_date, months[month])).days
+    return [
+        (month, nights[month - 1] / (len(apartment_ids) * calendar.monthrange(year, month)[1]))
+        for month in range(1, 13)
+    ]
+
+
+# ---------------------------------- PORTFOLIO API: ----------------------------------
+
+
+@call_trace.recorded
+def get_owner_portfolio(owner_id: int) -> dict:
+    if owner_id not in tables.owners:
+        return {"owner": Owner.bad_owner(), "apartments": [], "rating": 0, "reservations": 0, "revenue": 0}
+    apartments = []
+    for apartment_id in tables.owned.get(owner_id, ()):
+        stays = tables.stays.get(apartment_id, ())
+        apartments.append((apartment_result(apartment_id, False), float(average_rating(apartment_id) or 0), len(stays),
+                           float(sum(stay.price for stay in stays))))
+    return {
+        "owner": Owner(owner_id, tables.owners[owner_id]),
+        "apartments": apartments,
+        "rating": sum(rating for _, rating, _, _ in apartments) / len(apartments) if apartments else 0.0,
+        "reservations": sum(reservations for _, _, reservations, _ in apartments),
+        "revenue": float(sum(revenue for _, _, _, revenue in apartments)),
+    }
+
+
+# ---------------------------------- UPSERT API: ----------------------------------
+
+
+@call_trace.recorded
+def upsert_owner(owner: Owner) -> ReturnValue:
+    owner_id, name = owner.get_owner_id(), owner.get_owner_name()
+    if not positive(owner_id) or name is None:
+        return ReturnValue.BAD_PARAMS
+    if owner_id in tables.owners:
+        rename_owner(owner_id, name)
+    else:
+        insert_owner(owner_id, name)
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def upsert_customer(customer: Customer) -> ReturnValue:
+    customer_id, name = customer.get_customer_id(), customer.get_customer_name()
+    if not positive(customer_id) or name is None:
+        return ReturnValue.BAD_PARAMS
+    tables.customers[customer_id] = name
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def upsert_apartment(apartment: Apartment) -> ReturnValue:
+    apartment_id, row = apartment.get_id(), apartment_row(apartment)
+    if row is None:
+        return ReturnValue.BAD_PARAMS
+    if row[:3] in tables.addresses and tables.apartments.get(apartment_id, ())[:3] != row[:3]:
+        return ReturnValue.ALREADY_EXISTS
+    if apartment_id in tables.apartments:
+        unplace_apartment(apartment_id)
+    else:
+        tables.apartment_ids.add(apartment_id)
+    place_apartment(apartment_id, row)
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def upsert_owns(owner_id: int, apartment_id: int) -> ReturnValue:
+    if not positive(owner_id) or not positive(apartment_id):
+        return ReturnValue.BAD_PARAMS
+    if owner_id not in tables.owners or apartment_id not in tables.apartments:
+        return ReturnValue.NOT_EXISTS
+    if apartment_id in tables.owner_of:
+        drop_ownership(apartment_id)
+    take_ownership(owner_id, apartment_id)
+    return ReturnValue.OK
+
+
+# ---------------------------------- UPDATE API: ----------------------------------
+
+
+# the fields changed by the object's setters, {field: new value}
+def dirty_values(obj) -> dict:
+    return {field: getattr(obj, "get_" + field)() for field in obj.dirty_fields()}
+
+
+@call_trace.recorded
+def update_owner(owner: Owner) -> ReturnValue:
+    owner_id, changes = owner.get_owner_id(), dirty_values(owner)
+    if not positive(owner_id):
+        return ReturnValue.BAD_PARAMS
+    if not changes:
+        return ReturnValue.OK
+    if owner_id not in tables.owners:
+        return ReturnValue.NOT_EXISTS
+    if changes["owner_name"] is None:
+        return ReturnValue.BAD_PARAMS
+    rename_owner(owner_id, changes["owner_name"])
+    owner.mark_clean()
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def update_customer(customer: Customer) -> ReturnValue:
+    customer_id, changes = customer.get_customer_id(), dirty_values(customer)
+    if not positive(customer_id):
+        return ReturnValue.BAD_PARAMS
+    if not changes:
+        return ReturnValue.OK
+    if customer_id not in tables.customers:
+        return ReturnValue.NOT_EXISTS
+    if changes["customer_name"] is None:
+        return ReturnValue.BAD_PARAMS
+    tables.customers[customer_id] = changes["customer_name"]
+    customer.mark_clean()
+    return ReturnValue.OK
+
+
+@call_trace.recorded
+def update_apartment(apartment: Apartment) -> ReturnValue:
+    apartment_id, changes = apartment.get_id(), dirty_values(apartment)
+    if not positive(apartment_id):
+        return ReturnValue.BAD_PARAMS
+    if not changes:
+        return ReturnValue.OK
+    if apartment_id not in tables.apartments:
+        return ReturnValue.NOT_EXISTS
+    address, city, country, size = tables.apartments[apartment_id]
+    row = (changes.get("address", address), changes.get("city", city), changes.get("country", country),
+           changes.get("size", size))
+    if None in row or not positive(row[3]):
+        return ReturnValue.BAD_PARAMS
+    if row[:3] != (address, city, country) and row[:3] in tables.addresses:
+        return ReturnValue.ALREADY_EXISTS
+    unplace_apartment(apartment_id)
+    place_apartment(apartment_id, row)
+    apartment.mark_clean()
+    return ReturnValue.OK
+
+
+# Utility functions:
+
+
+def valid_rating(rating) -> bool:
+    return rating is not None and 1 <= rating <= 10
+
+
+def insert_owner(owner_id: int, name: str):
+    tables.owners[owner_id] = name
+    tables.owner_ids.add(owner_id)
+    rename_owner(owner_id, name)
+
+
+# moves the owner in the by-name index, None takes it out
+def rename_owner(owner_id: int, name):
+    old = tables.owners.get(owner_id)
+    named = tables.owners_named.get(old)
+    if named is not None and owner_id in named:
+        named.discard(owner_id)
+        if not named:
+            del tables.owners_named[old]
+            tables.owner_names.discard(old)
+    if name is not None:
+        tables.owners[owner_id] = name
+        tables.owners_named.setdefault(name, set()).add(owner_id)
+        tables.owner_names.add(name)
+
+
+# (address, city, country, size) of the apartment, None if a column is missing or invalid
+def apartment_row(apartment: Apartment):
+    row = (apartment.get_address(), apartment.get_city(), apartment.get_country(), apartment.get_size())
+    if not positive(apartment.get_id()) or None in row or not positive(row[3]):
+        return None
+    return row
+
+
+# stores the apartment's row and indexes its address and location, an owned apartment also counts for its owner
+def place_apartment(apartment_id: int, row: tuple):
+    tables.apartments[apartment_id] = row
+    tables.addresses.add(row[:3])
+    tables.locations.setdefault(row[1:3], set()).add(apartment_id)
+    if apartment_id in tables.owner_of:
+        tables.owned_locations.setdefault(tables.owner_of[apartment_id], Counter())[row[1:3]] += 1
+
+
+def unplace_apartment(apartment_id: int):
+    row = tables.apartments.pop(apartment_id)
+    tables.addresses.discard(row[:3])
+    location = tables.locations[row[1:3]]
+    location.discard(apartment_id)
+    if not location:
+        del tables.locations[row[1:3]]
+    if apartment_id in tables.owner_of:
+        uncount_location(tables.owner_of[apartment_id], row[1:3])
+
+
+def take_ownership(owner_id: int, apartment_id: int):
+    tables.owner_of[apartment_id] = owner_id
+    tables.owned.setdefault(owner_id, SortedIndex()).add(apartment_id)
+    tables.owned_locations.setdefault(owner_id, Counter())[tables.apartments[apartment_id][1:3]] += 1
+
+
+def drop_ownership(apartment_id: int):
+    owner_id = tables.owner_of.pop(apartment_id)
+    tables.owned[owner_id].discard(apartment_id)
+    if not tables.owned[owner_id]:
+        del tables.owned[owner_id]
+    uncount_location(owner_id, tables.apartments[apartment_id][1:3])
+
+
+def uncount_location(owner_id: int, location: tuple):
+    locations = tables.owned_locations[owner_id]
+    locations[location] -= 1
+    if locations[location] == 0:
+        del locations[location]
+    if not locations:
+        del tables.owned_locations[owner_id]
+
+
+def remove_stay(stay: Reservation):
+    tables.stays[stay.apartment_id].remove(stay.start_date, stay)
+    if not tables.stays[stay.apartment_id]:
+        del tables.stays[stay.apartment_id]
+    tables.customer_stays[stay.customer_id].discard(stay)
+    if not tables.customer_stays[stay.customer_id]:
+        del tables.customer_stays[stay.customer_id]
+
+
+def remove_review(review: Review):
+    del tables.reviews[review.customer_id, review.apartment_id]
+    for index, key, other in ((tables.apartment_reviews, review.apartment_id, review.customer_id),
+                              (tables.customer_reviews, review.customer_id, review.apartment_id)):
+        del index[key][other]
+        if not index[key]:
+            del index[key]
+
+
+# average of the apartment's ratings, None if it has no review
+def average_rating(apartment_id: int):
+    reviews = tables.apartment_reviews.get(apartment_id)
+    if not reviews:
+        return None
+    return sum(review.rating for review in reviews.values()) / len(reviews)
+
+
+# (-reservations, customer id) of the k customers with the most reservations, shared by top_customers and
+# get_top_customer
+def top_customer_counts(k: int) -> List[Tuple[int, int]]:
+    return nsmallest(k, ((-len(stays), customer_id) for customer_id, stays in tables.customer_stays.items() if stays))
+
+
+# as get_owner_rating: the average over the owned apartments, an apartment without reviews counts as 0
+def owner_rating(owner_id: int) -> float:
+    owned = tables.owned.get(owner_id, ())
+    if not owned:
+        return 0
+    return sum(average_rating(apartment_id) or 0 for apartment_id in owned) / len(owned)
+
+
+# average rating (0 without reviews) over average nightly price, None if the apartment has no stay of a night
+def apartment_value(apartment_id: int):
+    prices = [stay.nightly_price() for stay in tables.stays.get(apartment_id, ())]
+    prices = [price for price in prices if price is not None]
+    if not prices:
+        return None
+    return (average_rating(apartment_id) or 0) / (sum(prices) / len(prices))
+
+
+# an apartment of the list APIs, with raw=True as a (ApartmentID, Address, City, Country, Size) tuple, with extra
+# paired with it ((apartment, extra) or the tuple with extra appended)
+def apartment_result(apartment_id: int, raw: bool, *extra):
+    if raw:
+        return (apartment_id,) + tables.apartments[apartment_id] + extra
+    apartment = Apartment(apartment_id, *tables.apartments[apartment_id])
+    return (apartment,) + extra if extra else apartment
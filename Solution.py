@@ -1,3 +1,4 @@
+import os
 from typing import List, Tuple
 from psycopg2 import sql
 from datetime import date, datetime
@@ -6,17 +7,43 @@ import Utility.DBConnector as Connector
 from Utility.ReturnValue import ReturnValue
 from Utility.Exceptions import DatabaseException
 from Utility.DBConnector import ResultSet, ResultSetDict
+from Utility.QueryCache import QueryCache
+from Utility.CallTrace import call_trace
+from Utility.Migrations import Migration, Migrator
+from Utility.SlowQueryLog import WriteCall
 
 from Business.Owner import Owner
 from Business.Customer import Customer
 from Business.Apartment import Apartment
 
+ALL_TABLES = ("Owner", "Customer", "Apartment", "Owns", "Reservation", "Review")
+
+# cache of the read API results, disabled by default. call query_cache.enable() to turn it on,
+# every write below bumps the versions of the tables it changes and query_cache.stats() exposes the metrics
+query_cache = QueryCache()
+
+# channel the base table triggers NOTIFY on, see listen_for_invalidations()
+INVALIDATION_CHANNEL = "solution_invalidate"
+
+# connector every Solution call uses when set, see use_shared_connector()
+shared_connector = None
+
+# every API call below is appended to the call_trace file while it is started, either with call_trace.start(path)
+# or by setting $SOLUTION_TRACE before the import. Tools/Replay.py re-issues a trace against another database
+if os.environ.get("SOLUTION_TRACE"):
+    call_trace.start(os.environ["SOLUTION_TRACE"])
+
+# backend the API below is served from: "postgres", or "memory" for the in-process one of MemorySolution.py,
+# picked with $SOLUTION_BACKEND before the import (see the end of this module)
+BACKEND = os.environ.get("SOLUTION_BACKEND", "postgres")
+
 
 # ---------------------------------- CRUD API: ----------------------------------
 
 
+@call_trace.recorded
+@query_cache.invalidates(*ALL_TABLES)
 def create_tables():
-    conn = Connector.DBConnector()
     create_owner_table = """
     CREATE TABLE IF NOT EXISTS Owner (
         OwnerID INT PRIMARY KEY CHECK(OwnerID > 0),
@@ -122,12 +149,12 @@ def create_tables():
     GROUP BY oa.OwnerID, o.Name;
     """
     uniq_CityCountry_count_view = """
-    CREATE VIEW TotalCityCountryCount AS
+    CREATE OR REPLACE VIEW TotalCityCountryCount AS
     SELECT COUNT(DISTINCT(City, Country)) AS TotalCityCountryCount
     FROM Apartment;
     """
     owner_CityCountry_count_view = """
-    CREATE VIEW OwnerCityCountryCount AS
+    CREATE OR REPLACE VIEW OwnerCityCountryCount AS
     SELECT o.OwnerID, o.Name, COUNT(DISTINCT(a.City, a.Country)) AS OwnerCityCountryCount
     FROM Owner o
     JOIN Owns ow ON o.OwnerID = ow.OwnerID
@@ -135,7 +162,7 @@ def create_tables():
     GROUP BY o.OwnerID;
     """
     avg_nightly_price_view = """
-    CREATE VIEW AvgNightlyPrices AS
+    CREATE OR REPLACE VIEW AvgNightlyPrices AS
     SELECT Reservation.ApartmentID, AVG(Reservation.Price / NULLIF(Reservation.EndDate - Reservation.StartDate, 0)) AS AvgNightlyPrice
     FROM Reservation
     GROUP BY Reservation.ApartmentID;
@@ -148,49 +175,567 @@ def create_tables():
     GROUP BY apt.ApartmentID;
     """
     apt_value_for_money_view = """
-    CREATE VIEW ApartmentValue AS
+    CREATE OR REPLACE VIEW ApartmentValue AS
     SELECT ap.ApartmentID, (ar.AvgRating / ap.AvgNightlyPrice) AS Value
     FROM AvgNightlyPrices ap
     JOIN AvgAptRating ar ON ar.ApartmentID = ap.ApartmentID;
     """
     monthly_reservation_profits_view = """
-    CREATE VIEW MonthlyReservationProfits AS
+    CREATE OR REPLACE VIEW MonthlyReservationProfits AS
     SELECT EXTRACT(YEAR FROM EndDate) AS Year, EXTRACT(MONTH FROM EndDate) AS Month, SUM(Price * 0.15) AS Profit
     FROM Reservation
     GROUP BY Year, Month;
     """
     review_ratios_view = """
-    CREATE VIEW RatingRatio AS
+    CREATE OR REPLACE VIEW RatingRatio AS
     SELECT rv1.CustomerID as CustomerID, rv2.CustomerID as OtherCustomerID, AVG(rv1.Rating::float / rv2.Rating) AS AvgRatio
     FROM Review rv1
     JOIN Review rv2 ON rv1.ApartmentID = rv2.ApartmentID AND rv1.CustomerID != rv2.customerID
-    GROUP BY rv1.CustomerID, rv2.CustomerID
-    """
-    full_query = (
-        create_customer_table
-        + create_owner_table
-        + create_apt_table
-        + create_owns_table
-        + create_reservation_table
-        + create_review_table
-        + apt_avg_rating_view
-        + owner_apts_view
-        + owner_avg_rating_view
-        + customer_reservation_count_view
-        + owner_reservation_count_view
-        + uniq_CityCountry_count_view
-        + owner_CityCountry_count_view
-        + avg_nightly_price_view
-        + avg_apt_ratings_view
-        + apt_value_for_money_view
-        + monthly_reservation_profits_view
-        + review_ratios_view
+    GROUP BY rv1.CustomerID, rv2.CustomerID;
+    """
+    # summary tables for the top-k leaderboards, kept up to date by the triggers below so that a
+    # top-k read is an index scan with LIMIT k instead of a sort of the whole aggregate view
+    create_customer_stats_table = """
+    CREATE TABLE IF NOT EXISTS CustomerStats (
+        CustomerID INT PRIMARY KEY REFERENCES Customer(CustomerID) ON DELETE CASCADE ON UPDATE CASCADE,
+        Reservations INT NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS CustomerStatsTopIdx ON CustomerStats (Reservations DESC, CustomerID ASC);
+    """
+    create_apt_stats_table = """
+    CREATE TABLE IF NOT EXISTS ApartmentStats (
+        ApartmentID INT PRIMARY KEY REFERENCES Apartment(ApartmentID) ON DELETE CASCADE ON UPDATE CASCADE,
+        RatingSum INT NOT NULL DEFAULT 0,
+        RatingCount INT NOT NULL DEFAULT 0,
+        NightlyPriceSum DECIMAL NOT NULL DEFAULT 0,
+        NightlyPriceCount INT NOT NULL DEFAULT 0,
+        AvgRating DECIMAL GENERATED ALWAYS AS (
+            CASE WHEN RatingCount > 0 THEN RatingSum::DECIMAL / RatingCount ELSE 0 END
+        ) STORED,
+        Value DECIMAL GENERATED ALWAYS AS (
+            CASE WHEN NightlyPriceCount > 0 THEN
+                (CASE WHEN RatingCount > 0 THEN RatingSum::DECIMAL / RatingCount ELSE 0 END)
+                / (NightlyPriceSum / NightlyPriceCount)
+            END
+        ) STORED
+    );
+    CREATE INDEX IF NOT EXISTS ApartmentStatsValueIdx ON ApartmentStats (Value DESC NULLS LAST, ApartmentID ASC);
+    """
+    create_owner_stats_table = """
+    CREATE TABLE IF NOT EXISTS OwnerStats (
+        OwnerID INT PRIMARY KEY REFERENCES Owner(OwnerID) ON DELETE CASCADE ON UPDATE CASCADE,
+        AvgRating DECIMAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS OwnerStatsTopIdx ON OwnerStats (AvgRating DESC, OwnerID ASC);
+    """
+    # stats rows are created together with their base row, the maintenance triggers only UPDATE them,
+    # so rows removed by ON DELETE CASCADE are never re-created by a trigger firing later in the cascade
+    stats_rows_triggers = """
+    CREATE OR REPLACE FUNCTION InitStatsRow() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'customer' THEN
+            INSERT INTO CustomerStats (CustomerID) VALUES (NEW.CustomerID) ON CONFLICT DO NOTHING;
+        ELSIF TG_TABLE_NAME = 'apartment' THEN
+            INSERT INTO ApartmentStats (ApartmentID) VALUES (NEW.ApartmentID) ON CONFLICT DO NOTHING;
+        ELSE
+            INSERT INTO OwnerStats (OwnerID) VALUES (NEW.OwnerID) ON CONFLICT DO NOTHING;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    DROP TRIGGER IF EXISTS CustomerStatsInit ON Customer;
+    CREATE TRIGGER CustomerStatsInit AFTER INSERT ON Customer
+        FOR EACH ROW EXECUTE FUNCTION InitStatsRow();
+    DROP TRIGGER IF EXISTS ApartmentStatsInit ON Apartment;
+    CREATE TRIGGER ApartmentStatsInit AFTER INSERT ON Apartment
+        FOR EACH ROW EXECUTE FUNCTION InitStatsRow();
+    DROP TRIGGER IF EXISTS OwnerStatsInit ON Owner;
+    CREATE TRIGGER OwnerStatsInit AFTER INSERT ON Owner
+        FOR EACH ROW EXECUTE FUNCTION InitStatsRow();
+    """
+    reservation_stats_trigger = """
+    CREATE OR REPLACE FUNCTION ReservationStats() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE CustomerStats SET Reservations = Reservations - 1 WHERE CustomerID = OLD.CustomerID;
+            UPDATE ApartmentStats
+            SET NightlyPriceSum = NightlyPriceSum - OLD.Price / (OLD.EndDate - OLD.StartDate),
+                NightlyPriceCount = NightlyPriceCount - 1
+            WHERE ApartmentID = OLD.ApartmentID AND OLD.EndDate > OLD.StartDate;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE CustomerStats SET Reservations = Reservations + 1 WHERE CustomerID = NEW.CustomerID;
+            UPDATE ApartmentStats
+            SET NightlyPriceSum = NightlyPriceSum + NEW.Price / (NEW.EndDate - NEW.StartDate),
+                NightlyPriceCount = NightlyPriceCount + 1
+            WHERE ApartmentID = NEW.ApartmentID AND NEW.EndDate > NEW.StartDate;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    DROP TRIGGER IF EXISTS ReservationStatsTrigger ON Reservation;
+    CREATE TRIGGER ReservationStatsTrigger AFTER INSERT OR UPDATE OR DELETE ON Reservation
+        FOR EACH ROW EXECUTE FUNCTION ReservationStats();
+    """
+    review_stats_trigger = """
+    CREATE OR REPLACE FUNCTION ReviewStats() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE ApartmentStats SET RatingSum = RatingSum - OLD.Rating, RatingCount = RatingCount - 1
+            WHERE ApartmentID = OLD.ApartmentID;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE ApartmentStats SET RatingSum = RatingSum + NEW.Rating, RatingCount = RatingCount + 1
+            WHERE ApartmentID = NEW.ApartmentID;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    DROP TRIGGER IF EXISTS ReviewStatsTrigger ON Review;
+    CREATE TRIGGER ReviewStatsTrigger AFTER INSERT OR UPDATE OR DELETE ON Review
+        FOR EACH ROW EXECUTE FUNCTION ReviewStats();
+    """
+    # owner rating follows get_owner_rating: the average over all owned apartments, unrated ones counting as 0.
+    # it is recomputed from ApartmentStats (one row per owned apartment) whenever an input changes
+    owner_stats_trigger = """
+    CREATE OR REPLACE FUNCTION RefreshOwnerStats(owner_id INT) RETURNS VOID AS $$
+        UPDATE OwnerStats
+        SET AvgRating = (
+            SELECT COALESCE(AVG(COALESCE(s.AvgRating, 0)), 0)
+            FROM Owns os
+            LEFT JOIN ApartmentStats s ON s.ApartmentID = os.ApartmentID
+            WHERE os.OwnerID = owner_id
+        )
+        WHERE OwnerID = owner_id;
+    $$ LANGUAGE sql;
+    CREATE OR REPLACE FUNCTION OwnerStatsFromOwns() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            PERFORM RefreshOwnerStats(OLD.OwnerID);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM RefreshOwnerStats(NEW.OwnerID);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    CREATE OR REPLACE FUNCTION OwnerStatsFromApartmentStats() RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM RefreshOwnerStats(os.OwnerID) FROM Owns os WHERE os.ApartmentID = NEW.ApartmentID;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    DROP TRIGGER IF EXISTS OwnerStatsOwnsTrigger ON Owns;
+    CREATE TRIGGER OwnerStatsOwnsTrigger AFTER INSERT OR UPDATE OR DELETE ON Owns
+        FOR EACH ROW EXECUTE FUNCTION OwnerStatsFromOwns();
+    DROP TRIGGER IF EXISTS OwnerStatsRatingTrigger ON ApartmentStats;
+    CREATE TRIGGER OwnerStatsRatingTrigger AFTER UPDATE OF RatingSum, RatingCount ON ApartmentStats
+        FOR EACH ROW WHEN (OLD.RatingSum IS DISTINCT FROM NEW.RatingSum OR OLD.RatingCount IS DISTINCT FROM NEW.RatingCount)
+        EXECUTE FUNCTION OwnerStatsFromApartmentStats();
+    """
+    # fills the summary tables for rows that existed before the stats tables did
+    stats_backfill = """
+    INSERT INTO CustomerStats (CustomerID, Reservations)
+    SELECT c.CustomerID, COUNT(r.ReservationID)
+    FROM Customer c
+    LEFT JOIN Reservation r ON r.CustomerID = c.CustomerID
+    GROUP BY c.CustomerID
+    ON CONFLICT DO NOTHING;
+    INSERT INTO ApartmentStats (ApartmentID, RatingSum, RatingCount, NightlyPriceSum, NightlyPriceCount)
+    SELECT apt.ApartmentID,
+        COALESCE((SELECT SUM(rv.Rating) FROM Review rv WHERE rv.ApartmentID = apt.ApartmentID), 0),
+        (SELECT COUNT(*) FROM Review rv WHERE rv.ApartmentID = apt.ApartmentID),
+        COALESCE((SELECT SUM(r.Price / (r.EndDate - r.StartDate)) FROM Reservation r
+                  WHERE r.ApartmentID = apt.ApartmentID AND r.EndDate > r.StartDate), 0),
+        (SELECT COUNT(*) FROM Reservation r WHERE r.ApartmentID = apt.ApartmentID AND r.EndDate > r.StartDate)
+    FROM Apartment apt
+    ON CONFLICT DO NOTHING;
+    INSERT INTO OwnerStats (OwnerID, AvgRating)
+    SELECT o.OwnerID, COALESCE(AVG(COALESCE(s.AvgRating, 0)), 0)
+    FROM Owner o
+    LEFT JOIN Owns os ON os.OwnerID = o.OwnerID
+    LEFT JOIN ApartmentStats s ON s.ApartmentID = os.ApartmentID
+    GROUP BY o.OwnerID
+    ON CONFLICT DO NOTHING;
+    """
+    # every change to a base table is published on INVALIDATION_CHANNEL as '<table>:<key>' ('<table>:*' for
+    # TRUNCATE), so that other processes can evict their cached reads (see Connector.InvalidationListener).
+    # steps 11 and 12 replace them with statement_notify_triggers and table_notify_function
+    notify_function = """
+    CREATE OR REPLACE FUNCTION NotifyInvalidation() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_LEVEL = 'STATEMENT' THEN
+            PERFORM pg_notify(TG_ARGV[0], TG_TABLE_NAME || ':*');
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            PERFORM pg_notify(TG_ARGV[0], TG_TABLE_NAME || ':' ||
+                (SELECT string_agg(to_jsonb(OLD) ->> col, ',') FROM unnest(TG_ARGV[1:]) AS col));
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM pg_notify(TG_ARGV[0], TG_TABLE_NAME || ':' ||
+                (SELECT string_agg(to_jsonb(NEW) ->> col, ',') FROM unnest(TG_ARGV[1:]) AS col));
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+    notify_triggers = "".join(
+        f"""
+    DROP TRIGGER IF EXISTS {table}Notify ON {table};
+    CREATE TRIGGER {table}Notify AFTER INSERT OR UPDATE OR DELETE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION NotifyInvalidation('{INVALIDATION_CHANNEL}', {keys});
+    DROP TRIGGER IF EXISTS {table}NotifyTruncate ON {table};
+    CREATE TRIGGER {table}NotifyTruncate AFTER TRUNCATE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION NotifyInvalidation('{INVALIDATION_CHANNEL}');
+    """
+        for table, keys in (
+            ("Owner", "'ownerid'"),
+            ("Customer", "'customerid'"),
+            ("Apartment", "'apartmentid'"),
+            ("Owns", "'apartmentid'"),
+            ("Reservation", "'reservationid'"),
+            ("Review", "'customerid', 'apartmentid'"),
+        )
     )
-    conn.execute(full_query)
-    conn.commit()
-    conn.close()
+    # the listener bumps the whole table whatever the key, so the per-row notifications of the triggers above only
+    # cost a pg_notify per changed row (bulk loads included). one statement trigger per table publishes
+    # '<table>:*' instead, and pg_notify folds the repeats of a transaction into one notification
+    statement_notify_triggers = "".join(
+        f"""
+    DROP TRIGGER IF EXISTS {table}Notify ON {table};
+    DROP TRIGGER IF EXISTS {table}NotifyTruncate ON {table};
+    CREATE TRIGGER {table}Notify AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION NotifyInvalidation('{INVALIDATION_CHANNEL}');
+    """
+        for table in ALL_TABLES
+    )
+    # with only statement triggers left the row branches of notify_function are dead, and there is no key to
+    # send: the payload is just the table name
+    table_notify_function = """
+    CREATE OR REPLACE FUNCTION NotifyInvalidation() RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM pg_notify(TG_ARGV[0], TG_TABLE_NAME);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+    # the multi-step writes as stored functions: each validates, writes and returns the name of its ReturnValue, so
+    # the API makes one round trip and only maps the name. constraint violations of the writes still raise and are
+    # handled by handle_errors, in the same order as the plain statements they replace
+    write_functions = """
+    CREATE OR REPLACE FUNCTION DeleteOwner(p_owner_id INT) RETURNS TEXT AS $$
+    BEGIN
+        IF p_owner_id IS NULL OR p_owner_id <= 0 THEN
+            RETURN 'BAD_PARAMS';
+        END IF;
+        DELETE FROM Owner WHERE OwnerID = p_owner_id;
+        RETURN CASE WHEN FOUND THEN 'OK' ELSE 'NOT_EXISTS' END;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION DeleteCustomer(p_customer_id INT) RETURNS TEXT AS $$
+    BEGIN
+        IF p_customer_id IS NULL OR p_customer_id <= 0 THEN
+            RETURN 'BAD_PARAMS';
+        END IF;
+        DELETE FROM Customer WHERE CustomerID = p_customer_id;
+        RETURN CASE WHEN FOUND THEN 'OK' ELSE 'NOT_EXISTS' END;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION MakeReservation(p_customer_id INT, p_apartment_id INT, p_start_date DATE,
+                                               p_end_date DATE, p_price DECIMAL) RETURNS TEXT AS $$
+    BEGIN
+        IF p_customer_id IS NULL OR p_customer_id <= 0 OR p_apartment_id IS NULL OR p_apartment_id <= 0 THEN
+            RETURN 'BAD_PARAMS';
+        END IF;
+        IF EXISTS (
+            SELECT 1 FROM Reservation
+            WHERE ApartmentID = p_apartment_id AND StartDate < p_end_date AND EndDate > p_start_date
+        ) THEN
+            RETURN 'BAD_PARAMS';
+        END IF;
+        INSERT INTO Reservation (CustomerID, ApartmentID, StartDate, EndDate, Price)
+        VALUES (p_customer_id, p_apartment_id, p_start_date, p_end_date, p_price);
+        RETURN 'OK';
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION CancelReservation(p_customer_id INT, p_apartment_id INT, p_start_date DATE)
+    RETURNS TEXT AS $$
+    DECLARE
+        deleted INT;
+    BEGIN
+        IF p_customer_id IS NULL OR p_customer_id <= 0 OR p_apartment_id IS NULL OR p_apartment_id <= 0 THEN
+            RETURN 'BAD_PARAMS';
+        END IF;
+        DELETE FROM Reservation
+        WHERE CustomerID = p_customer_id AND ApartmentID = p_apartment_id AND StartDate = p_start_date;
+        GET DIAGNOSTICS deleted = ROW_COUNT;
+        RETURN CASE WHEN deleted = 1 THEN 'OK' ELSE 'NOT_EXISTS' END;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION ReviewApartment(p_customer_id INT, p_apartment_id INT, p_review_date DATE,
+                                               p_rating INT, p_review_text TEXT) RETURNS TEXT AS $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM Reservation
+            WHERE CustomerID = p_customer_id AND ApartmentID = p_apartment_id AND EndDate <= p_review_date
+        ) THEN
+            IF p_rating IS NULL OR p_rating < 1 OR p_rating > 10 OR p_apartment_id IS NULL OR p_apartment_id <= 0
+                OR p_customer_id IS NULL OR p_customer_id <= 0 THEN
+                RETURN 'BAD_PARAMS';
+            END IF;
+            RETURN 'NOT_EXISTS';
+        END IF;
+        INSERT INTO Review (CustomerID, ApartmentID, ReviewDate, Rating, ReviewText)
+        VALUES (p_customer_id, p_apartment_id, p_review_date, p_rating, p_review_text);
+        RETURN 'OK';
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+    # per (country, city, year the stay starts) histogram of the nightly prices of the reservations in logarithmic
+    # buckets 1% wide, with the exact count and sum of every bucket. nightly_price_stats reads the buckets of one
+    # location instead of its reservations, a percentile is the middle of its bucket so it is within 0.5% of the
+    # exact one. the apartment triggers take an apartment's reservations out before it is deleted (its location is
+    # gone once the cascade reaches the reservations) and move them when it changes city or country
+    nightly_price_histogram = """
+    CREATE TABLE IF NOT EXISTS NightlyPriceHistogram (
+        Country VARCHAR(50) NOT NULL,
+        City VARCHAR(50) NOT NULL,
+        Year INT NOT NULL,
+        Bucket INT NOT NULL,
+        Reservations INT NOT NULL DEFAULT 0,
+        PriceSum DECIMAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (Country, City, Year, Bucket)
+    );
+    CREATE OR REPLACE FUNCTION NightlyPriceBucket(nightly_price DECIMAL) RETURNS INT AS $$
+        SELECT floor(ln(nightly_price) / ln(1.01))::INT;
+    $$ LANGUAGE sql IMMUTABLE;
+    CREATE OR REPLACE FUNCTION NightlyPriceOfBucket(bucket INT) RETURNS DOUBLE PRECISION AS $$
+        SELECT exp((bucket + 0.5) * ln(1.01));
+    $$ LANGUAGE sql IMMUTABLE;
+    CREATE OR REPLACE FUNCTION AddNightlyPrice(p_country VARCHAR, p_city VARCHAR, p_start_date DATE, p_end_date DATE,
+                                               p_price DECIMAL, p_sign INT) RETURNS VOID AS $$
+        INSERT INTO NightlyPriceHistogram AS h (Country, City, Year, Bucket, Reservations, PriceSum)
+        SELECT p_country, p_city, EXTRACT(YEAR FROM p_start_date)::INT,
+            NightlyPriceBucket(p_price / (p_end_date - p_start_date)), p_sign,
+            p_sign * p_price / (p_end_date - p_start_date)
+        WHERE p_end_date > p_start_date
+        ON CONFLICT (Country, City, Year, Bucket) DO UPDATE
+        SET Reservations = h.Reservations + EXCLUDED.Reservations, PriceSum = h.PriceSum + EXCLUDED.PriceSum;
+    $$ LANGUAGE sql;
+    CREATE OR REPLACE FUNCTION NightlyPriceFromReservation() RETURNS TRIGGER AS $$
+    DECLARE
+        old_apartment INT;
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            old_apartment := OLD.ApartmentID;
+            -- the apartment's id was changed and ON UPDATE CASCADE is moving its reservations along
+            IF TG_OP = 'UPDATE' AND NOT EXISTS (SELECT 1 FROM Apartment WHERE ApartmentID = OLD.ApartmentID) THEN
+                old_apartment := NEW.ApartmentID;
+            END IF;
+            PERFORM AddNightlyPrice(a.Country, a.City, OLD.StartDate, OLD.EndDate, OLD.Price, -1)
+            FROM Apartment a WHERE a.ApartmentID = old_apartment;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM AddNightlyPrice(a.Country, a.City, NEW.StartDate, NEW.EndDate, NEW.Price, 1)
+            FROM Apartment a WHERE a.ApartmentID = NEW.ApartmentID;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    CREATE OR REPLACE FUNCTION NightlyPriceFromApartment() RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM AddNightlyPrice(OLD.Country, OLD.City, r.StartDate, r.EndDate, r.Price, -1)
+        FROM Reservation r WHERE r.ApartmentID = OLD.ApartmentID;
+        IF TG_OP = 'UPDATE' THEN
+            PERFORM AddNightlyPrice(NEW.Country, NEW.City, r.StartDate, r.EndDate, r.Price, 1)
+            FROM Reservation r WHERE r.ApartmentID = OLD.ApartmentID;
+        END IF;
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql;
+    CREATE OR REPLACE FUNCTION ClearNightlyPrices() RETURNS TRIGGER AS $$
+    BEGIN
+        DELETE FROM NightlyPriceHistogram;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    DROP TRIGGER IF EXISTS NightlyPriceTrigger ON Reservation;
+    CREATE TRIGGER NightlyPriceTrigger AFTER INSERT OR UPDATE OR DELETE ON Reservation
+        FOR EACH ROW EXECUTE FUNCTION NightlyPriceFromReservation();
+    DROP TRIGGER IF EXISTS NightlyPriceTruncate ON Reservation;
+    CREATE TRIGGER NightlyPriceTruncate AFTER TRUNCATE ON Reservation
+        FOR EACH STATEMENT EXECUTE FUNCTION ClearNightlyPrices();
+    DROP TRIGGER IF EXISTS NightlyPriceApartmentDelete ON Apartment;
+    CREATE TRIGGER NightlyPriceApartmentDelete BEFORE DELETE ON Apartment
+        FOR EACH ROW EXECUTE FUNCTION NightlyPriceFromApartment();
+    DROP TRIGGER IF EXISTS NightlyPriceApartmentMove ON Apartment;
+    CREATE TRIGGER NightlyPriceApartmentMove AFTER UPDATE OF City, Country ON Apartment
+        FOR EACH ROW WHEN (OLD.City IS DISTINCT FROM NEW.City OR OLD.Country IS DISTINCT FROM NEW.Country)
+        EXECUTE FUNCTION NightlyPriceFromApartment();
+    INSERT INTO NightlyPriceHistogram (Country, City, Year, Bucket, Reservations, PriceSum)
+    SELECT a.Country, a.City, EXTRACT(YEAR FROM r.StartDate)::INT, NightlyPriceBucket(r.Price / (r.EndDate - r.StartDate)),
+        COUNT(*), SUM(r.Price / (r.EndDate - r.StartDate))
+    FROM Reservation r
+    JOIN Apartment a ON a.ApartmentID = r.ApartmentID
+    WHERE r.EndDate > r.StartDate
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT DO NOTHING;
+    """
+    # booked nights of every apartment per calendar month, a stay counts in each month by the nights it spends
+    # there (a night belongs to the month of its date, the check-out day is not a night). the occupancy APIs read
+    # at most 12 rows per apartment instead of its reservation history
+    booked_nights_rollup = """
+    CREATE TABLE IF NOT EXISTS ApartmentMonthNights (
+        ApartmentID INT NOT NULL REFERENCES Apartment(ApartmentID) ON DELETE CASCADE ON UPDATE CASCADE,
+        Month DATE NOT NULL,
+        Nights INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (ApartmentID, Month)
+    );
+    CREATE OR REPLACE FUNCTION AddBookedNights(p_apartment_id INT, p_start_date DATE, p_end_date DATE, p_sign INT)
+    RETURNS VOID AS $$
+        INSERT INTO ApartmentMonthNights AS n (ApartmentID, Month, Nights)
+        SELECT p_apartment_id, m::DATE,
+            p_sign * (LEAST(p_end_date, (m + INTERVAL '1 month')::DATE) - GREATEST(p_start_date, m::DATE))
+        FROM generate_series(date_trunc('month', p_start_date::TIMESTAMP), (p_end_date - 1)::TIMESTAMP,
+                             INTERVAL '1 month') AS m
+        -- the rows of a deleted apartment are gone before the cascade reaches its reservations
+        WHERE p_end_date > p_start_date AND EXISTS (SELECT 1 FROM Apartment WHERE ApartmentID = p_apartment_id)
+        ON CONFLICT (ApartmentID, Month) DO UPDATE SET Nights = n.Nights + EXCLUDED.Nights;
+    $$ LANGUAGE sql;
+    CREATE OR REPLACE FUNCTION BookedNightsFromReservation() RETURNS TRIGGER AS $$
+    DECLARE
+        old_apartment INT;
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            old_apartment := OLD.ApartmentID;
+            -- the apartment's id was changed, ON UPDATE CASCADE already moved its rollup rows to the new id
+            IF TG_OP = 'UPDATE' AND NOT EXISTS (SELECT 1 FROM Apartment WHERE ApartmentID = OLD.ApartmentID) THEN
+                old_apartment := NEW.ApartmentID;
+            END IF;
+            PERFORM AddBookedNights(old_apartment, OLD.StartDate, OLD.EndDate, -1);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM AddBookedNights(NEW.ApartmentID, NEW.StartDate, NEW.EndDate, 1);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    CREATE OR REPLACE FUNCTION ClearBookedNights() RETURNS TRIGGER AS $$
+    BEGIN
+        DELETE FROM ApartmentMonthNights;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    DROP TRIGGER IF EXISTS BookedNightsTrigger ON Reservation;
+    CREATE TRIGGER BookedNightsTrigger AFTER INSERT OR UPDATE OF ApartmentID, StartDate, EndDate OR DELETE
+        ON Reservation FOR EACH ROW EXECUTE FUNCTION BookedNightsFromReservation();
+    DROP TRIGGER IF EXISTS BookedNightsTruncate ON Reservation;
+    CREATE TRIGGER BookedNightsTruncate AFTER TRUNCATE ON Reservation
+        FOR EACH STATEMENT EXECUTE FUNCTION ClearBookedNights();
+    INSERT INTO ApartmentMonthNights (ApartmentID, Month, Nights)
+    SELECT r.ApartmentID, m::DATE, SUM(LEAST(r.EndDate, (m + INTERVAL '1 month')::DATE) - GREATEST(r.StartDate, m::DATE))
+    FROM Reservation r,
+        generate_series(date_trunc('month', r.StartDate::TIMESTAMP), (r.EndDate - 1)::TIMESTAMP, INTERVAL '1 month') AS m
+    WHERE r.EndDate > r.StartDate
+    GROUP BY 1, 2
+    ON CONFLICT DO NOTHING;
+    """
+    # the schema is applied as versioned steps recorded in SchemaVersion (see Utility/Migrations.py), so calling
+    # create_tables on a current database is a single catalog lookup. change the schema by appending a step,
+    # applied steps must stay as they are
+    migrations = [
+        Migration(
+            1,
+            "tables and views",
+            create_customer_table
+            + create_owner_table
+            + create_apt_table
+            + create_owns_table
+            + create_reservation_table
+            + create_review_table
+            + apt_avg_rating_view
+            + owner_apts_view
+            + owner_avg_rating_view
+            + customer_reservation_count_view
+            + owner_reservation_count_view
+            + uniq_CityCountry_count_view
+            + owner_CityCountry_count_view
+            + avg_nightly_price_view
+            + avg_apt_ratings_view
+            + apt_value_for_money_view
+            + monthly_reservation_profits_view
+            + review_ratios_view,
+        ),
+        Migration(
+            2,
+            "leaderboard stats",
+            create_customer_stats_table
+            + create_apt_stats_table
+            + create_owner_stats_table
+            + stats_rows_triggers
+            + reservation_stats_trigger
+            + review_stats_trigger
+            + owner_stats_trigger
+            + stats_backfill,
+        ),
+        Migration(3, "invalidation notifications", notify_function + notify_triggers),
+        # built online, without blocking writes to the tables
+        Migration(
+            4,
+            "owner and customer lookup indexes",
+            [
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS OwnsOwnerIdx ON Owns (OwnerID)",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ReservationCustomerIdx ON Reservation (CustomerID)",
+            ],
+            concurrent=True,
+        ),
+        Migration(5, "write functions", write_functions),
+        # the search document of a review is kept by the database, adding the column rewrites Review once
+        Migration(
+            6,
+            "review search column",
+            """
+    ALTER TABLE Review ADD COLUMN IF NOT EXISTS ReviewSearch TSVECTOR
+        GENERATED ALWAYS AS (to_tsvector('english', COALESCE(ReviewText, ''))) STORED;
+    """,
+        ),
+        Migration(
+            7,
+            "review search index",
+            ["CREATE INDEX CONCURRENTLY IF NOT EXISTS ReviewSearchIdx ON Review USING GIN (ReviewSearch)"],
+            concurrent=True,
+        ),
+        Migration(8, "nightly price histogram", nightly_price_histogram),
+        Migration(9, "booked nights rollup", booked_nights_rollup),
+        # the keys the paginated APIs walk, so that a page is an index range scan wherever it starts
+        Migration(
+            10,
+            "pagination indexes",
+            [
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS OwnsOwnerApartmentIdx ON Owns (OwnerID, ApartmentID)",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS OwnerNameIdx ON Owner (Name)",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ReservationApartmentIdx ON Reservation (ApartmentID)",
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ReviewApartmentIdx ON Review (ApartmentID)",
+            ],
+            concurrent=True,
+        ),
+        Migration(11, "statement invalidation notifications", statement_notify_triggers),
+        Migration(12, "table invalidation payloads", table_notify_function),
+    ]
+    conn = connect()
+    try:
+        Migrator(migrations).migrate(conn)
+    finally:
+        conn.close()
 
 
+@call_trace.recorded
+@query_cache.invalidates(*ALL_TABLES)
 def clear_tables():
     # Could potentially need to be DELETE instead of TRUNCATE
     clear_tables_query = """
@@ -201,14 +746,22 @@ def clear_tables():
     TRUNCATE TABLE Customer CASCADE;
     TRUNCATE TABLE Owner CASCADE;
     """
-    conn = Connector.DBConnector()
-    conn.execute(clear_tables_query)
+    conn = connect()
+    conn.execute(clear_tables_query, name="clear_tables")
     conn.commit()
     conn.close()
 
 
+@call_trace.recorded
+@query_cache.invalidates(*ALL_TABLES)
 def drop_tables():
     drop_tables_query = """
+    DROP TABLE IF EXISTS SchemaVersion;
+    DROP TABLE IF EXISTS NightlyPriceHistogram;
+    DROP TABLE IF EXISTS ApartmentMonthNights;
+    DROP TABLE CustomerStats CASCADE;
+    DROP TABLE ApartmentStats CASCADE;
+    DROP TABLE OwnerStats CASCADE;
     DROP TABLE Owns CASCADE;
     DROP TABLE Review CASCADE;
     DROP TABLE Reservation CASCADE;
@@ -216,13 +769,15 @@ def drop_tables():
     DROP TABLE Customer CASCADE;
     DROP TABLE Owner CASCADE;
     """
-    conn = Connector.DBConnector()
-    conn.execute(drop_tables_query)
+    conn = connect()
+    conn.execute(drop_tables_query, name="drop_tables")
     conn.commit()
     conn.close()
 
 
 # Add an owner to the database
+@call_trace.recorded
+@query_cache.invalidates("Owner")
 def add_owner(owner: Owner) -> ReturnValue:
     owner_id = owner.get_owner_id()
     owner_name = owner.get_owner_name()
@@ -230,63 +785,55 @@ def add_owner(owner: Owner) -> ReturnValue:
         """
     INSERT INTO Owner (OwnerID, Name)
     VALUES ({owner_id}, {name})
+    ON CONFLICT DO NOTHING
+    RETURNING OwnerID
     """
     ).format(owner_id=sql.Literal(owner_id), name=sql.Literal(owner_name))
-    conn = Connector.DBConnector()
+    conn = connect()
     try:
-        conn.execute(add_owner_query)
+        inserted, _ = conn.execute(add_owner_query, name="add_owner")
     except exception_list as e:
         conn.close()
         return handle_errors(e)
     conn.commit()
     conn.close()
-    return ReturnValue["OK"]
+    return ReturnValue["OK"] if inserted else ReturnValue["ALREADY_EXISTS"]
 
 
+@call_trace.recorded
+@query_cache.cached("Owner")
 def get_owner(owner_id: int) -> Owner:  # Doron
-    conn = Connector.DBConnector()
+    conn = connect()
     get_owner_query = sql.SQL(
         """
     SELECT OwnerID, Name FROM Owner WHERE OwnerID = {owner_id}
     """
     ).format(owner_id=sql.Literal(owner_id))
     try:
-        num_rows, result_set = conn.execute(get_owner_query)
+        num_rows, result_set = conn.execute(get_owner_query, name="get_owner")
     except exception_list:
+        query_cache.failed()
         conn.close()
         return Owner.bad_owner()
     if num_rows < 1:
         conn.close()
         return Owner.bad_owner()
     conn.close()
-    return create_owner_from_response(result_set[0])
+    return objects_from_result(Owner, result_set)[0]
 
 
 # Delete an owner from the database.
+@call_trace.recorded
+@query_cache.invalidates("Owner", "Owns")
 def delete_owner(owner_id: int) -> ReturnValue:  # Daniel
-    conn = Connector.DBConnector()
-    delete_owner_query = sql.SQL(
-        """
-    DELETE FROM Owner WHERE OwnerID = {owner_id}
-    """
-    ).format(owner_id=sql.Literal(owner_id))
-    try:
-        affected_lines, _ = conn.execute(delete_owner_query)
-        conn.commit()
-    except exception_list as e:
-        conn.close()
-        return handle_errors(e)
-    conn.close()
-    if affected_lines < 1:
-        if owner_id is None or owner_id <= 0:
-            return ReturnValue["BAD_PARAMS"]
-        return ReturnValue["NOT_EXISTS"]
-    return ReturnValue["OK"]
+    return call_write_function("delete_owner", "DeleteOwner", owner_id)
 
 
 # Add an apartment to the database.
+@call_trace.recorded
+@query_cache.invalidates("Apartment")
 def add_apartment(apartment: Apartment) -> ReturnValue:  # Doron
-    conn = Connector.DBConnector()
+    conn = connect()
     apartment_id = apartment.get_id()
     apartment_address = apartment.get_address()
     apartment_city = apartment.get_city()
@@ -296,6 +843,8 @@ def add_apartment(apartment: Apartment) -> ReturnValue:  # Doron
         """
     INSERT INTO Apartment (ApartmentID, Address, City, Country, Size)
     VALUES ({apartment_id}, {address}, {city}, {country}, {size})
+    ON CONFLICT DO NOTHING
+    RETURNING ApartmentID
     """
     ).format(
         apartment_id=sql.Literal(apartment_id),
@@ -305,46 +854,50 @@ def add_apartment(apartment: Apartment) -> ReturnValue:  # Doron
         size=sql.Literal(apartment_size),
     )
     try:
-        conn.execute(add_apartment_query)
+        inserted, _ = conn.execute(add_apartment_query, name="add_apartment")
     except exception_list as e:
         conn.close()
         return handle_errors(e)
     conn.commit()
     conn.close()
-    return ReturnValue["OK"]
+    return ReturnValue["OK"] if inserted else ReturnValue["ALREADY_EXISTS"]
 
 
 # Get an apartment from the database.
+@call_trace.recorded
+@query_cache.cached("Apartment")
 def get_apartment(apartment_id: int) -> Apartment:  # Daniel
-    conn = Connector.DBConnector()
+    conn = connect()
     get_apt_query = sql.SQL(
         """
     SELECT * FROM Apartment WHERE ApartmentID = {apartment_id}
     """
     ).format(apartment_id=sql.Literal(apartment_id))
     try:
-        num_rows, result_set = conn.execute(get_apt_query)
+        num_rows, result_set = conn.execute(get_apt_query, name="get_apartment")
     except exception_list as e:
+        query_cache.failed()
         conn.close()
         return Apartment.bad_apartment()
     if num_rows < 1:
         conn.close()
         return Apartment.bad_apartment()
     conn.close()
-    apt_data = result_set[0]
-    return create_apartment_from_response(apt_data)
+    return objects_from_result(Apartment, result_set)[0]
 
 
 # Delete an apartment from the database.
+@call_trace.recorded
+@query_cache.invalidates("Apartment", "Owns", "Reservation", "Review")
 def delete_apartment(apartment_id: int) -> ReturnValue:  # Doron
-    conn = Connector.DBConnector()
+    conn = connect()
     delete_apartment_query = sql.SQL(
         """
     DELETE FROM Apartment WHERE {apartment_id} > 0 AND ApartmentID = {apartment_id}
     """
     ).format(apartment_id=sql.Literal(apartment_id))
     try:
-        rows_affected, _ = conn.execute(delete_apartment_query)
+        rows_affected, _ = conn.execute(delete_apartment_query, name="delete_apartment")
     except exception_list as e:
         conn.close()
         return handle_errors(e)
@@ -359,65 +912,64 @@ def delete_apartment(apartment_id: int) -> ReturnValue:  # Doron
 
 
 # Add a customer to the database.
+@call_trace.recorded
+@query_cache.invalidates("Customer")
 def add_customer(customer: Customer) -> ReturnValue:  # Daniel
-    conn = Connector.DBConnector()
+    conn = connect()
     customer_id = customer.get_customer_id()
     customer_name = customer.get_customer_name()
     add_customer_query = sql.SQL(
         """
     INSERT INTO Customer (CustomerID, Name)
     VALUES({customer_id}, {customer_name})
+    ON CONFLICT DO NOTHING
+    RETURNING CustomerID
     """
     ).format(
         customer_id=sql.Literal(customer_id), customer_name=sql.Literal(customer_name)
     )
     try:
-        conn.execute(add_customer_query)
+        inserted, _ = conn.execute(add_customer_query, name="add_customer")
         conn.commit()
     except exception_list as e:
         conn.close()
         return handle_errors(e)
     conn.close()
-    return ReturnValue["OK"]
+    return ReturnValue["OK"] if inserted else ReturnValue["ALREADY_EXISTS"]
 
 
 # Get a customer from the database.
+@call_trace.recorded
+@query_cache.cached("Customer")
 def get_customer(customer_id: int) -> Customer:  # Doron
-    conn = Connector.DBConnector()
+    conn = connect()
     get_customer_query = sql.SQL(
         """
     SELECT CustomerID, Name FROM Customer WHERE CustomerID = {customer_id}
     """
     ).format(customer_id=sql.Literal(customer_id))
-    rows, result_set = conn.execute(get_customer_query)
+    try:
+        rows, result_set = conn.execute(get_customer_query, name="get_customer")
+    except exception_list:
+        query_cache.failed()
+        conn.close()
+        return Customer.bad_customer()
     conn.close()
     if rows < 1:
         return Customer.bad_customer()
-    return create_customer_from_response(result_set[0])
+    return objects_from_result(Customer, result_set)[0]
 
 
 # Delete a customer from the database.
+@call_trace.recorded
+@query_cache.invalidates("Customer", "Reservation", "Review")
 def delete_customer(customer_id: int) -> ReturnValue:  # Daniel
-    conn = Connector.DBConnector()
-    delete_customer_query = sql.SQL(
-        """
-    DELETE FROM Customer WHERE {customer_id}>0 AND CustomerID = {customer_id}
-    """
-    ).format(customer_id=sql.Literal(customer_id))
-    try:
-        rows_affected, _ = conn.execute(delete_customer_query)
-    except exception_list as e:
-        conn.close()
-        return handle_errors(e)
-    conn.close()
-    if rows_affected < 1:
-        if customer_id <= 0 or customer_id is None:
-            return ReturnValue["BAD_PARAMS"]
-        return ReturnValue["NOT_EXISTS"]
-    return ReturnValue["OK"]
+    return call_write_function("delete_customer", "DeleteCustomer", customer_id)
 
 
 # Customer made a reservation of apartment from start_date to end_date and paid total_price
+@call_trace.recorded
+@query_cache.invalidates("Reservation")
 def customer_made_reservation(
     customer_id: int,
     apartment_id: int,
@@ -425,73 +977,23 @@ def customer_made_reservation(
     end_date: date,
     total_price: float,
 ) -> ReturnValue:  # Doron
-    conn = Connector.DBConnector()
-    customer_made_reservation_query = sql.SQL(
-        """
-    INSERT INTO Reservation (CustomerID, ApartmentID, StartDate, EndDate, Price) 
-    SELECT {customer_id}, {apartment_id}, {start_date}, {end_date}, {total_price}
-    WHERE {apartment_id} > 0
-    AND {customer_id} > 0
-    AND NOT EXISTS (
-        SELECT * FROM Reservation
-        WHERE ApartmentId = {apartment_id} 
-        AND StartDate < {end_date} AND EndDate > {start_date}
-    );
-    """
-    ).format(
-        customer_id=sql.Literal(customer_id),
-        apartment_id=sql.Literal(apartment_id),
-        start_date=sql.Literal(start_date),
-        end_date=sql.Literal(end_date),
-        total_price=sql.Literal(total_price),
-    )
-    try:
-        rows_affected, _ = conn.execute(customer_made_reservation_query)
-        if rows_affected == 0:
-            conn.close()
-            return ReturnValue.BAD_PARAMS
-    except exception_list as e:
-        conn.close()
-        return handle_errors(e)
-    conn.commit()
-    conn.close()
-    return ReturnValue["OK"]
+    return call_write_function("customer_made_reservation",
+                               "MakeReservation", customer_id, apartment_id, start_date, end_date, total_price)
 
 
 # Remove a reservation from the database.
+@call_trace.recorded
+@query_cache.invalidates("Reservation")
 def customer_cancelled_reservation(
     customer_id: int, apartment_id: int, start_date: date
 ) -> ReturnValue:  # Daniel
-    conn = Connector.DBConnector()
-    customer_cancelled_reservation_query = sql.SQL(
-        """
-    DELETE FROM Reservation WHERE CustomerID = {customer_id} AND ApartmentID = {apartment_id} AND StartDate = {start_date}
-    """
-    ).format(
-        customer_id=sql.Literal(customer_id),
-        apartment_id=sql.Literal(apartment_id),
-        start_date=sql.Literal(start_date),
-    )
-    try:
-        rows_affected, _ = conn.execute(customer_cancelled_reservation_query)
-    except exception_list as e:
-        conn.close()
-        return handle_errors(e)
-    conn.commit()
-    conn.close()
-    if rows_affected != 1:
-        if (
-            customer_id is None
-            or customer_id <= 0
-            or apartment_id is None
-            or apartment_id <= 0
-        ):
-            return ReturnValue["BAD_PARAMS"]
-        return ReturnValue["NOT_EXISTS"]
-    return ReturnValue["OK"]
+    return call_write_function("customer_cancelled_reservation",
+                               "CancelReservation", customer_id, apartment_id, start_date)
 
 
 # Customer reviewed apartment on date review_date and gave it rating stars, with text review_text.
+@call_trace.recorded
+@query_cache.invalidates("Review")
 def customer_reviewed_apartment(
     customer_id: int,
     apartment_id: int,
@@ -499,48 +1001,13 @@ def customer_reviewed_apartment(
     rating: int,
     review_text: str,
 ) -> ReturnValue:  # Doron
-    conn = Connector.DBConnector()
-    customer_reviewed_apartment_query = sql.SQL(
-        """
-    Insert into Review (CustomerID, ApartmentID, ReviewDate, Rating, ReviewText)
-    SELECT {customer_id}, {apartment_id}, {review_date}, {rating}, {review_text}
-    WHERE EXISTS (
-        SELECT * FROM Reservation
-        WHERE CustomerID = {customer_id}
-        AND ApartmentID = {apartment_id}
-        AND (EndDate <= {review_date})
-    );
-    """
-    ).format(
-        customer_id=sql.Literal(customer_id),
-        apartment_id=sql.Literal(apartment_id),
-        review_date=sql.Literal(review_date),
-        rating=sql.Literal(rating),
-        review_text=sql.Literal(review_text),
-    )
-    try:
-        rows_affected, _ = conn.execute(customer_reviewed_apartment_query)
-    except exception_list as e:
-        conn.close()
-        return handle_errors(e)
-    conn.commit()
-    conn.close()
-    if rows_affected < 1:
-        if (
-            rating is None
-            or rating < 1
-            or rating > 10
-            or apartment_id is None
-            or apartment_id <= 0
-            or customer_id is None
-            or customer_id <= 0
-        ):
-            return ReturnValue["BAD_PARAMS"]
-        return ReturnValue["NOT_EXISTS"]
-    return ReturnValue["OK"]
+    return call_write_function("customer_reviewed_apartment",
+                               "ReviewApartment", customer_id, apartment_id, review_date, rating, review_text)
 
 
 # Customer decided to update their review of apartment on update_date and changed his rating to new_rating and the review text to new_text
+@call_trace.recorded
+@query_cache.invalidates("Review")
 def customer_updated_review(
     customer_id: int,
     apartment_id: int,
@@ -548,7 +1015,7 @@ def customer_updated_review(
     new_rating: int,
     new_text: str,
 ) -> ReturnValue:  # Daniel
-    conn = Connector.DBConnector()
+    conn = connect()
     customer_updated_review_query = sql.SQL(
         """
     UPDATE Review 
@@ -563,8 +1030,9 @@ def customer_updated_review(
         apartment_id=sql.Literal(apartment_id),
     )
     try:
-        rows_affected, _ = conn.execute(customer_updated_review_query)
+        rows_affected, _ = conn.execute(customer_updated_review_query, name="customer_updated_review")
         if rows_affected == 0:
+            conn.close()
             if (
                 customer_id is None
                 or customer_id <= 0
@@ -585,30 +1053,36 @@ def customer_updated_review(
 
 
 # Owner owns apartment. An apartment can be owned by at most one owner.
+@call_trace.recorded
+@query_cache.invalidates("Owns")
 def owner_owns_apartment(owner_id: int, apartment_id: int) -> ReturnValue:  # Doron
-    conn = Connector.DBConnector()
+    conn = connect()
     owner_owns_apartment_query = sql.SQL(
         """
     INSERT INTO Owns (OwnerID, ApartmentID)
     VALUES ({owner_id}, {apartment_id})
+    ON CONFLICT DO NOTHING
+    RETURNING ApartmentID
     """
     ).format(
         owner_id=sql.Literal(owner_id),
         apartment_id=sql.Literal(apartment_id),
     )
     try:
-        conn.execute(owner_owns_apartment_query)
+        inserted, _ = conn.execute(owner_owns_apartment_query, name="owner_owns_apartment")
     except exception_list as e:
         conn.close()
         return handle_errors(e)
     conn.commit()
     conn.close()
-    return ReturnValue["OK"]
+    return ReturnValue["OK"] if inserted else ReturnValue["ALREADY_EXISTS"]
 
 
 # Owner dropped apartment and does not own it anymore.
+@call_trace.recorded
+@query_cache.invalidates("Owns")
 def owner_drops_apartment(owner_id: int, apartment_id: int) -> ReturnValue:  # Daniel
-    conn = Connector.DBConnector()
+    conn = connect()
     owner_drops_apartment_query = sql.SQL(
         """
     DELETE FROM Owns
@@ -616,7 +1090,7 @@ def owner_drops_apartment(owner_id: int, apartment_id: int) -> ReturnValue:  # D
     """
     ).format(owner_id=sql.Literal(owner_id), apartment_id=sql.Literal(apartment_id))
     try:
-        rows_affected, _ = conn.execute(owner_drops_apartment_query)
+        rows_affected, _ = conn.execute(owner_drops_apartment_query, name="owner_drops_apartment")
     except exception_list as e:
         conn.close()
         return handle_errors(e)
@@ -635,8 +1109,10 @@ def owner_drops_apartment(owner_id: int, apartment_id: int) -> ReturnValue:  # D
 
 
 # Get the owner of apartment.
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns")
 def get_apartment_owner(apartment_id: int) -> Owner:  # Doron
-    conn = Connector.DBConnector()
+    conn = connect()
     get_apartment_owner_query = sql.SQL(
         """
     SELECT o.OwnerID, o.Name
@@ -646,52 +1122,70 @@ def get_apartment_owner(apartment_id: int) -> Owner:  # Doron
     """
     ).format(apartment_id=sql.Literal(apartment_id))
     try:
-        num_rows, result_set = conn.execute(get_apartment_owner_query)
+        num_rows, result_set = conn.execute(get_apartment_owner_query, name="get_apartment_owner")
     except exception_list as e:
+        query_cache.failed()
         conn.close()
         return Owner.bad_owner()
     conn.close()
     if num_rows < 1:
         return Owner.bad_owner()
-    return create_owner_from_response(result_set[0])
+    return objects_from_result(Owner, result_set)[0]
 
 
 # Get a list of all apartments owned by owner.
-def get_owner_apartments(owner_id: int) -> List[Apartment]:  # Daniel
-    conn = Connector.DBConnector()
-    get_owner_apartments_query = sql.SQL(
-        """
-    SELECT *
-    FROM OwnerApartments    
-    WHERE OwnerID = {owner_id}                      
-    """
-    ).format(owner_id=sql.Literal(owner_id))
+# with raw=True the apartments are returned as (ApartmentID, Address, City, Country, Size) tuples.
+# apartments come by id, limit and after page through them (see keyset): after is the last id of the previous page
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment")
+def get_owner_apartments(owner_id: int, raw: bool = False, limit: int = None,
+                         after: int = None) -> List[Apartment]:  # Daniel
+    if limit is not None and limit <= 0:
+        return []
+    conn = connect()
     try:
-        num_apts, apts_data = conn.execute(get_owner_apartments_query)
+        num_apts, apts_data = conn.execute(owner_apartments_query(owner_id, limit, after),
+                                           name="get_owner_apartments", raw=raw)
     except exception_list as e:
+        query_cache.failed()
         conn.close()
-        return [Apartment.bad_apartment()]
+        return [BAD_APARTMENT_ROW if raw else Apartment.bad_apartment()]
     conn.close()
     if num_apts < 1:
         return []
-    apts = [create_apartment_from_response(apt_data) for apt_data in apts_data]
-    return apts
+    return apts_data if raw else objects_from_result(Apartment, apts_data)
+
+
+def owner_apartments_query(owner_id: int, limit: int = None, after: int = None) -> sql.Composed:
+    return sql.SQL(
+        """
+    SELECT a.ApartmentID, a.Address, a.City, a.Country, a.Size
+    FROM Owns os
+    JOIN Apartment a ON a.ApartmentID = os.ApartmentID
+    WHERE os.OwnerID = {owner_id} {after}
+    ORDER BY os.ApartmentID
+    {limit}
+    """
+    ).format(owner_id=sql.Literal(owner_id), after=keyset_after("os.ApartmentID", after), limit=keyset_limit(limit))
 
 
 # ---------------------------------- BASIC API: ----------------------------------
 
 
 # Get the average rating across all reviews of apartment.
+@call_trace.recorded
+@query_cache.cached("Review")
 def get_apartment_rating(apartment_id: int) -> float:
-    conn = Connector.DBConnector()
+    conn = connect()
     get_apartment_rating_query = sql.SQL(
         """
     SELECT AvgRating FROM Ratings WHERE ApartmentID = {apartment_id}
     """
     ).format(apartment_id=sql.Literal(apartment_id))
     try:
-        rows, result = conn.execute(get_apartment_rating_query)
+        rows, result = conn.execute(get_apartment_rating_query, name="get_apartment_rating")
     except exception_list as e:
+        query_cache.failed()
         conn.close()
         return handle_errors(e)
     conn.close()
@@ -701,8 +1195,10 @@ def get_apartment_rating(apartment_id: int) -> float:
 
 
 # Get the average of averages of ratings from all reviews of apartments owned by owner.
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment", "Review")
 def get_owner_rating(owner_id: int) -> float:
-    conn = Connector.DBConnector()
+    conn = connect()
     get_owner_rating_query = sql.SQL(
         """
 SELECT COALESCE(AVG(COALESCE(r.AvgRating, 0)), 0) AS AvgRating
@@ -713,8 +1209,9 @@ WHERE o.OwnerID = {owner_id}
     """
     ).format(owner_id=sql.Literal(owner_id))
     try:
-        rows, result = conn.execute(get_owner_rating_query)
+        rows, result = conn.execute(get_owner_rating_query, name="get_owner_rating")
     except exception_list as e:
+        query_cache.failed()
         conn.rollback()
         conn.close()
         return handle_errors(e)
@@ -725,8 +1222,10 @@ WHERE o.OwnerID = {owner_id}
 
 
 # Get the customer that made the most reservations.
+@call_trace.recorded
+@query_cache.cached("Customer", "Reservation")
 def get_top_customer() -> Customer:
-    conn = Connector.DBConnector()
+    conn = connect()
     try:
         get_top_customer_query = sql.SQL(
         """
@@ -734,14 +1233,16 @@ def get_top_customer() -> Customer:
         FROM Customer c
         JOIN (
             SELECT CustomerID, Reservations
-            FROM CustomerReservations
+            FROM CustomerStats
+            WHERE Reservations > 0
             ORDER BY Reservations DESC, CustomerID ASC
             LIMIT 1
         ) rc ON c.CustomerID = rc.CustomerID;
         """
         )
-        rows, result = conn.execute(get_top_customer_query)
+        rows, result = conn.execute(get_top_customer_query, name="get_top_customer")
     except Exception as e:
+        query_cache.failed()
         conn.close()
         return Customer.bad_customer()
     if rows < 1:
@@ -752,60 +1253,91 @@ def get_top_customer() -> Customer:
 
 
 # Output: a list of tuples of (owner_name, total_reservation_count) of all owners in the database.
-def reservations_per_owner() -> List[Tuple[str, int]]:
-    conn = Connector.DBConnector()
+# by owner name, limit and after page through them (see keyset): after is the last name of the previous page
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment", "Reservation")
+def reservations_per_owner(limit: int = None, after: str = None) -> List[Tuple[str, int]]:
+    if limit is not None and limit <= 0:
+        return []
+    conn = connect()
     try:
-        reservations_per_owner_query = sql.SQL(
-            """
-SELECT o.Name AS owner_name, COALESCE(SUM(r.ReservationCount), 0) AS total_reservation_count
-FROM Owner o
-LEFT JOIN OwnerReservation r ON o.Name = r.Name
-GROUP BY o.Name;
-        """
-        )
-        _, resultSet = conn.execute(reservations_per_owner_query)
-        if resultSet.isEmpty():
-            conn.close()
-            return []
-        owners = []
-        for row in resultSet.rows:
-            owners.append((row[0], row[1]))
-        conn.close()
-        return owners
+        _, rows = conn.execute(reservations_per_owner_query(limit, after), name="reservations_per_owner", raw=True)
+        return rows
     except Exception as e:
-        conn.close()
+        query_cache.failed()
         return []
+    finally:
+        conn.close()
+
+
+# the names of the page come off OwnerNameIdx, the reservations of each name are counted through the Owns and
+# Reservation apartment indexes
+def reservations_per_owner_query(limit: int = None, after: str = None) -> sql.Composed:
+    return sql.SQL(
+        """
+    SELECT n.Name AS owner_name, (
+        SELECT COUNT(*)
+        FROM Owner o
+        JOIN Owns os ON os.OwnerID = o.OwnerID
+        JOIN Reservation r ON r.ApartmentID = os.ApartmentID
+        WHERE o.Name = n.Name
+    ) AS total_reservation_count
+    FROM (SELECT DISTINCT Name FROM Owner WHERE TRUE {after} ORDER BY Name {limit}) n
+    ORDER BY n.Name
+    """
+    ).format(after=keyset_after("Name", after), limit=keyset_limit(limit))
 
 
 # ---------------------------------- ADVANCED API: ----------------------------------
 
 
 # Return all owners that own an apartment in every city there are apartments in.
-def get_all_location_owners() -> List[Owner]:
-    conn = Connector.DBConnector()
+# with raw=True the owners are returned as (OwnerID, Name) tuples. owners come by id, limit and after page through
+# them (see keyset): after is the last id of the previous page
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment")
+def get_all_location_owners(raw: bool = False, limit: int = None, after: int = None) -> List[Owner]:
+    if limit is not None and limit <= 0:
+        return []
+    conn = connect()
     try:
-        query = sql.SQL(
-        """
-        SELECT o.OwnerID, o.Name
-        FROM OwnerCityCountryCount o, TotalCityCountryCount
-        WHERE o.OwnerCityCountryCount = TotalCityCountryCount.TotalCityCountryCount;
-        """
-        )
-        _, resultSet = conn.execute(query)
-        if resultSet.isEmpty():
+        _, resultSet = conn.execute(all_location_owners_query(limit, after), name="get_all_location_owners", raw=raw)
+        if not resultSet:
             conn.close()
             return []
-        owners = [create_owner_from_response(owner) for owner in resultSet]
+        owners = resultSet if raw else objects_from_result(Owner, resultSet)
         conn.close()
         return owners
     except Exception as e:
+        query_cache.failed()
         conn.close()
         return []
 
 
+# owners are walked by id and each one's locations counted on its own, so a page stops after limit matches
+def all_location_owners_query(limit: int = None, after: int = None) -> sql.Composed:
+    return sql.SQL(
+        """
+    SELECT o.OwnerID, o.Name
+    FROM Owner o, TotalCityCountryCount t
+    WHERE t.TotalCityCountryCount > 0 {after}
+    AND (
+        SELECT COUNT(DISTINCT (a.City, a.Country))
+        FROM Owns os
+        JOIN Apartment a ON a.ApartmentID = os.ApartmentID
+        WHERE os.OwnerID = o.OwnerID
+    ) = t.TotalCityCountryCount
+    ORDER BY o.OwnerID
+    {limit}
+    """
+    ).format(after=keyset_after("o.OwnerID", after), limit=keyset_limit(limit))
+
+
 # Get the apartment that has the best reviews compared to its average nightly price.
+@call_trace.recorded
+@query_cache.cached("Apartment", "Reservation", "Review")
 def best_value_for_money() -> Apartment:
-    conn = Connector.DBConnector()
+    conn = connect()
     try:
         query = sql.SQL(
         """
@@ -816,19 +1348,23 @@ def best_value_for_money() -> Apartment:
         LIMIT 1;
         """
         )
-        rows_effected, result_set = conn.execute(query)
+        rows_effected, result_set = conn.execute(query, name="best_value_for_money")
         if result_set.isEmpty():
+            conn.close()
             return Apartment.bad_apartment()
         conn.close()
-        return create_apartment_from_response(result_set[0])
+        return objects_from_result(Apartment, result_set)[0]
 
     except Exception as e:
+        query_cache.failed()
         conn.close()
         return Apartment.bad_apartment()
 
 
+@call_trace.recorded
+@query_cache.cached("Reservation")
 def profit_per_month(year: int) -> List[Tuple[int, float]]:
-    conn = Connector.DBConnector()
+    conn = connect()
     try:
         query = sql.SQL(
         """
@@ -839,7 +1375,7 @@ def profit_per_month(year: int) -> List[Tuple[int, float]]:
         ORDER BY MS.Month;
         """
         ).format(year=sql.Literal(year))
-        rows_effected, resultSet = conn.execute(query)
+        rows_effected, resultSet = conn.execute(query, name="profit_per_month")
         if resultSet.isEmpty():
             return []
         profits = []
@@ -847,6 +1383,7 @@ def profit_per_month(year: int) -> List[Tuple[int, float]]:
             profits.append((row[0], row[1]))
         return profits
     except Exception as e:
+        query_cache.failed()
         return []
     finally:
         conn.close()
@@ -863,36 +1400,504 @@ you get multiple approximations for the same apartment, return their average.
 Generate an approximation for all apartments where it is possible. """
 
 
-def get_apartment_recommendation(customer_id: int) -> List[Tuple[Apartment, float]]:
-    conn = Connector.DBConnector()
+# with raw=True every recommendation is a (ApartmentID, Address, City, Country, Size, PredictedRating) tuple.
+# apartments come by id, limit and after page through them (see keyset): after is the last id of the previous page
+@call_trace.recorded
+@query_cache.cached("Apartment", "Reservation", "Review")
+def get_apartment_recommendation(customer_id: int, raw: bool = False, limit: int = None,
+                                 after: int = None) -> List[Tuple[Apartment, float]]:
+    if limit is not None and limit <= 0:
+        return []
+    conn = connect()
+    try:
+        rows_effected, resultSet = conn.execute(apartment_recommendation_query(customer_id, limit, after),
+                                                name="get_apartment_recommendation", raw=raw)
+        return resultSet if raw else objects_from_result(Apartment, resultSet, "PredictedRating")
+
+    except Exception as e:
+        query_cache.failed()
+        print(f"An error occurred: {e}")
+        return []
+
+    finally:
+        conn.close()
+
+
+def apartment_recommendation_query(customer_id: int, limit: int = None, after: int = None) -> sql.Composed:
+    return sql.SQL(
+        """
+    SELECT apt.ApartmentID, apt.Address, apt.City, apt.Country, apt.Size,
+        AVG(LEAST(10, GREATEST(1, rv.Rating * (SELECT avgRatio FROM RatingRatio rt WHERE rt.CustomerID = {customer_id} AND rt.OtherCustomerID = rv.CustomerID)))) AS PredictedRating
+    FROM Apartment apt
+    JOIN Review rv ON rv.ApartmentID = apt.ApartmentID AND rv.CustomerID != {customer_id}
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM Reservation res
+        WHERE res.CustomerID = {customer_id} AND res.ApartmentID = apt.ApartmentID
+    ) {after}
+    GROUP BY apt.ApartmentID
+    ORDER BY apt.ApartmentID
+    {limit}
+    """
+    ).format(customer_id=sql.Literal(customer_id), after=keyset_after("apt.ApartmentID", after),
+             limit=keyset_limit(limit))
+
+
+# ---------------------------------- LEADERBOARD API: ----------------------------------
+
+
+# Get the k customers that made the most reservations, with their reservation count.
+# with raw=True as (CustomerID, Name, Reservations) tuples
+@call_trace.recorded
+@query_cache.cached("Customer", "Reservation")
+def top_customers(k: int, raw: bool = False) -> List[Tuple[Customer, int]]:
+    if k is None or k <= 0:
+        return []
+    conn = connect()
     try:
         query = sql.SQL(
         """
-        SELECT apt.*, 
-            AVG(LEAST(10, GREATEST(1, rv.Rating * (SELECT avgRatio FROM RatingRatio rt WHERE rt.CustomerID = {customer_id} AND rt.OtherCustomerID = rv.CustomerID)))) AS PredictedRating
-        FROM Apartment apt
-        JOIN Review rv ON rv.ApartmentID = apt.ApartmentID AND rv.CustomerID != {customer_id}
-        WHERE NOT EXISTS (
-            SELECT 1
-            FROM Reservation res
-            WHERE res.CustomerID = {customer_id} AND res.ApartmentID = apt.ApartmentID
-        )
-        GROUP BY apt.ApartmentID
-        """).format(customer_id=sql.Literal(customer_id))
-        rows_effected, resultSet = conn.execute(query)
-        return [(create_apartment_from_response(row), row["PredictedRating"]) for row in resultSet]
+        SELECT c.CustomerID, c.Name, cs.Reservations
+        FROM CustomerStats cs
+        JOIN Customer c ON c.CustomerID = cs.CustomerID
+        WHERE cs.Reservations > 0
+        ORDER BY cs.Reservations DESC, cs.CustomerID ASC
+        LIMIT {k}
+        """
+        ).format(k=sql.Literal(k))
+        _, resultSet = conn.execute(query, name="top_customers", raw=raw)
+        return resultSet if raw else objects_from_result(Customer, resultSet, "Reservations")
+    except Exception as e:
+        query_cache.failed()
+        return []
+    finally:
+        conn.close()
 
+
+# Get the k owners with the best average apartment rating (as in get_owner_rating), with their rating.
+# with raw=True as (OwnerID, Name, AvgRating) tuples
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment", "Review")
+def top_owners_by_rating(k: int, raw: bool = False) -> List[Tuple[Owner, float]]:
+    if k is None or k <= 0:
+        return []
+    conn = connect()
+    try:
+        query = sql.SQL(
+        """
+        SELECT o.OwnerID, o.Name, os.AvgRating
+        FROM OwnerStats os
+        JOIN Owner o ON o.OwnerID = os.OwnerID
+        ORDER BY os.AvgRating DESC, os.OwnerID ASC
+        LIMIT {k}
+        """
+        ).format(k=sql.Literal(k))
+        _, resultSet = conn.execute(query, name="top_owners_by_rating", raw=raw)
+        return resultSet if raw else objects_from_result(Owner, resultSet, "AvgRating")
     except Exception as e:
-        print(f"An error occurred: {e}")
+        query_cache.failed()
         return []
+    finally:
+        conn.close()
+
+
+# Get the k apartments with the best reviews compared to their average nightly price, with their value.
+# with raw=True as (ApartmentID, Address, City, Country, Size, Value) tuples
+@call_trace.recorded
+@query_cache.cached("Apartment", "Reservation", "Review")
+def best_value_apartments(k: int, raw: bool = False) -> List[Tuple[Apartment, float]]:
+    if k is None or k <= 0:
+        return []
+    conn = connect()
+    try:
+        query = sql.SQL(
+        """
+        SELECT apt.ApartmentID, apt.Address, apt.City, apt.Country, apt.Size, s.Value
+        FROM ApartmentStats s
+        JOIN Apartment apt ON apt.ApartmentID = s.ApartmentID
+        WHERE s.Value IS NOT NULL
+        ORDER BY s.Value DESC NULLS LAST, s.ApartmentID ASC
+        LIMIT {k}
+        """
+        ).format(k=sql.Literal(k))
+        _, resultSet = conn.execute(query, name="best_value_apartments", raw=raw)
+        return resultSet if raw else objects_from_result(Apartment, resultSet, "Value")
+    except Exception as e:
+        query_cache.failed()
+        return []
+    finally:
+        conn.close()
+
+
+# ---------------------------------- SEARCH API: ----------------------------------
+
+
+# Reviews matching query (web search syntax: words, "quoted phrases", or, -word), best ranked first, as
+# (CustomerID, ApartmentID, ReviewDate, Rating, ReviewText, Rank) tuples. the match is served by the GIN index
+# of Review.ReviewSearch, only the matches are ranked
+@call_trace.recorded
+@query_cache.cached("Review")
+def search_reviews(query: str, apartment_id: int = None, min_rating: int = None,
+                   limit: int = 20) -> List[Tuple[int, int, date, int, str, float]]:
+    search = search_reviews_query(query, apartment_id, min_rating, limit)
+    if search is None:
+        return []
+    conn = connect()
+    try:
+        _, rows = conn.execute(search, name="search_reviews", raw=True)
+        return rows
+    except Exception as e:
+        query_cache.failed()
+        return []
+    finally:
+        conn.close()
+
+
+# the query of search_reviews, None when nothing can match
+def search_reviews_query(query: str, apartment_id: int = None, min_rating: int = None, limit: int = 20):
+    if not query or not query.strip() or limit is None or limit <= 0:
+        return None
+    conditions = [sql.SQL("ReviewSearch @@ q")]
+    if apartment_id is not None:
+        conditions.append(sql.SQL("ApartmentID = {apartment_id}").format(apartment_id=sql.Literal(apartment_id)))
+    if min_rating is not None:
+        conditions.append(sql.SQL("Rating >= {min_rating}").format(min_rating=sql.Literal(min_rating)))
+    return sql.SQL(
+        """
+    SELECT CustomerID, ApartmentID, ReviewDate, Rating, ReviewText, ts_rank_cd(ReviewSearch, q) AS Rank
+    FROM Review, websearch_to_tsquery('english', {query}) q
+    WHERE {conditions}
+    ORDER BY Rank DESC, ApartmentID, CustomerID
+    LIMIT {limit}
+    """
+    ).format(query=sql.Literal(query), conditions=sql.SQL(" AND ").join(conditions), limit=sql.Literal(limit))
+
+
+# ---------------------------------- MARKET API: ----------------------------------
+
+
+NO_NIGHTLY_PRICES = (0, None, None, None, None)
+
+
+# Number of reservations starting in year in the city, with the mean, median, 90th and 99th percentile of their
+# nightly prices (stays of zero nights are left out). percentiles come from NightlyPriceHistogram, within 0.5%.
+# (0, None, None, None, None) when there are none
+@call_trace.recorded
+@query_cache.cached("Apartment", "Reservation")
+def nightly_price_stats(country: str, city: str, year: int) -> Tuple[int, float, float, float, float]:
+    conn = connect()
+    try:
+        _, result = conn.execute(nightly_price_stats_query(country, city, year), name="nightly_price_stats", raw=True)
+    except Exception as e:
+        query_cache.failed()
+        return NO_NIGHTLY_PRICES
+    finally:
+        conn.close()
+    return nightly_price_stats_from(result[0])
+
+
+def nightly_price_stats_query(country: str, city: str, year: int) -> sql.Composed:
+    return sql.SQL(
+        """
+    WITH Buckets AS (
+        SELECT Bucket, Reservations, PriceSum
+        FROM NightlyPriceHistogram
+        WHERE Country = {country} AND City = {city} AND Year = {year} AND Reservations > 0
+    ), Cumulative AS (
+        SELECT Bucket, SUM(Reservations) OVER (ORDER BY Bucket) AS Reservations, SUM(Reservations) OVER () AS Total
+        FROM Buckets
+    )
+    SELECT (SELECT SUM(Reservations) FROM Buckets),
+        (SELECT SUM(PriceSum) / SUM(Reservations) FROM Buckets),
+        NightlyPriceOfBucket((SELECT MIN(Bucket) FROM Cumulative WHERE Reservations >= 0.50 * Total)),
+        NightlyPriceOfBucket((SELECT MIN(Bucket) FROM Cumulative WHERE Reservations >= 0.90 * Total)),
+        NightlyPriceOfBucket((SELECT MIN(Bucket) FROM Cumulative WHERE Reservations >= 0.99 * Total))
+    """
+    ).format(country=sql.Literal(country), city=sql.Literal(city), year=sql.Literal(year))
+
+
+def nightly_price_stats_from(row: tuple) -> Tuple[int, float, float, float, float]:
+    if not row[0]:
+        return NO_NIGHTLY_PRICES
+    return (int(row[0]),) + tuple(float(value) for value in row[1:])
+
+
+# ---------------------------------- OCCUPANCY API: ----------------------------------
+
+
+# Booked nights over available nights of the apartment for every month of year, [(month, occupancy), ...] from
+# January to December, from the ApartmentMonthNights rollup. [] if the apartment does not exist
+@call_trace.recorded
+@query_cache.cached("Apartment", "Reservation")
+def apartment_occupancy(apartment_id: int, year: int) -> List[Tuple[int, float]]:
+    return occupancy("apartment_occupancy", occupancy_query("Apartment", "ApartmentID", apartment_id, year))
+
+
+# Same over all apartments the owner owns now, each month's booked nights over the apartments' available nights.
+# [] if the owner owns no apartment
+@call_trace.recorded
+@query_cache.cached("Owns", "Apartment", "Reservation")
+def owner_occupancy(owner_id: int, year: int) -> List[Tuple[int, float]]:
+    return occupancy("owner_occupancy", occupancy_query("Owns", "OwnerID", owner_id, year))
+
+
+def occupancy(name: str, query: sql.Composed) -> List[Tuple[int, float]]:
+    conn = connect()
+    try:
+        _, rows = conn.execute(query, name=name, raw=True)
+    except Exception as e:
+        query_cache.failed()
+        return []
+    finally:
+        conn.close()
+    return [(month, float(rate)) for month, rate in rows]
+
+
+# apartments are the ApartmentID rows of table where key_column = key, one per apartment
+def occupancy_query(table: str, key_column: str, key: int, year: int) -> sql.Composed:
+    return sql.SQL(
+        """
+    SELECT EXTRACT(MONTH FROM m)::INT AS Month,
+        COALESCE(SUM(n.Nights), 0)::DECIMAL / (COUNT(*) * ((m + INTERVAL '1 month')::DATE - m::DATE)) AS Occupancy
+    FROM {table} t
+    CROSS JOIN generate_series(make_date({year}, 1, 1)::TIMESTAMP, make_date({year}, 12, 1)::TIMESTAMP,
+                               INTERVAL '1 month') AS m
+    LEFT JOIN ApartmentMonthNights n ON n.ApartmentID = t.ApartmentID AND n.Month = m::DATE
+    WHERE t.{key_column} = {key}
+    GROUP BY m
+    ORDER BY m
+    """
+    ).format(table=sql.SQL(table), key_column=sql.SQL(key_column), key=sql.Literal(key), year=sql.Literal(year))
+
+
+# ---------------------------------- PORTFOLIO API: ----------------------------------
+
+
+# Everything an owner dashboard shows, from one statement:
+#   {"owner": Owner, "apartments": [(Apartment, rating, reservations, revenue), ...] by apartment id,
+#    "rating": as get_owner_rating, "reservations": total, "revenue": total of the reservation prices}
+# the apartments come back as one json_agg array, ratings from ApartmentStats. for a missing owner the owner is
+# Owner.bad_owner() and the rest is empty
+@call_trace.recorded
+@query_cache.cached("Owner", "Owns", "Apartment", "Reservation", "Review")
+def get_owner_portfolio(owner_id: int) -> dict:
+    conn = connect()
+    try:
+        _, rows = conn.execute(owner_portfolio_query(owner_id), name="get_owner_portfolio", raw=True)
+    except Exception as e:
+        query_cache.failed()
+        return portfolio_from(None)
+    finally:
+        conn.close()
+    return portfolio_from(rows[0] if rows else None)
+
 
+def owner_portfolio_query(owner_id: int) -> sql.Composed:
+    return sql.SQL(
+        """
+    WITH Portfolio AS (
+        SELECT a.ApartmentID, a.Address, a.City, a.Country, a.Size, COALESCE(s.AvgRating, 0) AS Rating,
+            COUNT(r.ReservationID) AS Reservations, COALESCE(SUM(r.Price), 0) AS Revenue
+        FROM Owns os
+        JOIN Apartment a ON a.ApartmentID = os.ApartmentID
+        LEFT JOIN ApartmentStats s ON s.ApartmentID = a.ApartmentID
+        LEFT JOIN Reservation r ON r.ApartmentID = a.ApartmentID
+        WHERE os.OwnerID = {owner_id}
+        GROUP BY a.ApartmentID, s.AvgRating
+    )
+    SELECT o.OwnerID, o.Name,
+        (SELECT COALESCE(json_agg(p ORDER BY p.ApartmentID), '[]') FROM Portfolio p),
+        (SELECT COALESCE(AVG(Rating), 0) FROM Portfolio),
+        (SELECT COALESCE(SUM(Reservations), 0) FROM Portfolio),
+        (SELECT COALESCE(SUM(Revenue), 0) FROM Portfolio)
+    FROM Owner o
+    WHERE o.OwnerID = {owner_id}
+    """
+    ).format(owner_id=sql.Literal(owner_id))
+
+
+def portfolio_from(row: tuple) -> dict:
+    if row is None:
+        return {"owner": Owner.bad_owner(), "apartments": [], "rating": 0, "reservations": 0, "revenue": 0}
+    owner_id, name, apartments, rating, reservations, revenue = row
+    return {
+        "owner": Owner(owner_id, name),
+        "apartments": [
+            (Apartment(a["apartmentid"], a["address"], a["city"], a["country"], a["size"]), float(a["rating"]),
+             a["reservations"], float(a["revenue"]))
+            for a in apartments
+        ],
+        "rating": float(rating),
+        "reservations": int(reservations),
+        "revenue": float(revenue),
+    }
+
+
+# ---------------------------------- UPSERT API: ----------------------------------
+
+
+# Inserts the row, or overwrites the existing row with the same key, in one statement.
+# Returns OK if the row was inserted or updated, ALREADY_EXISTS if it clashes with another row on a UNIQUE column
+# (the address of another apartment), BAD_PARAMS / NOT_EXISTS like the add_* functions.
+def upsert(name: str, query: sql.Composed) -> ReturnValue:
+    conn = connect()
+    try:
+        conn.execute(query, name=name)
+        conn.commit()
+    except exception_list as e:
+        return handle_errors(e)
     finally:
         conn.close()
+    return ReturnValue["OK"]
+
+
+@call_trace.recorded
+@query_cache.invalidates("Owner")
+def upsert_owner(owner: Owner) -> ReturnValue:
+    return upsert("upsert_owner", sql.SQL(
+        """
+    INSERT INTO Owner (OwnerID, Name)
+    VALUES ({owner_id}, {name})
+    ON CONFLICT (OwnerID) DO UPDATE SET Name = EXCLUDED.Name
+    """
+    ).format(owner_id=sql.Literal(owner.get_owner_id()), name=sql.Literal(owner.get_owner_name())))
+
+
+@call_trace.recorded
+@query_cache.invalidates("Customer")
+def upsert_customer(customer: Customer) -> ReturnValue:
+    return upsert("upsert_customer", sql.SQL(
+        """
+    INSERT INTO Customer (CustomerID, Name)
+    VALUES ({customer_id}, {name})
+    ON CONFLICT (CustomerID) DO UPDATE SET Name = EXCLUDED.Name
+    """
+    ).format(customer_id=sql.Literal(customer.get_customer_id()), name=sql.Literal(customer.get_customer_name())))
+
+
+# an apartment whose new address belongs to another apartment is ALREADY_EXISTS, like in add_apartment
+@call_trace.recorded
+@query_cache.invalidates("Apartment")
+def upsert_apartment(apartment: Apartment) -> ReturnValue:
+    return upsert("upsert_apartment", sql.SQL(
+        """
+    INSERT INTO Apartment (ApartmentID, Address, City, Country, Size)
+    VALUES ({apartment_id}, {address}, {city}, {country}, {size})
+    ON CONFLICT (ApartmentID) DO UPDATE
+    SET Address = EXCLUDED.Address, City = EXCLUDED.City, Country = EXCLUDED.Country, Size = EXCLUDED.Size
+    """
+    ).format(
+        apartment_id=sql.Literal(apartment.get_id()),
+        address=sql.Literal(apartment.get_address()),
+        city=sql.Literal(apartment.get_city()),
+        country=sql.Literal(apartment.get_country()),
+        size=sql.Literal(apartment.get_size()),
+    ))
+
+
+# makes owner_id the owner of the apartment, taking it over from its current owner if it has one
+@call_trace.recorded
+@query_cache.invalidates("Owns")
+def upsert_owns(owner_id: int, apartment_id: int) -> ReturnValue:
+    return upsert("upsert_owns", sql.SQL(
+        """
+    INSERT INTO Owns (OwnerID, ApartmentID)
+    VALUES ({owner_id}, {apartment_id})
+    ON CONFLICT (ApartmentID) DO UPDATE SET OwnerID = EXCLUDED.OwnerID
+    """
+    ).format(owner_id=sql.Literal(owner_id), apartment_id=sql.Literal(apartment_id)))
+
+
+# ---------------------------------- UPDATE API: ----------------------------------
+
+
+# UPDATE of only the given {column: value}, None if there is nothing to update
+def update_query(table: str, key_column: str, key: int, columns: dict) -> sql.Composed:
+    if not columns:
+        return None
+    return sql.SQL("UPDATE {table} SET {assignments} WHERE {key_column} = {key}").format(
+        table=sql.SQL(table),
+        assignments=sql.SQL(", ").join(
+            sql.SQL("{column} = {value}").format(column=sql.SQL(column), value=sql.Literal(value))
+            for column, value in columns.items()
+        ),
+        key_column=sql.SQL(key_column),
+        key=sql.Literal(key),
+    )
+
+
+# Saves the fields changed by the object's setters (see dirty_fields()) and marks it clean.
+# Returns OK without querying the database if nothing changed, NOT_EXISTS if there is no row with the object's id,
+# BAD_PARAMS for an invalid id or value and ALREADY_EXISTS if an apartment would get another one's address
+def update_columns(name: str, obj, table: str, key_column: str, key: int, columns: dict) -> ReturnValue:
+    if key is None or key <= 0:
+        return ReturnValue["BAD_PARAMS"]
+    query = update_query(table, key_column, key, columns)
+    if query is None:
+        return ReturnValue["OK"]
+    conn = connect()
+    try:
+        updated, _ = conn.execute(query, name=name)
+        conn.commit()
+    except exception_list as e:
+        return handle_errors(e)
+    finally:
+        conn.close()
+    if updated < 1:
+        return ReturnValue["NOT_EXISTS"]
+    obj.mark_clean()
+    return ReturnValue["OK"]
+
+
+def dirty_columns(obj, columns: dict) -> dict:
+    dirty = obj.dirty_fields()
+    return {column: getattr(obj, "get_" + field)() for field, column in columns.items() if field in dirty}
+
+
+@call_trace.recorded
+@query_cache.invalidates("Owner")
+def update_owner(owner: Owner) -> ReturnValue:
+    return update_columns("update_owner", owner, "Owner", "OwnerID", owner.get_owner_id(),
+                          dirty_columns(owner, {"owner_name": "Name"}))
+
+
+@call_trace.recorded
+@query_cache.invalidates("Customer")
+def update_customer(customer: Customer) -> ReturnValue:
+    return update_columns("update_customer", customer, "Customer", "CustomerID", customer.get_customer_id(),
+                          dirty_columns(customer, {"customer_name": "Name"}))
+
+
+@call_trace.recorded
+@query_cache.invalidates("Apartment")
+def update_apartment(apartment: Apartment) -> ReturnValue:
+    return update_columns("update_apartment", apartment, "Apartment", "ApartmentID", apartment.get_id(), dirty_columns(
+        apartment, {"address": "Address", "city": "City", "country": "Country", "size": "Size"}))
 
 
 # Utility functions:
 
 
+# Make all Solution calls, from any thread, check their connection out of one Connector.SharedDBConnector
+# instead of connecting per call, or run them all on one Connector.TransactionalDBConnector (tests).
+# Pass None to go back to a new connection per call.
+def use_shared_connector(connector: Connector.SharedDBConnector = None) -> None:
+    global shared_connector
+    shared_connector = connector
+
+
+# connector for a single Solution call, the call must close() it when done
+def connect():
+    if shared_connector is not None:
+        return shared_connector.acquire()
+    return Connector.DBConnector()
+
+
+# Start evicting query_cache entries on writes made by other processes. Call stop() on the result to end it.
+def listen_for_invalidations(on_notify=None) -> Connector.InvalidationListener:
+    return Connector.InvalidationListener(query_cache, INVALIDATION_CHANNEL, on_notify=on_notify).start()
+
+
 def create_owner_from_response(res: ResultSetDict) -> Owner:
     try:
         return Owner(res["OwnerID"], res["Name"])
@@ -920,6 +1925,56 @@ def create_apartment_from_response(res: ResultSetDict) -> Apartment:
         return Apartment.bad_apartment()
 
 
+# a call of one of the stored write functions of create_tables, they return the name of the ReturnValue
+# a WriteCall, so the slow query log does not run the write a second time to EXPLAIN it
+def write_function_query(function: str, *args) -> sql.Composed:
+    return WriteCall(sql.SQL("SELECT {function}({args}) AS Status").format(
+        function=sql.SQL(function), args=sql.SQL(", ").join(sql.Literal(arg) for arg in args)).seq)
+
+
+def call_write_function(name: str, function: str, *args) -> ReturnValue:
+    conn = connect()
+    try:
+        _, result = conn.execute(write_function_query(function, *args), name=name)
+    except exception_list as e:
+        return handle_errors(e)
+    finally:
+        conn.close()
+    return ReturnValue[result[0]["Status"]]
+
+
+# keyset pagination: a page holds the rows whose key is greater than `after`, the key of the last row of the previous
+# page, at most `limit` of them. unlike OFFSET, page N starts with an index seek to `after` and costs as much as page 1
+def keyset_after(key: str, after) -> sql.Composable:
+    if after is None:
+        return sql.SQL("")
+    return sql.SQL("AND {key} > {after}").format(key=sql.SQL(key), after=sql.Literal(after))
+
+
+def keyset_limit(limit: int) -> sql.Composable:
+    if limit is None:
+        return sql.SQL("")
+    return sql.SQL("LIMIT {limit}").format(limit=sql.Literal(limit))
+
+
+# the raw=True counterpart of Apartment.bad_apartment()
+BAD_APARTMENT_ROW = (None, None, None, None, None)
+
+
+# Business objects built straight from the rows of a result: the column positions are looked up once per result
+# instead of building a ResultSetDict for every row. with extra, every object is paired with that column's value,
+# e.g. objects_from_result(Apartment, result_set, "PredictedRating") -> [(apartment, rating), ...]
+def objects_from_result(cls, result_set: ResultSet, extra: str = None) -> list:
+    index = dict(result_set.cols)
+    try:
+        if extra is None:
+            return [cls.from_row(row, index) for row in result_set.rows]
+        position = index[extra.lower()]
+        return [(cls.from_row(row, index), row[position]) for row in result_set.rows]
+    except KeyError:
+        return [cls() for _ in result_set.rows]
+
+
 def handle_errors(e: DatabaseException):
     e_name = e.__str__()
     # print(f"handling error: {e_name}")
@@ -950,3 +2005,9 @@ exception_list = (
     DatabaseException.database_ini_ERROR,
     DatabaseException.UNKNOWN_ERROR,
 )
+
+
+# with $SOLUTION_BACKEND=memory the API functions above are replaced by the MemorySolution.py ones, the callers
+# keep importing Solution
+if BACKEND == "memory":
+    from MemorySolution import *
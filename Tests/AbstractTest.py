@@ -1,12 +1,42 @@
+import os
 import unittest
 import Solution as Solution
+import Utility.DBConnector as Connector
+
+# skips the tests of PostgreSQL itself (connections, transactions, migrations, the statements a call runs) when the
+# API is served by the memory backend
+database_only = unittest.skipIf(Solution.BACKEND == "memory", "needs the PostgreSQL backend")
 
 
 class AbstractTest(unittest.TestCase):
+    # "rollback": the tables are created once per test class and every test runs on one connection whose changes
+    # are rolled back after it. "recreate": create_tables/drop_tables around every test, needed by tests whose
+    # Solution calls do not go through Solution.connect() (their own connectors, other threads, AsyncSolution)
+    # and the default of the memory backend, which has no transactions
+    isolation = os.environ.get("SOLUTION_TEST_ISOLATION", "recreate" if Solution.BACKEND == "memory" else "rollback")
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        if cls.isolation == "rollback":
+            Solution.create_tables()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        if cls.isolation == "rollback":
+            Solution.drop_tables()
+
     # before each test, setUp is executed
     def setUp(self) -> None:
-        Solution.create_tables()
+        if self.isolation == "rollback":
+            self.transaction = Connector.TransactionalDBConnector()
+            Solution.use_shared_connector(self.transaction)
+        else:
+            Solution.create_tables()
 
     # after each test, tearDown is executed
     def tearDown(self) -> None:
-        Solution.drop_tables()
+        if self.isolation == "rollback":
+            Solution.use_shared_connector(None)
+            self.transaction.close_all()
+        else:
+            Solution.drop_tables()
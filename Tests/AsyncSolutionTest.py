@@ -0,0 +1,82 @@
+import asyncio
+import unittest
+from datetime import date
+import AsyncSolution
+import Solution as Solution
+from Utility.Instrumentation import instrumentation
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest, database_only
+
+from Business.Apartment import Apartment
+from Business.Owner import Owner
+from Business.Customer import Customer
+
+
+@database_only
+class Test(AbstractTest):
+    isolation = "recreate"
+
+    def run_async(self, coroutine):
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                await AsyncSolution.pool.close()
+        return asyncio.run(run())
+
+    def test_matches_sync_api(self) -> None:
+        async def scenario():
+            self.assertEqual(ReturnValue.OK, await AsyncSolution.add_customer(Customer(1, 'a1')))
+            self.assertEqual(ReturnValue.BAD_PARAMS, await AsyncSolution.add_customer(Customer(2, None)))
+            self.assertEqual(ReturnValue.ALREADY_EXISTS, await AsyncSolution.add_customer(Customer(1, 'a2')))
+            self.assertEqual(ReturnValue.OK, await AsyncSolution.add_apartment(Apartment(1, 'a', 'Haifa', 'ISR', 50)))
+            self.assertEqual(ReturnValue.OK, await AsyncSolution.add_owner(Owner(1, 'o1')))
+            self.assertEqual(ReturnValue.OK, await AsyncSolution.owner_owns_apartment(1, 1))
+            self.assertEqual(ReturnValue.OK, await AsyncSolution.customer_made_reservation(
+                1, 1, date(2023, 1, 1), date(2023, 1, 3), 200))
+            self.assertEqual(ReturnValue.BAD_PARAMS, await AsyncSolution.customer_made_reservation(
+                1, 1, date(2023, 1, 2), date(2023, 1, 4), 200), 'overlapping reservation')
+            self.assertEqual(ReturnValue.OK, await AsyncSolution.customer_reviewed_apartment(
+                1, 1, date(2023, 2, 1), 8, 'ok'))
+            self.assertEqual(Customer(1, 'a1'), await AsyncSolution.get_customer(1))
+            self.assertEqual([Apartment(1, 'a', 'Haifa', 'ISR', 50)], await AsyncSolution.get_owner_apartments(1))
+            self.assertEqual(8, await AsyncSolution.get_owner_rating(1))
+            self.assertEqual(Customer(1, 'a1'), await AsyncSolution.get_top_customer())
+        self.run_async(scenario())
+        self.assertEqual(Solution.reservations_per_owner(), self.run_async(AsyncSolution.reservations_per_owner()))
+
+    def test_concurrent_calls_share_the_pool(self) -> None:
+        async def scenario():
+            AsyncSolution.pool.max_size = 2
+            results = await asyncio.gather(*[AsyncSolution.add_customer(Customer(i, f'c{i}')) for i in range(1, 51)])
+            self.assertEqual([ReturnValue.OK] * 50, results)
+            customers = await asyncio.gather(*[AsyncSolution.get_customer(i) for i in range(1, 51)])
+            self.assertEqual([Customer(i, f'c{i}') for i in range(1, 51)], customers)
+        self.run_async(scenario())
+
+    # the statements of shared helpers are named after the API function that called them, like in Solution
+    def test_event_names(self) -> None:
+        async def scenario():
+            await AsyncSolution.add_customer(Customer(1, 'c1'))
+            await AsyncSolution.add_apartment(Apartment(1, 'a', 'Haifa', 'ISR', 50))
+            names.clear()
+            await AsyncSolution.customer_made_reservation(1, 1, date(2023, 1, 1), date(2023, 1, 3), 200)
+            await AsyncSolution.delete_customer(1)
+            await AsyncSolution.upsert_customer(Customer(2, 'c2'))
+            await AsyncSolution.apartment_occupancy(1, 2023)
+            customer = Customer(2, 'c2')
+            customer.set_customer_name('c3')
+            await AsyncSolution.update_customer(customer)
+        names = []
+        hook = instrumentation.add_hook(before=lambda event: names.append(event.name))
+        try:
+            self.run_async(scenario())
+        finally:
+            instrumentation.remove_hook(hook)
+        self.assertEqual(['customer_made_reservation', 'delete_customer', 'upsert_customer',
+                          'apartment_occupancy', 'update_customer'], names)
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
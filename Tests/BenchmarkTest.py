@@ -0,0 +1,29 @@
+import unittest
+from Tools.Benchmark import _percentile, compare
+
+
+class Test(unittest.TestCase):
+    def test_percentile(self) -> None:
+        values = [i / 100 for i in range(1, 101)]
+        self.assertEqual(0.51, _percentile(values, 0.50))
+        self.assertEqual(0.96, _percentile(values, 0.95))
+        self.assertEqual(1.0, _percentile(values, 1.0))
+        self.assertEqual(0.0, _percentile([], 0.5))
+
+    def test_compare(self) -> None:
+        baseline = {"results": {"1": {"get_owner": {"p50": 0.001, "p95": 0.002},
+                                      "best_value_for_money": {"p50": 0.100, "p95": 0.200}}}}
+        current = {"results": {"1": {"get_owner": {"p50": 0.0012, "p95": 0.0022},
+                                     "best_value_for_money": {"p50": 0.150, "p95": 0.210},
+                                     "top_customers": {"p50": 0.5, "p95": 0.5}}}}
+        regressions = compare(baseline, current, tolerance=0.2)
+        self.assertEqual([("1", "best_value_for_money", "p50")],
+                         [(r["scale"], r["case"], r["metric"]) for r in regressions],
+                         'sub-millisecond noise and cases missing from the baseline are not regressions')
+        self.assertAlmostEqual(1.5, regressions[0]["ratio"])
+        self.assertEqual([], compare(current, baseline))
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
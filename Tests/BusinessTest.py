@@ -0,0 +1,48 @@
+import copy
+import unittest
+from Business.Apartment import Apartment
+from Business.Customer import Customer
+from Business.Owner import Owner
+from Solution import objects_from_result
+from Tools.ObjectBenchmark import result_set, run
+
+
+class Test(unittest.TestCase):
+    def test_from_row(self) -> None:
+        index = {'size': 0, 'apartmentid': 1, 'city': 2, 'address': 3, 'country': 4}
+        self.assertEqual(Apartment(3, 'Herzl 1', 'Haifa', 'Israel', 55.5),
+                         Apartment.from_row((55.5, 3, 'Haifa', 'Herzl 1', 'Israel'), index))
+        self.assertEqual(Owner(1, 'Dana'), Owner.from_row(('Dana', 1), {'name': 0, 'ownerid': 1}))
+        self.assertEqual(Customer(2, 'Eli'), Customer.from_row((2, 'Eli'), {'customerid': 0, 'name': 1}))
+        self.assertEqual(set(), Owner.from_row(('Dana', 1), {'name': 0, 'ownerid': 1}).dirty_fields())
+
+    def test_slots(self) -> None:
+        apartment = Apartment(1, 'a', 'c', 'k', 40)
+        self.assertFalse(hasattr(apartment, '__dict__'))
+        with self.assertRaises(AttributeError):
+            apartment.rooms = 3
+        apartment.set_size(60)
+        duplicate = copy.deepcopy(apartment)
+        self.assertEqual(apartment, duplicate)
+        self.assertEqual(60, duplicate.get_size())
+        self.assertEqual({'size'}, duplicate.dirty_fields())
+        duplicate.mark_clean()
+        self.assertEqual({'size'}, apartment.dirty_fields())
+
+    def test_objects_from_result(self) -> None:
+        results = result_set(3)
+        apartments = objects_from_result(Apartment, results)
+        self.assertEqual([0, 1, 2], [apartment.get_id() for apartment in apartments])
+        self.assertEqual([(apartments[1], 41.0)], objects_from_result(Apartment, result_set(2), 'Size')[1:])
+        self.assertEqual([Owner.bad_owner()] * 3, objects_from_result(Owner, results))
+        self.assertEqual([], objects_from_result(Apartment, result_set(0)))
+
+    def test_benchmark_report(self) -> None:
+        report = run(rows=200, repeat=1)
+        self.assertEqual(200, report['rows'])
+        self.assertLess(report['slots']['bytes_per_row'], report['dict']['bytes_per_row'])
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
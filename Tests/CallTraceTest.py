@@ -0,0 +1,88 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import date
+from Utility.CallTrace import CallTrace, load, same_result
+from Utility.ReturnValue import ReturnValue
+from Business.Apartment import Apartment
+from Business.Owner import Owner
+
+
+class Test(unittest.TestCase):
+    def test_record_and_load(self) -> None:
+        trace = CallTrace()
+
+        @trace.recorded
+        def customer_made_reservation(customer_id, apartment_id, start_date, end_date, total_price):
+            return ReturnValue.OK
+
+        @trace.recorded
+        def get_apartment_recommendation(customer_id):
+            return [(Apartment(2, 'a', 'c', 'k', 40.5), 7.25)]
+
+        @trace.recorded
+        def get_owner(owner_id):
+            raise ValueError('boom')
+
+        customer_made_reservation(1, 2, date(2021, 1, 1), date(2021, 1, 3), 100)  # not recorded
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.jsonl.gz')
+            trace.start(path)
+            self.assertTrue(trace.active)
+            customer_made_reservation(1, 2, date(2021, 1, 1), end_date=date(2021, 1, 3), total_price=100)
+            get_apartment_recommendation(1)
+            with self.assertRaises(ValueError):
+                get_owner(3)
+            trace.stop()
+            entries = list(load(path))
+        self.assertEqual(['customer_made_reservation', 'get_apartment_recommendation', 'get_owner'],
+                         [entry['fn'] for entry in entries])
+        self.assertEqual([1, 2, date(2021, 1, 1)], entries[0]['args'])
+        self.assertEqual({'end_date': date(2021, 1, 3), 'total_price': 100}, entries[0]['kwargs'])
+        self.assertEqual(ReturnValue.OK, entries[0]['result'])
+        self.assertTrue(same_result([(Apartment(2, 'a', 'c', 'k', 40.5), 7.25)], entries[1]['result']))
+        self.assertEqual('ValueError', entries[2]['error'])
+        self.assertTrue(entries[0]['t'] <= entries[1]['t'] <= entries[2]['t'])
+
+    def test_same_result(self) -> None:
+        self.assertTrue(same_result(2.0, 2))
+        self.assertFalse(same_result(ReturnValue.OK, ReturnValue.ALREADY_EXISTS))
+        self.assertFalse(same_result(Apartment(1, 'a', 'c', 'k', 10), Apartment(1, 'a', 'c', 'k', 20)),
+                         'unlike Apartment.__eq__ the size is compared')
+        self.assertFalse(same_result([Owner(1, 'a')], (Owner(1, 'a'),)))
+
+    def test_nested_calls_are_recorded_once(self) -> None:
+        trace = CallTrace()
+
+        @trace.recorded
+        def top_customers(k):
+            return [k]
+
+        @trace.recorded
+        def get_top_customer():
+            return top_customers(1)[0]
+
+        @trace.recorded
+        async def async_top_customers(k):
+            return [k]
+
+        @trace.recorded
+        async def async_get_top_customer():
+            return (await async_top_customers(1))[0]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.jsonl')
+            trace.start(path)
+            get_top_customer()
+            asyncio.run(async_get_top_customer())
+            top_customers(2)
+            trace.stop()
+            entries = list(load(path))
+        self.assertEqual(['get_top_customer', 'async_get_top_customer', 'top_customers'],
+                         [entry['fn'] for entry in entries])
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,51 @@
+import unittest
+from collections import defaultdict
+from Tools.DataGenerator import DataGenerator
+
+
+class Test(unittest.TestCase):
+    def setUp(self) -> None:
+        self.generator = DataGenerator(scale=0.02, seed=7, countries=3, cities=12)
+
+    def test_deterministic(self) -> None:
+        other = DataGenerator(scale=0.02, seed=7, countries=3, cities=12)
+        self.assertEqual(list(self.generator.reviews()), list(other.reviews()))
+        self.assertNotEqual(list(self.generator.reservations()),
+                            list(DataGenerator(scale=0.02, seed=8, countries=3, cities=12).reservations()))
+
+    def test_schema_constraints(self) -> None:
+        apartments = list(self.generator.apartments())
+        self.assertEqual(len(apartments), len({(a[1], a[2], a[3]) for a in apartments}), 'unique addresses')
+        self.assertTrue(all(a[4] > 0 for a in apartments))
+        self.assertLessEqual(len({a[3] for a in apartments}), 3)
+        owned = [apartment_id for _, apartment_id in self.generator.owns()]
+        self.assertEqual(len(owned), len(set(owned)), 'an apartment has at most one owner')
+
+    def test_reservations_do_not_overlap(self) -> None:
+        stays = defaultdict(list)
+        for customer_id, apartment_id, start, end, price in self.generator.reservations():
+            self.assertLess(start, end)
+            self.assertGreater(price, 0)
+            self.assertLessEqual(customer_id, self.generator.customer_count)
+            stays[apartment_id].append((start, end))
+        for apartment_stays in stays.values():
+            apartment_stays.sort()
+            for (_, end), (start, _) in zip(apartment_stays, apartment_stays[1:]):
+                self.assertLessEqual(end, start)
+
+    def test_reviews_follow_stays(self) -> None:
+        last_stay_end = {}
+        for customer_id, apartment_id, start, end, _ in self.generator.reservations():
+            last_stay_end[(customer_id, apartment_id)] = min(end, last_stay_end.get((customer_id, apartment_id), end))
+        reviews = list(self.generator.reviews())
+        self.assertGreater(len(reviews), 0)
+        self.assertEqual(len(reviews), len({(r[0], r[1]) for r in reviews}), 'one review per customer and apartment')
+        for customer_id, apartment_id, review_date, rating, text in reviews:
+            self.assertLessEqual(last_stay_end[(customer_id, apartment_id)], review_date)
+            self.assertTrue(1 <= rating <= 10)
+            self.assertTrue(text)
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
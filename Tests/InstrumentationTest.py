@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import unittest
+from psycopg2 import sql
+import Utility.DBConnector as Connector
+from Utility.Instrumentation import LatencyHistogram, QueryInstrumentation, instrumentation
+from Utility.Migrations import lock_statement
+from Utility.SlowQueryLog import SlowQueryLog, WriteCall
+from Tests.AbstractTest import database_only
+
+
+class Test(unittest.TestCase):
+    def test_percentiles(self) -> None:
+        histogram = LatencyHistogram()
+        for i in range(1, 101):
+            histogram.observe(i / 1000)
+        self.assertEqual(100, histogram.count)
+        self.assertLessEqual(histogram.percentile(0.50), histogram.percentile(0.95))
+        self.assertLessEqual(histogram.percentile(0.95), histogram.percentile(0.99))
+        self.assertAlmostEqual(0.050, histogram.percentile(0.50), delta=0.02)
+        self.assertAlmostEqual(0.099, histogram.percentile(0.99), delta=0.01)
+        self.assertEqual(0.1, histogram.percentile(1.0))
+
+    def test_hooks_and_dump(self) -> None:
+        instrumentation = QueryInstrumentation()
+        self.assertFalse(instrumentation.active)
+        seen = []
+        hook = instrumentation.add_hook(before=lambda e: seen.append(('before', e.name)),
+                                        after=lambda e: seen.append(('after', e.name, e.rows, e.error)))
+        instrumentation.enable_histograms()
+        event = instrumentation.start('get_owner', 'SELECT 1', None)
+        event.mark('execute')
+        event.mark('fetch')
+        event.rows = 1
+        instrumentation.finish(event)
+        failure = ValueError('boom')
+        event = instrumentation.start('add_owner', 'INSERT', None)
+        event.mark('execute')
+        instrumentation.finish(event, failure)
+        self.assertEqual([('before', 'get_owner'), ('after', 'get_owner', 1, None),
+                          ('before', 'add_owner'), ('after', 'add_owner', 0, failure)], seen)
+
+        snapshot = instrumentation.snapshot()
+        self.assertEqual({'execute', 'fetch', 'total'}, set(snapshot['get_owner']['phases']))
+        self.assertEqual(1, snapshot['add_owner']['errors'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'latency.json')
+            instrumentation.dump(path)
+            with open(path) as f:
+                self.assertEqual(1, json.load(f)['get_owner']['phases']['total']['count'])
+        prometheus = instrumentation.to_prometheus()
+        self.assertIn('db_query_duration_seconds_count{template="get_owner",phase="execute"} 1', prometheus)
+        self.assertIn('db_query_errors_total{template="add_owner"} 1', prometheus)
+
+        instrumentation.remove_hook(hook)
+        instrumentation.disable_histograms()
+        self.assertFalse(instrumentation.active)
+
+    def test_slow_query_log(self) -> None:
+        query = sql.SQL('SELECT * FROM Owner WHERE OwnerID = {owner_id}').format(owner_id=sql.Literal(3))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow.jsonl')
+            log = SlowQueryLog(threshold=0.5, path=path).enable()
+            try:
+                for duration in (0.1, 0.6):
+                    event = instrumentation.start('get_owner', query, None)
+                    event.phases['execute'] = duration
+                    instrumentation.finish(event)
+            finally:
+                log.disable()
+            self.assertEqual(1, len(log.entries), 'only statements over the threshold are logged')
+            self.assertEqual([3], log.entries[0]['params'])
+            self.assertEqual(0.6, log.entries[0]['duration'])
+            with open(path) as f:
+                self.assertEqual('get_owner', json.loads(f.readline())['template'])
+        self.assertFalse(instrumentation.active)
+
+    # the EXPLAIN re-run inside an open transaction is rolled back to a savepoint, keeping the work before it
+    @database_only
+    def test_explain_in_a_transaction(self) -> None:
+        conn = Connector.TransactionalDBConnector()
+        log = SlowQueryLog(threshold=0)
+        try:
+            conn.execute("CREATE TABLE ExplainProbe (ID INT)")
+            log.enable()
+            conn.execute("INSERT INTO ExplainProbe VALUES (1)")
+            conn.execute(sql.SQL("SELECT ID FROM ExplainProbe WHERE ID = {id}").format(id=sql.Literal(1)))
+            conn.execute(WriteCall([sql.SQL("WITH added AS (INSERT INTO ExplainProbe VALUES (2) RETURNING ID) "
+                                            "SELECT ID FROM added")]))
+            conn.execute(lock_statement("lock"))
+            conn.execute(lock_statement("unlock"))
+            log.disable()
+            _, result = conn.execute("SELECT ID FROM ExplainProbe ORDER BY ID")
+            self.assertEqual([1, 2], result["ID"], 'the EXPLAIN re-runs did not write or undo anything')
+            _, result = conn.execute("SELECT COUNT(*) AS Held FROM pg_locks "
+                                     "WHERE locktype = 'advisory' AND pid = pg_backend_pid()")
+            self.assertEqual(0, result[0]["Held"], 'the advisory lock was not taken twice')
+        finally:
+            log.disable()
+            conn.close_all()
+        self.assertEqual([None, 'Seq Scan', None, None, None],
+                         [entry['plan'] and entry['plan'][0]['Plan']['Node Type'] for entry in log.entries])
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,28 @@
+import unittest
+import Solution as Solution
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest, database_only
+
+from Business.Customer import Customer
+
+
+@database_only
+class Test(AbstractTest):
+    isolation = "rollback"
+
+    # the tests run in name order, the second one must not see what the first one added
+    def test_1_add(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(1, 'a1')))
+        self.assertEqual(ReturnValue.ALREADY_EXISTS, Solution.add_customer(Customer(1, 'a2')),
+                         'a failed call only rolls back its own savepoint')
+        self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(2, 'a2')))
+        self.assertEqual(Customer(1, 'a1'), Solution.get_customer(1))
+
+    def test_2_rolled_back(self) -> None:
+        self.assertEqual(Customer.bad_customer(), Solution.get_customer(1))
+        self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(1, 'b1')))
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
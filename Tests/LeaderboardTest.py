@@ -0,0 +1,68 @@
+import unittest
+from datetime import date
+import Solution as Solution
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest
+
+from Business.Apartment import Apartment
+from Business.Owner import Owner
+from Business.Customer import Customer
+
+
+class Test(AbstractTest):
+    def setUp(self) -> None:
+        super().setUp()
+        for i in range(1, 4):
+            self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(i, f'c{i}')))
+            self.assertEqual(ReturnValue.OK, Solution.add_apartment(Apartment(i, f'a{i}', 'Haifa', 'ISR', 50)))
+        self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(1, 'o1')))
+        self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(2, 'o2')))
+        self.assertEqual(ReturnValue.OK, Solution.owner_owns_apartment(1, 1))
+        self.assertEqual(ReturnValue.OK, Solution.owner_owns_apartment(1, 2))
+        self.assertEqual(ReturnValue.OK, Solution.owner_owns_apartment(2, 3))
+        reservations = [
+            (1, 1, date(2023, 1, 1), date(2023, 1, 3), 200),
+            (1, 2, date(2023, 1, 1), date(2023, 1, 5), 100),
+            (2, 3, date(2023, 1, 1), date(2023, 1, 2), 300),
+            (1, 3, date(2023, 2, 1), date(2023, 2, 3), 300),
+        ]
+        for reservation in reservations:
+            self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(*reservation))
+        reviews = [(1, 1, 8), (1, 2, 4), (2, 3, 6), (1, 3, 10)]
+        for customer_id, apartment_id, rating in reviews:
+            self.assertEqual(ReturnValue.OK, Solution.customer_reviewed_apartment(
+                customer_id, apartment_id, date(2023, 3, 1), rating, 'ok'))
+
+    def test_top_customers(self) -> None:
+        self.assertEqual([(Customer(1, 'c1'), 3), (Customer(2, 'c2'), 1)], Solution.top_customers(5),
+                         'customers without reservations are not ranked')
+        self.assertEqual([(Customer(1, 'c1'), 3)], Solution.top_customers(1))
+        self.assertEqual(Customer(1, 'c1'), Solution.get_top_customer())
+        self.assertEqual([], Solution.top_customers(0))
+        self.assertEqual(ReturnValue.OK, Solution.customer_cancelled_reservation(1, 1, date(2023, 1, 1)))
+        self.assertEqual(ReturnValue.OK, Solution.customer_cancelled_reservation(1, 2, date(2023, 1, 1)))
+        self.assertEqual(ReturnValue.OK, Solution.customer_cancelled_reservation(1, 3, date(2023, 2, 1)))
+        self.assertEqual([(Customer(2, 'c2'), 1)], Solution.top_customers(5), 'cancellations are counted')
+
+    def test_top_owners_by_rating(self) -> None:
+        self.assertEqual([(Owner(2, 'o2'), 8), (Owner(1, 'o1'), 6)], Solution.top_owners_by_rating(2))
+        self.assertEqual(ReturnValue.OK, Solution.customer_updated_review(1, 2, date(2023, 3, 2), 8, 'better'))
+        self.assertEqual([(Owner(1, 'o1'), 8), (Owner(2, 'o2'), 8)], Solution.top_owners_by_rating(2),
+                         'ties are broken by owner id')
+        self.assertEqual(ReturnValue.OK, Solution.owner_drops_apartment(1, 1))
+        self.assertEqual([(Owner(1, 'o1'), 8)], Solution.top_owners_by_rating(1))
+        self.assertEqual(ReturnValue.OK, Solution.delete_apartment(3))
+        self.assertEqual([(Owner(1, 'o1'), 8), (Owner(2, 'o2'), 0)], Solution.top_owners_by_rating(2),
+                         'owners without apartments are rated 0')
+
+    def test_best_value_apartments(self) -> None:
+        apartments = [apt.get_id() for apt, _ in Solution.best_value_apartments(3)]
+        self.assertEqual([2, 1, 3], apartments)
+        self.assertEqual(ReturnValue.OK, Solution.delete_customer(1))
+        apartments = [apt.get_id() for apt, _ in Solution.best_value_apartments(3)]
+        self.assertEqual([3], apartments, 'apartments without reservations have no value')
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,26 @@
+import unittest
+from Tools.LoadTest import PROFILES, Worker, parse_mix, report
+
+
+class Test(unittest.TestCase):
+    def test_parse_mix(self) -> None:
+        self.assertEqual({"reserve": 3, "cancel": 1}, parse_mix("reserve=3, cancel"))
+        for mix in PROFILES.values():
+            self.assertTrue(all(hasattr(Worker, operation) for operation in mix))
+
+    def test_report(self) -> None:
+        samples = [(0.5, "reserve", 0.010, "OK"), (1.5, "reserve", 0.030, "ALREADY_EXISTS"),
+                   (2.5, "apartment_rating", 0.002, "result"), (3.9, "reserve", 0.020, "OperationalError")]
+        result = report(samples, duration=4.0, interval=2.0)
+        self.assertEqual(4, result["total"]["calls"])
+        self.assertEqual(1.0, result["total"]["throughput"])
+        self.assertEqual({"OK": 1, "ALREADY_EXISTS": 1, "OperationalError": 1},
+                         result["operations"]["reserve"]["outcomes"])
+        self.assertEqual(0.030, result["operations"]["reserve"]["max"])
+        self.assertEqual([0.0, 2.0], [i["start"] for i in result["intervals"]])
+        self.assertEqual([2, 2], [i["calls"] for i in result["intervals"]])
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+import MemorySolution
+from Utility.CallTrace import call_trace, load
+from Utility.MemoryIndex import SortedIndex, IntervalIndex
+from Utility.ReturnValue import ReturnValue
+
+from Business.Apartment import Apartment
+from Business.Customer import Customer
+from Business.Owner import Owner
+
+
+class Test(unittest.TestCase):
+    def setUp(self) -> None:
+        MemorySolution.clear_tables()
+        self.assertEqual(ReturnValue.OK, MemorySolution.add_owner(Owner(1, 'o1')))
+        self.assertEqual(ReturnValue.OK, MemorySolution.add_customer(Customer(1, 'c1')))
+        self.assertEqual(ReturnValue.OK, MemorySolution.add_apartment(Apartment(1, 'a1', 'Haifa', 'Israel', 50)))
+        self.assertEqual(ReturnValue.OK, MemorySolution.owner_owns_apartment(1, 1))
+
+    def tearDown(self) -> None:
+        MemorySolution.clear_tables()
+
+    def test_indexes(self) -> None:
+        keys = SortedIndex([5, 1, 3])
+        keys.add(2)
+        keys.discard(5)
+        self.assertEqual([1, 2, 3], list(keys))
+        self.assertEqual([2, 3], keys.page(after=1))
+        self.assertEqual([1], keys.page(limit=1))
+
+        stays = IntervalIndex()
+        stays.add(date(2023, 1, 1), date(2023, 1, 5), 'a')
+        stays.add(date(2023, 1, 5), date(2023, 1, 5), 'empty')
+        stays.add(date(2023, 1, 5), date(2023, 1, 8), 'b')
+        self.assertEqual(['a', 'empty', 'b'], list(stays))
+        self.assertFalse(stays.overlaps(date(2023, 1, 8), date(2023, 1, 9)), 'the end date is not a night')
+        self.assertEqual(['a', 'empty', 'b'], stays.overlapping(date(2023, 1, 4), date(2023, 1, 6)))
+        self.assertEqual(['empty', 'b'], stays.starting(date(2023, 1, 5)))
+        stays.remove(date(2023, 1, 5), 'b')
+        self.assertEqual(['a', 'empty'], list(stays))
+
+    def test_constraints_follow_the_schema(self) -> None:
+        self.assertEqual(ReturnValue.ALREADY_EXISTS,
+                         MemorySolution.add_apartment(Apartment(2, 'a1', 'Haifa', 'Israel', 60)))
+        self.assertEqual(ReturnValue.OK, MemorySolution.customer_made_reservation(1, 1, date(2023, 1, 1),
+                                                                                  date(2023, 1, 5), 400))
+        self.assertEqual(ReturnValue.BAD_PARAMS, MemorySolution.customer_made_reservation(1, 1, date(2023, 1, 4),
+                                                                                          date(2023, 1, 6), 200))
+        self.assertEqual(ReturnValue.NOT_EXISTS, MemorySolution.customer_cancelled_reservation(1, 1, None),
+                         'no stay starts on NULL')
+        self.assertEqual(ReturnValue.NOT_EXISTS, MemorySolution.customer_made_reservation(2, 1, date(2023, 2, 1),
+                                                                                          date(2023, 2, 3), 200))
+        self.assertEqual(ReturnValue.NOT_EXISTS, MemorySolution.customer_reviewed_apartment(1, 1, date(2023, 1, 4),
+                                                                                            8, 'too early'))
+        self.assertEqual(ReturnValue.OK, MemorySolution.customer_reviewed_apartment(1, 1, date(2023, 1, 5), 8,
+                                                                                    'quiet rooms'))
+        self.assertEqual([(1, 1, date(2023, 1, 5), 8, 'quiet rooms', 2.0)],
+                         MemorySolution.search_reviews('quiet room'))
+
+        self.assertEqual(ReturnValue.OK, MemorySolution.delete_apartment(1))
+        self.assertEqual([], MemorySolution.get_owner_apartments(1))
+        self.assertEqual(Customer.bad_customer(), MemorySolution.get_top_customer())
+        self.assertEqual([], MemorySolution.search_reviews('quiet'))
+
+    def test_relocation_moves_the_indexes(self) -> None:
+        self.assertEqual([Owner(1, 'o1')], MemorySolution.get_all_location_owners())
+        self.assertEqual(ReturnValue.OK, MemorySolution.add_apartment(Apartment(2, 'a2', 'Paris', 'France', 60)))
+        self.assertEqual([], MemorySolution.get_all_location_owners())
+        apartment = MemorySolution.get_apartment(1)
+        apartment.set_city('Paris')
+        apartment.set_country('France')
+        self.assertEqual(ReturnValue.OK, MemorySolution.update_apartment(apartment))
+        self.assertEqual([Owner(1, 'o1')], MemorySolution.get_all_location_owners())
+
+    def test_one_trace_entry_per_call(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.jsonl')
+            call_trace.start(path)
+            try:
+                MemorySolution.get_top_customer()
+                MemorySolution.get_apartment_owner(1)
+                MemorySolution.best_value_for_money()
+            finally:
+                call_trace.stop()
+            self.assertEqual(['get_top_customer', 'get_apartment_owner', 'best_value_for_money'],
+                             [entry['fn'] for entry in load(path)])
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,73 @@
+import os
+import unittest
+from unittest import mock
+import Solution as Solution
+import Utility.DBConnector as Connector
+from Utility.Migrations import Migration, MigrationError, Migrator, index_name
+from Tests.AbstractTest import AbstractTest, database_only
+
+
+class MigrationTest(unittest.TestCase):
+    def test_checksum(self) -> None:
+        step = Migration(1, "owner", "\n    CREATE TABLE Owner (\n        OwnerID INT\n    );\n    ")
+        self.assertEqual(step.checksum, Migration(1, "owner", "CREATE TABLE Owner (\n    OwnerID INT\n);").checksum,
+                         'indentation is not significant')
+        self.assertNotEqual(step.checksum, Migration(1, "owner", "CREATE TABLE Owner ( OwnerID BIGINT );").checksum)
+        head = Migrator([step]).head()
+        self.assertTrue(head.startswith("1:"))
+        self.assertNotEqual(head, Migrator([step, Migration(2, "index", "CREATE INDEX ...")]).head())
+        with self.assertRaises(ValueError):
+            Migrator([Migration(2, "b", "SELECT 1"), Migration(1, "a", "SELECT 1")])
+
+    def test_index_name(self) -> None:
+        self.assertEqual("ownsowneridx",
+                         index_name("CREATE INDEX CONCURRENTLY IF NOT EXISTS OwnsOwnerIdx ON Owns (X)"))
+        self.assertEqual("probeidx", index_name("\n create unique index concurrently ProbeIdx ON Probe (ID)"))
+        self.assertIsNone(index_name("CREATE TABLE Probe (ID INT)"))
+
+
+@database_only
+class Test(AbstractTest):
+    isolation = "recreate"
+
+    def test_create_tables_is_idempotent(self) -> None:
+        Solution.create_tables()
+        conn = Connector.DBConnector()
+        try:
+            _, result = conn.execute("SELECT Version FROM SchemaVersion ORDER BY Version")
+            self.assertEqual([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12], result["Version"])
+            _, result = conn.execute("SELECT indisvalid FROM pg_index WHERE indexrelid = 'ownsowneridx'::regclass")
+            self.assertTrue(result[0]["indisvalid"])
+        finally:
+            conn.close()
+
+
+@database_only
+class ProbeTest(unittest.TestCase):
+    # runs its own steps in a schema of its own, so they do not mix with the SchemaVersion of Solution
+    def test_new_and_changed_steps(self) -> None:
+        admin = Connector.DBConnector()
+        admin.execute("DROP SCHEMA IF EXISTS migration_probe CASCADE; CREATE SCHEMA migration_probe")
+        try:
+            with mock.patch.dict(os.environ, {"SOLUTION_DB_SCHEMA": "migration_probe"}):
+                conn = Connector.DBConnector()
+                try:
+                    steps = [Migration(1, "a", "CREATE TABLE IF NOT EXISTS Probe (ID INT);")]
+                    self.assertEqual([1], Migrator(steps).migrate(conn))
+                    self.assertTrue(Migrator(steps).is_current(conn))
+                    steps.append(Migration(2, "b", ["CREATE INDEX CONCURRENTLY IF NOT EXISTS ProbeIdx ON Probe (ID)"],
+                                           concurrent=True))
+                    self.assertEqual([2], Migrator(steps).migrate(conn))
+                    self.assertEqual([], Migrator(steps).migrate(conn))
+                    with self.assertRaises(MigrationError):
+                        Migrator([Migration(1, "a", "CREATE TABLE Probe (ID BIGINT);")] + steps[1:]).migrate(conn)
+                finally:
+                    conn.close()
+        finally:
+            admin.execute("DROP SCHEMA migration_probe CASCADE")
+            admin.close()
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,61 @@
+import unittest
+from datetime import date, timedelta
+import Solution as Solution
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest
+
+from Business.Apartment import Apartment
+from Business.Customer import Customer
+
+
+class Test(AbstractTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(1, 'c1')))
+        self.assertEqual(ReturnValue.OK, Solution.add_apartment(Apartment(1, 'a1', 'Haifa', 'Israel', 50)))
+        self.assertEqual(ReturnValue.OK, Solution.add_apartment(Apartment(2, 'a2', 'Haifa', 'Israel', 60)))
+        self.assertEqual(ReturnValue.OK, Solution.add_apartment(Apartment(3, 'a3', 'Paris', 'France', 70)))
+
+    def reserve(self, apartment_id: int, start: date, nights: int, nightly_price: float) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(
+            1, apartment_id, start, start + timedelta(days=nights), nightly_price * nights))
+
+    def assertStats(self, expected: tuple, actual: tuple) -> None:
+        self.assertEqual(expected[0], actual[0])
+        for expected_value, actual_value in zip(expected[1:], actual[1:]):
+            self.assertAlmostEqual(expected_value, actual_value, delta=expected_value * 0.005)
+
+    def test_percentiles(self) -> None:
+        start = date(2023, 1, 1)
+        for i in range(100):
+            self.reserve(1 + i % 2, start + timedelta(days=3 * i), 2, 100 + i)
+        self.reserve(3, start, 1, 1000)
+        self.reserve(1, date(2024, 1, 1), 1, 500)
+        self.assertStats((100, 149.5, 149, 189, 198), Solution.nightly_price_stats('Israel', 'Haifa', 2023))
+        self.assertStats((1, 500, 500, 500, 500), Solution.nightly_price_stats('Israel', 'Haifa', 2024))
+        self.assertStats((1, 1000, 1000, 1000, 1000), Solution.nightly_price_stats('France', 'Paris', 2023))
+        self.assertEqual((0, None, None, None, None), Solution.nightly_price_stats('Israel', 'Eilat', 2023))
+
+    def test_histogram_follows_writes(self) -> None:
+        self.reserve(1, date(2023, 1, 1), 2, 100)
+        self.reserve(2, date(2023, 1, 1), 4, 200)
+        self.assertEqual(ReturnValue.OK, Solution.customer_cancelled_reservation(1, 1, date(2023, 1, 1)))
+        self.assertStats((1, 200, 200, 200, 200), Solution.nightly_price_stats('Israel', 'Haifa', 2023))
+
+        apartment = Solution.get_apartment(2)
+        apartment.set_city('Paris')
+        apartment.set_country('France')
+        self.assertEqual(ReturnValue.OK, Solution.update_apartment(apartment))
+        self.assertEqual(0, Solution.nightly_price_stats('Israel', 'Haifa', 2023)[0])
+        self.assertStats((1, 200, 200, 200, 200), Solution.nightly_price_stats('France', 'Paris', 2023))
+
+        self.reserve(3, date(2023, 5, 1), 1, 300)
+        self.assertEqual(ReturnValue.OK, Solution.delete_apartment(2))
+        self.assertStats((1, 300, 300, 300, 300), Solution.nightly_price_stats('France', 'Paris', 2023))
+        Solution.clear_tables()
+        self.assertEqual(0, Solution.nightly_price_stats('France', 'Paris', 2023)[0])
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,60 @@
+import unittest
+from datetime import date
+import Solution as Solution
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest
+
+from Business.Apartment import Apartment
+from Business.Customer import Customer
+from Business.Owner import Owner
+
+
+class Test(AbstractTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(1, 'o1')))
+        self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(1, 'c1')))
+        for apartment_id in (1, 2):
+            self.assertEqual(ReturnValue.OK, Solution.add_apartment(
+                Apartment(apartment_id, 'a%d' % apartment_id, 'Haifa', 'Israel', 50)))
+            self.assertEqual(ReturnValue.OK, Solution.owner_owns_apartment(1, apartment_id))
+
+    def test_stays_across_months(self) -> None:
+        # 1 night in January, 29 in February, 2 in March 2024
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(1, 1, date(2024, 1, 31), date(2024, 3, 3),
+                                                                            3200))
+        # New Year's Eve: 1 night in December 2023, 1 in January 2024
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(1, 1, date(2023, 12, 31),
+                                                                            date(2024, 1, 2), 200))
+        occupancy = dict(Solution.apartment_occupancy(1, 2024))
+        self.assertEqual(list(range(1, 13)), sorted(occupancy))
+        self.assertAlmostEqual(2 / 31, occupancy[1])
+        self.assertAlmostEqual(1.0, occupancy[2])
+        self.assertAlmostEqual(2 / 31, occupancy[3])
+        self.assertEqual(0.0, occupancy[4])
+        self.assertAlmostEqual(1 / 31, dict(Solution.apartment_occupancy(1, 2023))[12])
+
+        owner = dict(Solution.owner_occupancy(1, 2024))
+        self.assertAlmostEqual(2 / 62, owner[1])
+        self.assertAlmostEqual(29 / 58, owner[2])
+
+    def test_rollup_follows_writes(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(1, 2, date(2024, 4, 29), date(2024, 5, 2),
+                                                                            300))
+        self.assertAlmostEqual(2 / 30, dict(Solution.apartment_occupancy(2, 2024))[4])
+        self.assertEqual(ReturnValue.OK, Solution.customer_cancelled_reservation(1, 2, date(2024, 4, 29)))
+        self.assertEqual(0.0, dict(Solution.apartment_occupancy(2, 2024))[4])
+
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(1, 2, date(2024, 4, 1), date(2024, 4, 16),
+                                                                            300))
+        self.assertAlmostEqual(15 / 60, dict(Solution.owner_occupancy(1, 2024))[4])
+        self.assertEqual(ReturnValue.OK, Solution.owner_drops_apartment(1, 1))
+        self.assertAlmostEqual(0.5, dict(Solution.owner_occupancy(1, 2024))[4], msg='only owned apartments count')
+        self.assertEqual(ReturnValue.OK, Solution.delete_apartment(2))
+        self.assertEqual([], Solution.apartment_occupancy(2, 2024))
+        self.assertEqual([], Solution.owner_occupancy(1, 2024))
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,68 @@
+import unittest
+from datetime import date
+import Solution as Solution
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest
+
+from Business.Apartment import Apartment
+from Business.Customer import Customer
+from Business.Owner import Owner
+
+
+class Test(AbstractTest):
+    def setUp(self) -> None:
+        super().setUp()
+        for owner_id, name in ((1, 'b'), (2, 'a'), (3, 'c')):
+            self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(owner_id, name)))
+        for customer_id in (1, 2, 3):
+            self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(customer_id, 'c%d' % customer_id)))
+        for apartment_id in range(1, 8):
+            self.assertEqual(ReturnValue.OK, Solution.add_apartment(
+                Apartment(apartment_id, 'a%d' % apartment_id, 'Haifa' if apartment_id % 2 else 'Paris', 'X', 50)))
+            self.assertEqual(ReturnValue.OK, Solution.owner_owns_apartment(1 if apartment_id < 6 else 3,
+                                                                          apartment_id))
+        for customer_id in (1, 2):
+            for apartment_id in range(1, 8):
+                self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(
+                    customer_id, apartment_id, date(2023, customer_id, 1), date(2023, customer_id, 3), 100))
+                self.assertEqual(ReturnValue.OK, Solution.customer_reviewed_apartment(
+                    customer_id, apartment_id, date(2023, customer_id, 4), 4 + apartment_id % 5, 'ok'))
+
+    def pages(self, api, key, limit: int) -> list:
+        rows, after = [], None
+        while True:
+            page = api(limit=limit, after=after)
+            self.assertLessEqual(len(page), limit)
+            rows += page
+            if len(page) < limit:
+                return rows
+            after = key(page[-1])
+
+    def test_pages_add_up(self) -> None:
+        for limit in (1, 2, 3):
+            self.assertEqual(Solution.get_owner_apartments(1),
+                             self.pages(lambda **page: Solution.get_owner_apartments(1, **page),
+                                        Apartment.get_id, limit))
+            self.assertEqual(Solution.reservations_per_owner(),
+                             self.pages(Solution.reservations_per_owner, lambda row: row[0], limit))
+            self.assertEqual(Solution.get_all_location_owners(),
+                             self.pages(Solution.get_all_location_owners, Owner.get_owner_id, limit))
+            self.assertEqual(Solution.get_apartment_recommendation(3),
+                             self.pages(lambda **page: Solution.get_apartment_recommendation(3, **page),
+                                        lambda row: row[0].get_id(), limit))
+
+    def test_order_and_cursor(self) -> None:
+        self.assertEqual([1, 2, 3, 4, 5], [apartment.get_id() for apartment in Solution.get_owner_apartments(1)])
+        self.assertEqual([4, 5], [apartment.get_id() for apartment in Solution.get_owner_apartments(1, after=3)])
+        self.assertEqual([('a', 0), ('b', 10), ('c', 4)], Solution.reservations_per_owner())
+        self.assertEqual([('c', 4)], Solution.reservations_per_owner(after='b'))
+        self.assertEqual([Owner(1, 'b'), Owner(3, 'c')], Solution.get_all_location_owners())
+        self.assertEqual([(3, 'c')], Solution.get_all_location_owners(raw=True, after=1))
+        self.assertEqual([6, 7], [row[0] for row in Solution.get_apartment_recommendation(3, raw=True, after=5)])
+        self.assertEqual([], Solution.get_owner_apartments(1, limit=0))
+        self.assertEqual([], Solution.reservations_per_owner(limit=-1))
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
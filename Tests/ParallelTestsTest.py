@@ -0,0 +1,29 @@
+import os
+import unittest
+from unittest import mock
+import Utility.DBConnector as Connector
+from Tools.ParallelTests import discover, partition
+
+
+class Test(unittest.TestCase):
+    def test_partition(self) -> None:
+        modules = discover(["Tests/*Test.py"])
+        self.assertIn("Tests.SimpleTest", modules)
+        buckets = partition(modules, 3)
+        self.assertEqual(3, len(buckets))
+        scheduled = [module for bucket in buckets for module in bucket]
+        self.assertEqual(len(scheduled), len(set(scheduled)))
+        self.assertNotIn("Tests.AbstractTest", scheduled, 'modules without tests are not scheduled')
+        self.assertEqual([["Tests.QueryCacheTest"]], partition(["Tests.QueryCacheTest"], 4))
+
+    def test_worker_target(self) -> None:
+        with mock.patch.dict(os.environ, {"SOLUTION_DB_SCHEMA": "test_worker_1", "SOLUTION_DB_NAME": "cs236363_1"}):
+            params = Connector.DBConnector.connection_params()
+        self.assertEqual("-c search_path=test_worker_1", params["options"])
+        self.assertEqual("cs236363_1", params["database"])
+        self.assertNotIn("options", Connector.DBConnector.connection_params())
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
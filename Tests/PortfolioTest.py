@@ -0,0 +1,60 @@
+import unittest
+from datetime import date
+import Solution as Solution
+from Utility.Instrumentation import instrumentation
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest, database_only
+
+from Business.Apartment import Apartment
+from Business.Customer import Customer
+from Business.Owner import Owner
+
+
+class Test(AbstractTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(1, 'o1')))
+        self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(2, 'o2')))
+        self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(1, 'c1')))
+        self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(2, 'c2')))
+        for apartment_id in (1, 2, 3):
+            self.assertEqual(ReturnValue.OK, Solution.add_apartment(
+                Apartment(apartment_id, 'a%d' % apartment_id, 'Haifa', 'Israel', 40 + apartment_id)))
+            self.assertEqual(ReturnValue.OK, Solution.owner_owns_apartment(1 if apartment_id < 3 else 2,
+                                                                          apartment_id))
+        for customer_id, start, price in ((1, date(2023, 1, 1), 200), (2, date(2023, 2, 1), 350.5)):
+            self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(
+                customer_id, 1, start, date(start.year, start.month, 3), price))
+            self.assertEqual(ReturnValue.OK, Solution.customer_reviewed_apartment(
+                customer_id, 1, date(start.year, start.month, 4), 5 + customer_id, 'ok'))
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(1, 3, date(2023, 3, 1),
+                                                                            date(2023, 3, 2), 100))
+
+    @database_only
+    def test_portfolio(self) -> None:
+        queries = []
+        hook = instrumentation.add_hook(before=lambda event: queries.append(event.name))
+        try:
+            portfolio = Solution.get_owner_portfolio(1)
+        finally:
+            instrumentation.remove_hook(hook)
+        self.assertEqual(['get_owner_portfolio'], queries)
+        self.assertEqual(Owner(1, 'o1'), portfolio['owner'])
+        self.assertEqual([Apartment(1, 'a1', 'Haifa', 'Israel', 41), Apartment(2, 'a2', 'Haifa', 'Israel', 42)],
+                         [apartment for apartment, _, _, _ in portfolio['apartments']])
+        self.assertEqual([(6.5, 2, 550.5), (0.0, 0, 0.0)],
+                         [(rating, reservations, revenue) for _, rating, reservations, revenue in portfolio['apartments']])
+        self.assertAlmostEqual(float(Solution.get_owner_rating(1)), portfolio['rating'])
+        self.assertEqual(2, portfolio['reservations'])
+        self.assertAlmostEqual(550.5, portfolio['revenue'])
+
+    def test_owner_without_apartments(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(3, 'o3')))
+        self.assertEqual({'owner': Owner(3, 'o3'), 'apartments': [], 'rating': 0.0, 'reservations': 0,
+                          'revenue': 0.0}, Solution.get_owner_portfolio(3))
+        self.assertEqual(Owner.bad_owner(), Solution.get_owner_portfolio(4)['owner'])
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,72 @@
+import unittest
+from Utility.QueryCache import QueryCache
+
+
+class Test(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = QueryCache(max_entries=2, ttl=None, enabled=True)
+        self.reads = 0
+
+        @self.cache.cached("Review")
+        def get_rating(apartment_id):
+            self.reads += 1
+            return [apartment_id, self.reads]
+
+        @self.cache.invalidates("Review")
+        def add_review():
+            pass
+
+        self.get_rating = get_rating
+        self.add_review = add_review
+
+    def test_hit_and_invalidation(self) -> None:
+        self.assertEqual([1, 1], self.get_rating(1))
+        self.assertEqual([1, 1], self.get_rating(1), 'second read is served from the cache')
+        self.add_review()
+        self.assertEqual([1, 2], self.get_rating(1), 'a write to a dependent table invalidates the entry')
+        stats = self.cache.stats()
+        self.assertEqual((1, 2, 1), (stats["hits"], stats["misses"], stats["invalidations"]))
+
+    def test_lru_eviction(self) -> None:
+        self.get_rating(1)
+        self.get_rating(2)
+        self.get_rating(1)
+        self.get_rating(3)
+        self.assertEqual(1, self.cache.stats()["evictions"])
+        self.get_rating(1)
+        self.assertEqual(3, self.reads, 'the most recently used entry survives')
+        self.get_rating(2)
+        self.assertEqual(4, self.reads, 'the least recently used entry was evicted')
+
+    def test_results_are_copied(self) -> None:
+        self.get_rating(1).append('mutated')
+        self.assertEqual([1, 1], self.get_rating(1))
+
+    def test_failures_are_not_cached(self) -> None:
+        @self.cache.cached("Review")
+        def get_rating_or_error(apartment_id):
+            self.reads += 1
+            if self.reads == 1:
+                self.cache.failed()
+                return -1
+            return self.reads
+
+        @self.cache.cached("Review")
+        def get_ratings(apartment_id):
+            return [get_rating_or_error(apartment_id)]
+
+        self.assertEqual([-1], get_ratings(1))
+        self.assertEqual([2], get_ratings(1), 'neither the failed read nor the read using it was cached')
+        self.assertEqual([2], get_ratings(1))
+        self.assertEqual(2, self.reads)
+
+    def test_disabled(self) -> None:
+        self.cache.disable()
+        self.get_rating(1)
+        self.get_rating(1)
+        self.assertEqual(2, self.reads)
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,60 @@
+import unittest
+from datetime import date
+import Solution as Solution
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest
+
+from Business.Apartment import Apartment
+from Business.Owner import Owner
+from Business.Customer import Customer
+
+
+def fields(apartment: Apartment) -> tuple:
+    return (apartment.get_id(), apartment.get_address(), apartment.get_city(), apartment.get_country(),
+            apartment.get_size())
+
+
+class Test(AbstractTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(1, 'o1')))
+        for customer_id in (1, 2):
+            self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(customer_id, 'c%d' % customer_id)))
+        for apartment_id, city in ((1, 'Haifa'), (2, 'Tel Aviv')):
+            self.assertEqual(ReturnValue.OK, Solution.add_apartment(
+                Apartment(apartment_id, 'street %d' % apartment_id, city, 'Israel', 40 + apartment_id)))
+            self.assertEqual(ReturnValue.OK, Solution.owner_owns_apartment(1, apartment_id))
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(1, 1, date(2023, 1, 1), date(2023, 1, 3),
+                                                                            200))
+        self.assertEqual(ReturnValue.OK, Solution.customer_reviewed_apartment(1, 1, date(2023, 1, 4), 8, 'nice'))
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(2, 1, date(2023, 2, 1), date(2023, 2, 3),
+                                                                            300))
+        self.assertEqual(ReturnValue.OK, Solution.customer_reviewed_apartment(2, 1, date(2023, 2, 4), 6, 'ok'))
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(2, 2, date(2023, 2, 3), date(2023, 2, 5),
+                                                                            250))
+        self.assertEqual(ReturnValue.OK, Solution.customer_reviewed_apartment(2, 2, date(2023, 2, 5), 9, 'great'))
+
+    def test_raw_matches_objects(self) -> None:
+        apartments = Solution.get_owner_apartments(1)
+        self.assertEqual(2, len(apartments))
+        self.assertEqual(sorted(fields(a) for a in apartments), sorted(Solution.get_owner_apartments(1, raw=True)))
+        self.assertEqual([(o.get_owner_id(), o.get_owner_name()) for o in Solution.get_all_location_owners()],
+                         Solution.get_all_location_owners(raw=True))
+        self.assertEqual([fields(a) + (rating,) for a, rating in Solution.get_apartment_recommendation(1)],
+                         Solution.get_apartment_recommendation(1, raw=True))
+        self.assertEqual([(c.get_customer_id(), c.get_customer_name(), n) for c, n in Solution.top_customers(5)],
+                         Solution.top_customers(5, raw=True))
+        self.assertEqual([(o.get_owner_id(), o.get_owner_name(), r) for o, r in Solution.top_owners_by_rating(5)],
+                         Solution.top_owners_by_rating(5, raw=True))
+        self.assertEqual([fields(a) + (value,) for a, value in Solution.best_value_apartments(5)],
+                         Solution.best_value_apartments(5, raw=True))
+
+    def test_raw_rows_are_tuples(self) -> None:
+        for row in Solution.get_owner_apartments(1, raw=True):
+            self.assertIs(tuple, type(row))
+        self.assertEqual([], Solution.get_owner_apartments(2, raw=True))
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,53 @@
+import unittest
+from datetime import date
+import Solution as Solution
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest
+
+from Business.Apartment import Apartment
+from Business.Customer import Customer
+
+
+class Test(AbstractTest):
+    def setUp(self) -> None:
+        super().setUp()
+        for apartment_id in (1, 2):
+            self.assertEqual(ReturnValue.OK, Solution.add_apartment(
+                Apartment(apartment_id, 'street %d' % apartment_id, 'Haifa', 'Israel', 50)))
+        reviews = [(1, 1, 9, 'Great view, clean and quiet. Great host!'),
+                   (2, 1, 3, 'Noisy street and a broken heater'),
+                   (3, 2, 7, 'Clean apartment with a great view of the sea'),
+                   (4, 2, 5, None)]
+        for customer_id, apartment_id, rating, text in reviews:
+            self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(customer_id, 'c%d' % customer_id)))
+            self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(
+                customer_id, apartment_id, date(2023, customer_id, 1), date(2023, customer_id, 3), 100))
+            self.assertEqual(ReturnValue.OK, Solution.customer_reviewed_apartment(
+                customer_id, apartment_id, date(2023, customer_id, 4), rating, text))
+
+    def test_ranked_matches(self) -> None:
+        results = Solution.search_reviews('great view')
+        self.assertEqual([(1, 1), (3, 2)], [(row[0], row[1]) for row in results], 'two "great"s rank first')
+        self.assertEqual((1, 1, date(2023, 1, 4), 9, 'Great view, clean and quiet. Great host!'), results[0][:5])
+        self.assertGreater(results[0][5], results[1][5])
+        self.assertEqual([(2, 1)], [(row[0], row[1]) for row in Solution.search_reviews('heaters')], 'stemmed')
+        self.assertEqual([(2, 1)], [(row[0], row[1]) for row in Solution.search_reviews('"broken heater"')])
+        self.assertEqual([], Solution.search_reviews('"heater broken"'))
+        self.assertEqual([(3, 2)], [(row[0], row[1]) for row in Solution.search_reviews('clean -quiet')])
+
+    def test_filters(self) -> None:
+        self.assertEqual([(3, 2)], [(row[0], row[1]) for row in Solution.search_reviews('clean', apartment_id=2)])
+        self.assertEqual([(1, 1)], [(row[0], row[1]) for row in Solution.search_reviews('clean', min_rating=8)])
+        self.assertEqual(1, len(Solution.search_reviews('clean', limit=1)))
+        self.assertEqual([], Solution.search_reviews('clean', limit=0))
+        self.assertEqual([], Solution.search_reviews('  '))
+        self.assertEqual([], Solution.search_reviews('the'), 'stop words match nothing')
+
+    def test_updated_review_is_searchable(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.customer_updated_review(4, 2, date(2023, 4, 5), 6, 'Spacious'))
+        self.assertEqual([(4, 2)], [(row[0], row[1]) for row in Solution.search_reviews('spacious')])
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
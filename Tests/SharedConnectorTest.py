@@ -0,0 +1,51 @@
+import threading
+import unittest
+import Solution as Solution
+import Utility.DBConnector as Connector
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest, database_only
+
+from Business.Customer import Customer
+
+
+@database_only
+class Test(AbstractTest):
+    isolation = "recreate"
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.connector = Connector.SharedDBConnector(max_connections=3)
+        Solution.use_shared_connector(self.connector)
+
+    def tearDown(self) -> None:
+        Solution.use_shared_connector(None)
+        self.connector.close_all()
+        super().tearDown()
+
+    def test_threads_share_the_connector(self) -> None:
+        results = {}
+
+        def worker(first_id):
+            for customer_id in range(first_id, first_id + 10):
+                results[customer_id] = (Solution.add_customer(Customer(customer_id, f'c{customer_id}')),
+                                        Solution.add_customer(Customer(customer_id, 'duplicate')))
+
+        threads = [threading.Thread(target=worker, args=(i * 10 + 1,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual({i: (ReturnValue.OK, ReturnValue.ALREADY_EXISTS) for i in range(1, 81)}, results)
+        self.assertEqual(Customer(80, 'c80'), Solution.get_customer(80))
+
+    def test_nested_acquire(self) -> None:
+        outer = self.connector.acquire()
+        self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(1, 'a')))
+        rows, _ = outer.execute("SELECT * FROM Customer")
+        self.assertEqual(1, rows, 'the inner close() keeps the outer checkout open')
+        outer.close()
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,63 @@
+import unittest
+from datetime import date
+import Solution as Solution
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest
+
+from Business.Apartment import Apartment
+from Business.Owner import Owner
+from Business.Customer import Customer
+
+
+class Test(AbstractTest):
+    def test_dirty_fields(self) -> None:
+        apartment = Apartment(1, 'a', 'Haifa', 'ISR', 50)
+        self.assertEqual(set(), apartment.dirty_fields())
+        apartment.set_size(60)
+        apartment.set_city('Tel Aviv')
+        self.assertEqual({'size', 'city'}, apartment.dirty_fields())
+        self.assertEqual({'Size': 60, 'City': 'Tel Aviv'}, Solution.dirty_columns(
+            apartment, {'address': 'Address', 'city': 'City', 'size': 'Size'}))
+        self.assertIsNone(Solution.update_query('Apartment', 'ApartmentID', 1, {}))
+
+    def test_update_apartment_keeps_dependents(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.add_apartment(Apartment(1, 'a', 'Haifa', 'ISR', 50)))
+        self.assertEqual(ReturnValue.OK, Solution.add_apartment(Apartment(2, 'b', 'Haifa', 'ISR', 50)))
+        self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(1, 'c1')))
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(
+            1, 1, date(2021, 1, 1), date(2021, 1, 3), 100))
+        apartment = Solution.get_apartment(1)
+        self.assertEqual(ReturnValue.OK, Solution.update_apartment(apartment), 'nothing changed')
+        apartment.set_size(80)
+        self.assertEqual(ReturnValue.OK, Solution.update_apartment(apartment))
+        self.assertEqual(set(), apartment.dirty_fields())
+        self.assertEqual(80, Solution.get_apartment(1).get_size())
+        self.assertEqual(ReturnValue.OK, Solution.customer_cancelled_reservation(1, 1, date(2021, 1, 1)),
+                         'the reservation survived the update')
+
+        apartment.set_address('b')
+        self.assertEqual(ReturnValue.ALREADY_EXISTS, Solution.update_apartment(apartment))
+        apartment.set_address('a')
+        apartment.set_size(0)
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.update_apartment(apartment))
+        missing = Apartment(3, 'c', 'Haifa', 'ISR', 50)
+        missing.set_size(70)
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.update_apartment(missing))
+
+    def test_update_owner_and_customer(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(1, 'o1')))
+        owner = Solution.get_owner(1)
+        owner.set_owner_name('o2')
+        self.assertEqual(ReturnValue.OK, Solution.update_owner(owner))
+        self.assertEqual(Owner(1, 'o2'), Solution.get_owner(1))
+        owner.set_owner_name(None)
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.update_owner(owner))
+        customer = Customer(1, 'c1')
+        customer.set_customer_name('c2')
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.update_customer(customer))
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.update_customer(Customer(None, 'c')))
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
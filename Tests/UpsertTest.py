@@ -0,0 +1,53 @@
+import unittest
+import Solution as Solution
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest
+
+from Business.Apartment import Apartment
+from Business.Owner import Owner
+from Business.Customer import Customer
+
+
+class Test(AbstractTest):
+    def test_add_duplicates(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(1, 'o1')))
+        self.assertEqual(ReturnValue.ALREADY_EXISTS, Solution.add_owner(Owner(1, 'o2')))
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.add_owner(Owner(1, None)), 'NOT NULL is checked first')
+        self.assertEqual(Owner(1, 'o1'), Solution.get_owner(1))
+        self.assertEqual(ReturnValue.OK, Solution.add_apartment(Apartment(1, 'a', 'Haifa', 'ISR', 50)))
+        self.assertEqual(ReturnValue.ALREADY_EXISTS, Solution.add_apartment(Apartment(2, 'a', 'Haifa', 'ISR', 60)),
+                         'same address')
+        self.assertEqual(ReturnValue.OK, Solution.owner_owns_apartment(1, 1))
+        self.assertEqual(ReturnValue.ALREADY_EXISTS, Solution.owner_owns_apartment(2, 1))
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.owner_owns_apartment(2, 3))
+
+    def test_upserts(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.upsert_customer(Customer(1, 'c1')))
+        self.assertEqual(ReturnValue.OK, Solution.upsert_customer(Customer(1, 'c2')), 'an update')
+        self.assertEqual(Customer(1, 'c2'), Solution.get_customer(1))
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.upsert_customer(Customer(1, None)))
+
+        self.assertEqual(ReturnValue.OK, Solution.upsert_apartment(Apartment(1, 'a', 'Haifa', 'ISR', 50)))
+        self.assertEqual(ReturnValue.OK, Solution.upsert_apartment(Apartment(2, 'b', 'Haifa', 'ISR', 50)))
+        self.assertEqual(ReturnValue.OK, Solution.upsert_apartment(Apartment(1, 'a', 'Haifa', 'ISR', 70)))
+        self.assertEqual(70, Solution.get_apartment(1).get_size())
+        self.assertEqual(ReturnValue.ALREADY_EXISTS, Solution.upsert_apartment(Apartment(1, 'b', 'Haifa', 'ISR', 70)),
+                         'the address of apartment 2')
+        self.assertEqual(ReturnValue.ALREADY_EXISTS, Solution.upsert_apartment(Apartment(3, 'b', 'Haifa', 'ISR', 70)),
+                         'a new apartment at the address of apartment 2')
+        self.assertEqual(Apartment(1, 'a', 'Haifa', 'ISR', 70), Solution.get_apartment(1))
+        self.assertEqual(Apartment.bad_apartment(), Solution.get_apartment(3))
+
+        self.assertEqual(ReturnValue.OK, Solution.upsert_owner(Owner(1, 'o1')))
+        self.assertEqual(ReturnValue.OK, Solution.upsert_owner(Owner(2, 'o2')))
+        self.assertEqual(ReturnValue.OK, Solution.upsert_owner(Owner(2, 'o3')))
+        self.assertEqual(Owner(2, 'o3'), Solution.get_owner(2))
+        self.assertEqual(ReturnValue.OK, Solution.upsert_owns(1, 1))
+        self.assertEqual(ReturnValue.OK, Solution.upsert_owns(2, 1))
+        self.assertEqual(Owner(2, 'o3'), Solution.get_apartment_owner(1))
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.upsert_owns(3, 2))
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
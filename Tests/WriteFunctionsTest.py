@@ -0,0 +1,73 @@
+import unittest
+from datetime import date
+import Solution as Solution
+from Utility.Instrumentation import instrumentation
+from Utility.ReturnValue import ReturnValue
+from Tests.AbstractTest import AbstractTest, database_only
+
+from Business.Apartment import Apartment
+from Business.Owner import Owner
+from Business.Customer import Customer
+
+
+class Test(AbstractTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.assertEqual(ReturnValue.OK, Solution.add_owner(Owner(1, 'o1')))
+        self.assertEqual(ReturnValue.OK, Solution.add_customer(Customer(1, 'c1')))
+        self.assertEqual(ReturnValue.OK, Solution.add_apartment(Apartment(1, 'a', 'Haifa', 'ISR', 50)))
+
+    @database_only
+    def test_one_round_trip(self) -> None:
+        queries = []
+        hook = instrumentation.add_hook(before=lambda event: queries.append(event.name))
+        try:
+            self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(1, 1, date(2023, 1, 1),
+                                                                                date(2023, 1, 5), 400))
+            self.assertEqual(ReturnValue.OK, Solution.customer_reviewed_apartment(1, 1, date(2023, 1, 6), 8, 'ok'))
+            self.assertEqual(ReturnValue.OK, Solution.customer_cancelled_reservation(1, 1, date(2023, 1, 1)))
+            self.assertEqual(ReturnValue.OK, Solution.delete_customer(1))
+            self.assertEqual(ReturnValue.OK, Solution.delete_owner(1))
+        finally:
+            instrumentation.remove_hook(hook)
+        self.assertEqual(['customer_made_reservation', 'customer_reviewed_apartment',
+                          'customer_cancelled_reservation', 'delete_customer', 'delete_owner'], queries)
+
+    def test_status_codes(self) -> None:
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.delete_owner(0))
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.delete_owner(None))
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.delete_owner(2))
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.delete_customer(None))
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.delete_customer(2))
+
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.customer_made_reservation(-1, 1, date(2023, 1, 1),
+                                                                                    date(2023, 1, 5), 400))
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.customer_made_reservation(2, 1, date(2023, 1, 1),
+                                                                                    date(2023, 1, 5), 400))
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.customer_made_reservation(1, 1, date(2023, 1, 5),
+                                                                                    date(2023, 1, 1), 400))
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.customer_made_reservation(1, 1, date(2023, 1, 1),
+                                                                                    date(2023, 1, 5), 0))
+        self.assertEqual(ReturnValue.OK, Solution.customer_made_reservation(1, 1, date(2023, 1, 1),
+                                                                            date(2023, 1, 5), 400))
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.customer_made_reservation(1, 1, date(2023, 1, 4),
+                                                                                    date(2023, 1, 8), 400),
+                         'overlapping stay')
+
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.customer_reviewed_apartment(1, 1, date(2023, 1, 3), 8, 'x'),
+                         'the stay has not ended yet')
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.customer_reviewed_apartment(1, 1, date(2023, 1, 3), 11, 'x'))
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.customer_reviewed_apartment(1, 1, date(2023, 1, 6), 0, 'x'))
+        self.assertEqual(ReturnValue.OK, Solution.customer_reviewed_apartment(1, 1, date(2023, 1, 6), 8, 'x'))
+        self.assertEqual(ReturnValue.ALREADY_EXISTS,
+                         Solution.customer_reviewed_apartment(1, 1, date(2023, 1, 7), 9, 'y'))
+
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.customer_cancelled_reservation(1, 0, date(2023, 1, 1)))
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.customer_cancelled_reservation(1, 1, date(2023, 1, 2)))
+        self.assertEqual(ReturnValue.OK, Solution.customer_cancelled_reservation(1, 1, date(2023, 1, 1)))
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.customer_cancelled_reservation(1, 1, date(2023, 1, 1)))
+
+
+# *** DO NOT RUN EACH TEST MANUALLY ***
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
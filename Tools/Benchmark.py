@@ -0,0 +1,235 @@
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+from psycopg2 import sql
+
+import Solution
+from Business.Apartment import Apartment
+from Business.Customer import Customer
+from Business.Owner import Owner
+from Tools.DataGenerator import NEGATIVE_WORDS, POSITIVE_WORDS, DataGenerator, copy_into_database
+
+# latency and throughput of every Solution API at one or more data scales.
+#
+#   python -m Tools.Benchmark --scales 0.1 1 --out results.json
+#   python -m Tools.Benchmark --scales 0.1 1 --baseline results.json      (exit code 1 on regressions)
+#
+# for every scale the schema is recreated and loaded with Tools.DataGenerator, then each API is called with
+# arguments drawn from the generated id ranges. writes only touch ids above the generated ones and are undone
+# by the matching delete/cancel case, so the dataset is the same for every read case of a run.
+
+
+class Case:
+    def __init__(self, name: str, category: str, call: Callable[[int], object]):
+        self.name = name
+        self.category = category
+        self.call = call
+
+
+class Benchmark:
+    def __init__(self, generator: DataGenerator, iterations: int = 200, budget: float = 10.0, seed: int = 0):
+        self.generator = generator
+        self.iterations = iterations
+        self.budget = budget
+        self.rng = random.Random(seed)
+        self.owners = {}
+
+    def __owner(self) -> int:
+        return self.rng.randint(1, self.generator.owner_count)
+
+    def __customer(self) -> int:
+        return self.rng.randint(1, self.generator.customer_count)
+
+    def __apartment(self) -> int:
+        return self.rng.randint(1, self.generator.apartment_count)
+
+    def __review_word(self) -> str:
+        return self.rng.choice(POSITIVE_WORDS + NEGATIVE_WORDS)
+
+    # what search_reviews replaces: a substring scan of every review text
+    @staticmethod
+    def __ilike_reviews(text: str, limit: int = 20) -> list:
+        conn = Solution.connect()
+        try:
+            _, rows = conn.execute(sql.SQL(
+                "SELECT CustomerID, ApartmentID, ReviewDate, Rating, ReviewText FROM Review "
+                "WHERE ReviewText ILIKE {pattern} LIMIT {limit}").format(
+                pattern=sql.Literal("%" + text + "%"), limit=sql.Literal(limit)), raw=True)
+            return rows
+        finally:
+            conn.close()
+
+    # cases run in this order, each write case is paired with one that undoes it
+    def cases(self) -> List[Case]:
+        g = self.generator
+        new_owner = g.owner_count + 1
+        new_customer = g.customer_count + 1
+        new_apartment = g.apartment_count + 1
+        # the reservation and review cases use the apartments added by add_apartment, one night far after the
+        # generated stays, and are undone by cancel / delete_apartment / delete_customer
+        stay = lambda i: date(2100, 1, 1) + timedelta(days=2 * i)
+        return [
+            Case("add_owner", "CRUD", lambda i: Solution.add_owner(Owner(new_owner + i, "Benchmark"))),
+            Case("get_owner", "CRUD", lambda i: Solution.get_owner(self.__owner())),
+            Case("delete_owner", "CRUD", lambda i: Solution.delete_owner(new_owner + i)),
+            Case("add_customer", "CRUD", lambda i: Solution.add_customer(Customer(new_customer + i, "Benchmark"))),
+            Case("get_customer", "CRUD", lambda i: Solution.get_customer(self.__customer())),
+            Case("add_apartment", "CRUD", lambda i: Solution.add_apartment(
+                Apartment(new_apartment + i, "%d Benchmark Road" % i, "Benchmark", "Benchmark", 50))),
+            Case("get_apartment", "CRUD", lambda i: Solution.get_apartment(self.__apartment())),
+            Case("owner_owns_apartment", "CRUD", lambda i: Solution.owner_owns_apartment(
+                self.owners.setdefault(i, self.__owner()), new_apartment + i)),
+            Case("get_apartment_owner", "CRUD", lambda i: Solution.get_apartment_owner(self.__apartment())),
+            Case("get_owner_apartments", "CRUD", lambda i: Solution.get_owner_apartments(self.__owner())),
+            Case("owner_drops_apartment", "CRUD", lambda i: Solution.owner_drops_apartment(
+                self.owners.pop(i), new_apartment + i)),
+            Case("customer_made_reservation", "CRUD", lambda i: Solution.customer_made_reservation(
+                new_customer + i, new_apartment + i, stay(i), stay(i) + timedelta(days=1), 100)),
+            Case("customer_reviewed_apartment", "CRUD", lambda i: Solution.customer_reviewed_apartment(
+                new_customer + i, new_apartment + i, date(2200, 1, 1), 7, "Benchmark review")),
+            Case("customer_updated_review", "CRUD", lambda i: Solution.customer_updated_review(
+                new_customer + i, new_apartment + i, date(2200, 1, 2), 8, "Updated benchmark review")),
+            Case("customer_cancelled_reservation", "CRUD", lambda i: Solution.customer_cancelled_reservation(
+                new_customer + i, new_apartment + i, stay(i))),
+            Case("delete_apartment", "CRUD", lambda i: Solution.delete_apartment(new_apartment + i)),
+            Case("delete_customer", "CRUD", lambda i: Solution.delete_customer(new_customer + i)),
+            Case("get_apartment_rating", "BASIC", lambda i: Solution.get_apartment_rating(self.__apartment())),
+            Case("get_owner_rating", "BASIC", lambda i: Solution.get_owner_rating(self.__owner())),
+            Case("get_top_customer", "BASIC", lambda i: Solution.get_top_customer()),
+            Case("reservations_per_owner", "BASIC", lambda i: Solution.reservations_per_owner()),
+            Case("get_all_location_owners", "ADVANCED", lambda i: Solution.get_all_location_owners()),
+            Case("best_value_for_money", "ADVANCED", lambda i: Solution.best_value_for_money()),
+            Case("profit_per_month", "ADVANCED", lambda i: Solution.profit_per_month(
+                self.generator.start.year + i % 3)),
+            Case("get_apartment_recommendation", "ADVANCED", lambda i: Solution.get_apartment_recommendation(
+                self.__customer())),
+            Case("top_customers", "LEADERBOARD", lambda i: Solution.top_customers(10)),
+            Case("top_owners_by_rating", "LEADERBOARD", lambda i: Solution.top_owners_by_rating(10)),
+            Case("best_value_apartments", "LEADERBOARD", lambda i: Solution.best_value_apartments(10)),
+            Case("search_reviews", "SEARCH", lambda i: Solution.search_reviews(self.__review_word())),
+            Case("search_reviews_ilike", "SEARCH", lambda i: self.__ilike_reviews(self.__review_word())),
+        ]
+
+    # runs the case `iterations` times, or fewer if a read case runs out of its time budget (write cases are
+    # paired by index, so they always run every iteration)
+    def run_case(self, case: Case, iterations: int) -> dict:
+        latencies = []
+        started = time.perf_counter()
+        for i in range(iterations):
+            before = time.perf_counter()
+            case.call(i)
+            latencies.append(time.perf_counter() - before)
+            if before - started > self.budget and case.category != "CRUD":
+                break
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return {
+            "category": case.category,
+            "calls": len(latencies),
+            "mean": sum(latencies) / len(latencies),
+            "p50": _percentile(latencies, 0.50),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+            "throughput": len(latencies) / elapsed if elapsed > 0 else None,
+        }
+
+    def run(self, names: Optional[List[str]] = None) -> Dict[str, dict]:
+        Solution.query_cache.disable()
+        results = {}
+        for case in self.cases():
+            if names and case.name not in names:
+                continue
+            results[case.name] = self.run_case(case, self.iterations)
+            print("%-32s %8.2f ms p50 %8.2f ms p95 %10.1f calls/s" % (
+                case.name, results[case.name]["p50"] * 1000, results[case.name]["p95"] * 1000,
+                results[case.name]["throughput"] or 0), file=sys.stderr)
+        return results
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def load(generator: DataGenerator) -> None:
+    try:
+        Solution.drop_tables()
+    except Exception:
+        pass
+    Solution.create_tables()
+    copy_into_database(generator)
+
+
+# one entry for every p50/p95 that got slower than the baseline by more than
+# `tolerance` (relative) and `min_delta` seconds (absolute, to ignore noise on sub-millisecond calls)
+def compare(baseline: dict, current: dict, tolerance: float = 0.2, min_delta: float = 0.0005) -> List[dict]:
+    regressions = []
+    for scale, cases in current["results"].items():
+        for name, result in cases.items():
+            old = baseline.get("results", {}).get(scale, {}).get(name)
+            if old is None:
+                continue
+            for metric in ("p50", "p95"):
+                if result[metric] > old[metric] * (1 + tolerance) and result[metric] - old[metric] > min_delta:
+                    regressions.append({"scale": scale, "case": name, "metric": metric,
+                                        "baseline": old[metric], "current": result[metric],
+                                        "ratio": result[metric] / old[metric] if old[metric] else None})
+    return regressions
+
+
+def _revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every Solution API at several data scales.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.1, 1.0])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=200, help="calls per API")
+    parser.add_argument("--budget", type=float, default=10.0, help="seconds per read API before it stops early")
+    parser.add_argument("--cases", nargs="+", help="only run these APIs")
+    parser.add_argument("--no-load", action="store_true", help="benchmark the data already in the database")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": _revision(), "seed": args.seed,
+                 "iterations": args.iterations},
+        "results": {},
+    }
+    for scale in args.scales:
+        generator = DataGenerator(scale=scale, seed=args.seed)
+        if not args.no_load:
+            print("loading scale %g" % scale, file=sys.stderr)
+            load(generator)
+        benchmark = Benchmark(generator, args.iterations, args.budget, args.seed)
+        results["results"]["%g" % scale] = benchmark.run(args.cases)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for r in regressions:
+            print("REGRESSION scale %s %-32s %s %.2f ms -> %.2f ms" % (
+                r["scale"], r["case"], r["metric"], r["baseline"] * 1000, r["current"] * 1000), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import argparse
+import csv
+import io
+import math
+import os
+import random
+import sys
+from datetime import date, timedelta
+from typing import Iterator, List, Tuple
+
+import Utility.DBConnector as Connector
+
+# deterministic synthetic data for the rental schema (Owner, Customer, Apartment, Owns, Reservation, Review).
+# every table is streamed, nothing proportional to the data size is kept in memory, and everything an apartment
+# produces (its reservations and reviews) is drawn from a generator seeded by (seed, apartment id), so the same
+# seed and parameters always give the same rows regardless of which tables are generated.
+#
+#   python -m Tools.DataGenerator --scale 1 --seed 42 --out data/      (CSV files, one per table)
+#   python -m Tools.DataGenerator --scale 10 --copy                    (COPY into the database in database.ini)
+#
+# scale 1 is about 1k owners, 10k customers, 5k apartments, 500k reservations and 200k reviews over 3 years.
+
+TABLES = ("Owner", "Customer", "Apartment", "Owns", "Reservation", "Review")
+
+COLUMNS = {
+    "Owner": ("OwnerID", "Name"),
+    "Customer": ("CustomerID", "Name"),
+    "Apartment": ("ApartmentID", "Address", "City", "Country", "Size"),
+    "Owns": ("OwnerID", "ApartmentID"),
+    "Reservation": ("CustomerID", "ApartmentID", "StartDate", "EndDate", "Price"),
+    "Review": ("CustomerID", "ApartmentID", "ReviewDate", "Rating", "ReviewText"),
+}
+
+# stay lengths in nights and how common they are: weekend trips, long weekends, weeks, two weeks, a month
+STAY_NIGHTS = (1, 2, 3, 4, 5, 6, 7, 10, 14, 21, 28)
+STAY_WEIGHTS = (6, 18, 16, 10, 7, 5, 12, 5, 4, 1, 1)
+
+# seasonal demand per month, a higher weight shortens the gap before the next stay
+SEASON = (0.7, 0.7, 0.8, 0.9, 1.0, 1.2, 1.5, 1.5, 1.1, 0.9, 0.8, 1.0)
+
+POSITIVE_WORDS = ("great", "clean", "cozy", "spacious", "quiet", "friendly host", "amazing view", "comfortable bed",
+                  "central location", "well equipped kitchen", "fast wifi", "easy check-in")
+NEGATIVE_WORDS = ("noisy", "dirty", "small", "broken heater", "no hot water", "far from everything",
+                  "smelly", "uncomfortable bed", "slow wifi", "rude host", "thin walls", "hard to find")
+
+
+class DataGenerator:
+    def __init__(self, scale: float = 1.0, seed: int = 42, countries: int = 10, cities: int = 100,
+                 start: date = date(2021, 1, 1), years: int = 3, review_rate: float = 0.4):
+        self.scale = scale
+        self.seed = seed
+        self.countries = countries
+        self.cities = max(cities, countries)
+        self.start = start
+        self.end = date(start.year + years, start.month, start.day)
+        self.review_rate = review_rate
+        self.owner_count = max(1, int(1000 * scale))
+        self.customer_count = max(1, int(10000 * scale))
+        self.apartment_count = max(1, int(5000 * scale))
+        # zipf-like weights: a few big cities hold most of the apartments
+        self.__city_weights = _cumulative([1 / (i + 1) for i in range(self.cities)])
+
+    def __rng(self, *key) -> random.Random:
+        return random.Random("%s:%s" % (self.seed, ":".join(str(k) for k in key)))
+
+    def city_of(self, city: int) -> Tuple[str, str]:
+        return "City%d" % city, "Country%d" % (city % self.countries)
+
+    def owners(self) -> Iterator[tuple]:
+        for owner_id in range(1, self.owner_count + 1):
+            yield owner_id, "Owner %d" % owner_id
+
+    def customers(self) -> Iterator[tuple]:
+        for customer_id in range(1, self.customer_count + 1):
+            yield customer_id, "Customer %d" % customer_id
+
+    def __apartment(self, apartment_id: int):
+        rng = self.__rng("apartment", apartment_id)
+        city = _pick(rng, self.__city_weights)
+        size = max(15, int(rng.lognormvariate(4.2, 0.45)))
+        # the nightly price depends on the city (bigger cities are pricier) and the size
+        base_price = 40 * (1 + 2 / math.sqrt(city + 1)) * (size / 60) ** 0.7 * rng.uniform(0.7, 1.4)
+        popularity = rng.lognormvariate(0, 0.6)
+        quality = min(10.0, max(1.0, rng.gauss(7, 1.5)))
+        return rng, city, size, base_price, popularity, quality
+
+    def apartments(self) -> Iterator[tuple]:
+        for apartment_id in range(1, self.apartment_count + 1):
+            _, city, size, _, _, _ = self.__apartment(apartment_id)
+            city_name, country = self.city_of(city)
+            yield apartment_id, "%d Main Street" % apartment_id, city_name, country, size
+
+    def owns(self) -> Iterator[tuple]:
+        for apartment_id in range(1, self.apartment_count + 1):
+            rng = self.__rng("owns", apartment_id)
+            # about 10% of the apartments have no owner, owners with small ids own more apartments
+            if rng.random() < 0.9:
+                yield int(self.owner_count * rng.random() ** 2) + 1, apartment_id
+
+    def __stays(self, apartment_id: int) -> Iterator[tuple]:
+        rng, _, _, base_price, popularity, quality = self.__apartment(apartment_id)
+        day = self.start + timedelta(days=int(rng.expovariate(1 / 20)))
+        while True:
+            nights = rng.choices(STAY_NIGHTS, STAY_WEIGHTS)[0]
+            end = day + timedelta(days=nights)
+            if end > self.end:
+                return
+            customer_id = int(self.customer_count * rng.random() ** 1.5) + 1
+            price = round(base_price * nights * rng.uniform(0.85, 1.2) * (0.9 if nights >= 7 else 1.0), 2)
+            yield rng, customer_id, day, end, price, quality
+            gap = rng.expovariate(popularity * SEASON[end.month - 1] / 6)
+            day = end + timedelta(days=int(gap))
+
+    def reservations(self) -> Iterator[tuple]:
+        for apartment_id in range(1, self.apartment_count + 1):
+            for _, customer_id, start, end, price, _ in self.__stays(apartment_id):
+                yield customer_id, apartment_id, start, end, price
+
+    # a customer reviews an apartment at most once, after (or on the last day of) one of their stays there
+    def reviews(self) -> Iterator[tuple]:
+        for apartment_id in range(1, self.apartment_count + 1):
+            reviewed = set()
+            review_rng = self.__rng("review", apartment_id)
+            for _, customer_id, _, end, _, quality in self.__stays(apartment_id):
+                if customer_id in reviewed or review_rng.random() >= self.review_rate:
+                    continue
+                reviewed.add(customer_id)
+                review_date = end + timedelta(days=int(review_rng.expovariate(1 / 4)))
+                rating = min(10, max(1, int(round(review_rng.gauss(quality, 1.5)))))
+                yield customer_id, apartment_id, review_date, rating, _review_text(review_rng, rating)
+
+    def rows(self, table: str) -> Iterator[tuple]:
+        return {
+            "Owner": self.owners,
+            "Customer": self.customers,
+            "Apartment": self.apartments,
+            "Owns": self.owns,
+            "Reservation": self.reservations,
+            "Review": self.reviews,
+        }[table]()
+
+
+def _cumulative(weights: List[float]) -> List[float]:
+    total = sum(weights)
+    cumulative, running = [], 0.0
+    for weight in weights:
+        running += weight / total
+        cumulative.append(running)
+    return cumulative
+
+
+def _pick(rng: random.Random, cumulative: List[float]) -> int:
+    x = rng.random()
+    low, high = 0, len(cumulative) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if cumulative[middle] < x:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _review_text(rng: random.Random, rating: int) -> str:
+    words = POSITIVE_WORDS if rating >= 6 else NEGATIVE_WORDS
+    return ", ".join(rng.sample(words, rng.randint(1, 3))).capitalize() + "."
+
+
+def write_csv(generator: DataGenerator, directory: str, tables=TABLES) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for table in tables:
+        with open(os.path.join(directory, table.lower() + ".csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS[table])
+            writer.writerows(generator.rows(table))
+
+
+# loads the tables with COPY in chunks, committing after every chunk so the stats and NOTIFY triggers of
+# create_tables never queue more than chunk_rows rows of work in one transaction
+def copy_into_database(generator: DataGenerator, tables=TABLES, chunk_rows: int = 100000) -> None:
+    conn = Connector.DBConnector()
+    try:
+        for table in tables:
+            copy = "COPY %s (%s) FROM STDIN WITH (FORMAT csv)" % (table, ", ".join(COLUMNS[table]))
+            buffer, pending = io.StringIO(), 0
+            writer = csv.writer(buffer)
+            for row in generator.rows(table):
+                writer.writerow(row)
+                pending += 1
+                if pending == chunk_rows:
+                    _flush(conn, copy, buffer)
+                    buffer, pending = io.StringIO(), 0
+                    writer = csv.writer(buffer)
+            if pending:
+                _flush(conn, copy, buffer)
+    finally:
+        conn.close()
+
+
+def _flush(conn, copy: str, buffer: io.StringIO) -> None:
+    buffer.seek(0)
+    conn.cursor.copy_expert(copy, buffer)
+    conn.commit()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic data for the rental schema.")
+    parser.add_argument("--scale", type=float, default=1.0, help="scale factor, 1 is about 720k rows in total")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--countries", type=int, default=10)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2021, 1, 1), help="first reservation date")
+    parser.add_argument("--years", type=int, default=3, help="years of reservations")
+    parser.add_argument("--review-rate", type=float, default=0.4, help="share of stays that get reviewed")
+    parser.add_argument("--tables", nargs="+", choices=TABLES, default=TABLES)
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--out", help="directory to write one CSV file per table to")
+    output.add_argument("--copy", action="store_true", help="COPY the rows into the database (tables must exist)")
+    args = parser.parse_args(argv)
+
+    generator = DataGenerator(args.scale, args.seed, args.countries, args.cities, args.start, args.years,
+                              args.review_rate)
+    if args.copy:
+        copy_into_database(generator, args.tables)
+    else:
+        write_csv(generator, args.out, args.tables)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
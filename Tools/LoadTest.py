@@ -0,0 +1,248 @@
+import argparse
+import collections
+import json
+import multiprocessing
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+import Solution
+import Utility.DBConnector as Connector
+from Tools.Benchmark import _percentile
+from Tools.DataGenerator import DataGenerator
+from Utility.ReturnValue import ReturnValue
+
+# concurrent mixed workload against the database in database.ini, loaded with Tools.DataGenerator at --scale.
+#
+#   python -m Tools.LoadTest --scale 1 --workers 16 --duration 60 --profile booking
+#   python -m Tools.LoadTest --workers 8 --processes --mix reserve=50,apartment_rating=50 --out load.json
+#
+# every worker picks operations by weight from the mix and records (time, operation, latency, outcome) for every
+# call, the outcome being the ReturnValue name, "result" for reads or the exception type. the report has the
+# throughput, latency percentiles and outcome counts per operation, overall and per --interval of the run.
+# bookings all fall in one year after the generated data and pick from few apartments, so workers compete for
+# the same date ranges (the overlap check of customer_made_reservation) and the same rows.
+
+PROFILES = {
+    "booking": {"reserve": 40, "cancel": 10, "review": 10, "apartment_rating": 25, "owner_rating": 10,
+                "analytics": 5},
+    "read_heavy": {"reserve": 5, "cancel": 2, "review": 3, "apartment_rating": 40, "owner_rating": 30,
+                   "apartment_owner": 15, "analytics": 5},
+    "write_heavy": {"reserve": 50, "cancel": 25, "review": 20, "apartment_rating": 5},
+    "analytics": {"analytics": 60, "leaderboard": 30, "reserve": 10},
+}
+
+ANALYTICS = (
+    lambda: Solution.reservations_per_owner(),
+    lambda: Solution.get_all_location_owners(),
+    lambda: Solution.best_value_for_money(),
+    lambda: Solution.profit_per_month(2022),
+    lambda: Solution.get_top_customer(),
+)
+
+LEADERBOARD = (
+    lambda: Solution.top_customers(10),
+    lambda: Solution.top_owners_by_rating(10),
+    lambda: Solution.best_value_apartments(10),
+)
+
+BOOKING_YEAR = date(2100, 1, 1)
+
+
+class Worker:
+    # one worker's random stream and the reservations it made, so cancellations and reviews target them
+    def __init__(self, generator: DataGenerator, worker_id: int, seed: int, hot_apartments: int):
+        self.generator = generator
+        self.rng = random.Random("%s:%s" % (seed, worker_id))
+        self.hot_apartments = max(1, min(hot_apartments, generator.apartment_count))
+        self.reservations = []
+
+    def __customer(self) -> int:
+        return self.rng.randint(1, self.generator.customer_count)
+
+    def __apartment(self) -> int:
+        return self.rng.randint(1, self.generator.apartment_count)
+
+    def reserve(self):
+        customer_id, apartment_id = self.__customer(), self.rng.randint(1, self.hot_apartments)
+        start = BOOKING_YEAR + timedelta(days=self.rng.randint(0, 364))
+        end = start + timedelta(days=self.rng.randint(1, 7))
+        result = Solution.customer_made_reservation(customer_id, apartment_id, start, end, 100.0)
+        if result == ReturnValue.OK:
+            self.reservations.append((customer_id, apartment_id, start, end))
+        return result
+
+    def cancel(self):
+        if not self.reservations:
+            return self.reserve()
+        customer_id, apartment_id, start, _ = self.reservations.pop(self.rng.randrange(len(self.reservations)))
+        return Solution.customer_cancelled_reservation(customer_id, apartment_id, start)
+
+    def review(self):
+        if not self.reservations:
+            return self.reserve()
+        customer_id, apartment_id, _, end = self.rng.choice(self.reservations)
+        return Solution.customer_reviewed_apartment(customer_id, apartment_id, end + timedelta(days=1),
+                                                    self.rng.randint(1, 10), "Load test review")
+
+    def apartment_rating(self):
+        return Solution.get_apartment_rating(self.__apartment())
+
+    def owner_rating(self):
+        return Solution.get_owner_rating(self.rng.randint(1, self.generator.owner_count))
+
+    def apartment_owner(self):
+        return Solution.get_apartment_owner(self.__apartment())
+
+    def analytics(self):
+        return self.rng.choice(ANALYTICS)()
+
+    def leaderboard(self):
+        return self.rng.choice(LEADERBOARD)()
+
+    # [(seconds since started, operation, latency, outcome), ...] until deadline or stop is set
+    def run(self, mix: Dict[str, int], started: float, deadline: float, stop=None) -> List[tuple]:
+        operations, weights = list(mix), list(mix.values())
+        samples = []
+        while time.time() < deadline and (stop is None or not stop.is_set()):
+            operation = self.rng.choices(operations, weights)[0]
+            before = time.perf_counter()
+            try:
+                outcome = _outcome(getattr(self, operation)())
+            except Exception as e:
+                outcome = type(e).__name__
+            samples.append((time.time() - started, operation, time.perf_counter() - before, outcome))
+        return samples
+
+
+def _outcome(result) -> str:
+    return result.name if isinstance(result, ReturnValue) else "result"
+
+
+def _process_worker(generator, worker_id, seed, hot_apartments, mix, started, deadline, queue):
+    queue.put(Worker(generator, worker_id, seed, hot_apartments).run(mix, started, deadline))
+
+
+def run(generator: DataGenerator, mix: Dict[str, int], workers: int = 8, duration: float = 30.0,
+        processes: bool = False, shared: bool = False, seed: int = 0, hot_apartments: int = 100) -> List[tuple]:
+    for operation in mix:
+        if not hasattr(Worker, operation):
+            raise ValueError("unknown operation %s" % operation)
+    Solution.query_cache.disable()
+    started = time.time()
+    deadline = started + duration
+    if processes:
+        # each process makes its own connections, a forked process must not reuse the parent's
+        queue = multiprocessing.Queue()
+        pool = [multiprocessing.Process(target=_process_worker, args=(
+            generator, i, seed, hot_apartments, mix, started, deadline, queue)) for i in range(workers)]
+        for process in pool:
+            process.start()
+        samples = [sample for _ in pool for sample in queue.get()]
+        for process in pool:
+            process.join()
+        return samples
+
+    if shared:
+        connector = Connector.SharedDBConnector(max_connections=workers)
+        Solution.use_shared_connector(connector)
+    results = [None] * workers
+
+    def target(i):
+        results[i] = Worker(generator, i, seed, hot_apartments).run(mix, started, deadline)
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(workers)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if shared:
+            Solution.use_shared_connector(None)
+            connector.close_all()
+    return [sample for worker_samples in results for sample in worker_samples or ()]
+
+
+def _summary(samples: List[tuple], seconds: float) -> dict:
+    latencies = sorted(sample[2] for sample in samples)
+    return {
+        "calls": len(latencies),
+        "throughput": len(latencies) / seconds if seconds > 0 else None,
+        "p50": _percentile(latencies, 0.50),
+        "p95": _percentile(latencies, 0.95),
+        "p99": _percentile(latencies, 0.99),
+        "p999": _percentile(latencies, 0.999),
+        "max": latencies[-1] if latencies else 0.0,
+        "outcomes": dict(collections.Counter(sample[3] for sample in samples)),
+    }
+
+
+def report(samples: List[tuple], duration: float, interval: float = 5.0) -> dict:
+    by_operation = collections.defaultdict(list)
+    by_interval = collections.defaultdict(list)
+    for sample in samples:
+        by_operation[sample[1]].append(sample)
+        by_interval[int(sample[0] // interval)].append(sample)
+    return {
+        "total": _summary(samples, duration),
+        "operations": {operation: _summary(s, duration) for operation, s in sorted(by_operation.items())},
+        "intervals": [dict(_summary(by_interval[i], interval), start=i * interval)
+                      for i in range(int(duration // interval) + (duration % interval > 0))],
+    }
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        operation, _, weight = part.partition("=")
+        mix[operation.strip()] = int(weight or 1)
+    return mix
+
+
+def _print(result: dict, out=sys.stderr) -> None:
+    def line(name: str, summary: dict) -> str:
+        outcomes = " ".join("%s=%d" % item for item in sorted(summary["outcomes"].items()))
+        return "%-18s %8d %9.1f/s %8.2f %8.2f %8.2f ms  %s" % (
+            name, summary["calls"], summary["throughput"] or 0, summary["p50"] * 1000, summary["p99"] * 1000,
+            summary["p999"] * 1000, outcomes)
+
+    print("%-18s %8s %11s %8s %8s %8s     %s" % ("", "calls", "rate", "p50", "p99", "p99.9", "outcomes"), file=out)
+    for operation, summary in result["operations"].items():
+        print(line(operation, summary), file=out)
+    print(line("total", result["total"]), file=out)
+    print(file=out)
+    for summary in result["intervals"]:
+        print(line("%6.0fs" % summary["start"], summary), file=out)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent mixed workload against the Solution API.")
+    parser.add_argument("--scale", type=float, default=1.0, help="scale the database was loaded with")
+    parser.add_argument("--seed", type=int, default=42, help="seed the database was loaded with")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--processes", action="store_true", help="run workers as processes instead of threads")
+    parser.add_argument("--shared", action="store_true", help="threads share a SharedDBConnector pool")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds per row of the time series")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="booking")
+    parser.add_argument("--mix", type=parse_mix, help="operation=weight,... (overrides --profile)")
+    parser.add_argument("--hot-apartments", type=int, default=100, help="apartments bookings compete for")
+    parser.add_argument("--out", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    samples = run(DataGenerator(scale=args.scale, seed=args.seed), args.mix or PROFILES[args.profile],
+                  args.workers, args.duration, args.processes, args.shared, args.seed, args.hot_apartments)
+    result = report(samples, args.duration, args.interval)
+    _print(result)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+
+from Business.Apartment import Apartment
+from Utility.DBConnector import ResultSet
+from Solution import objects_from_result
+
+# memory and time of turning result rows into Business objects, without a database: the rows are built in memory.
+#
+#   python -m Tools.ObjectBenchmark --rows 100000 --out objects.json
+#
+# "dict" is the apartment as it was before __slots__ (instance __dict__, eager dirty set) filled through a
+# ResultSetDict per row, "slots" is Apartment.from_row over ResultSet.rows as the Solution list APIs do now.
+
+
+class DictApartment:
+    def __init__(self, id: int = None, address: str = None, city: str = None, country: str = None,
+                 size: float = None) -> None:
+        self.__id = id
+        self.__address = address
+        self.__city = city
+        self.__country = country
+        self.__size = size
+        self.__dirty = set()
+
+
+class _Column:
+    def __init__(self, name: str):
+        self.name = name
+
+
+def result_set(rows: int) -> ResultSet:
+    description = [_Column(name) for name in ("apartmentid", "address", "city", "country", "size")]
+    return ResultSet(description, [(i, "%d Main St" % i, "City %d" % (i % 50), "Country %d" % (i % 5), 40.0 + i % 80)
+                                   for i in range(rows)])
+
+
+def dict_objects(results: ResultSet) -> list:
+    return [DictApartment(row["ApartmentID"], row["Address"], row["City"], row["Country"], row["Size"])
+            for row in results]
+
+
+def slot_objects(results: ResultSet) -> list:
+    return objects_from_result(Apartment, results)
+
+
+def measure(build, results: ResultSet, repeat: int) -> dict:
+    seconds = min(timeit.repeat(lambda: build(results), number=1, repeat=repeat))
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = build(results)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    rows = max(len(objects), 1)
+    return {"seconds": seconds, "us_per_row": seconds / rows * 1e6, "bytes": after - before,
+            "bytes_per_row": (after - before) / rows}
+
+
+def run(rows: int = 100000, repeat: int = 5) -> dict:
+    results = result_set(rows)
+    report = {"rows": rows, "dict": measure(dict_objects, results, repeat),
+              "slots": measure(slot_objects, results, repeat)}
+    report["speedup"] = report["dict"]["seconds"] / report["slots"]["seconds"]
+    report["memory_ratio"] = report["slots"]["bytes"] / report["dict"]["bytes"]
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare building Business objects from rows, dict vs slots.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs, the fastest one is reported")
+    parser.add_argument("--out", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.repeat)
+    for name in ("dict", "slots"):
+        print("%-6s %8.3f us/row %8.1f bytes/row" % (name, report[name]["us_per_row"], report[name]["bytes_per_row"]),
+              file=sys.stderr)
+    print("%.2fx faster, %.0f%% of the memory" % (report["speedup"], report["memory_ratio"] * 100), file=sys.stderr)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
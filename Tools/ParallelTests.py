@@ -0,0 +1,146 @@
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import time
+import unittest
+from typing import List
+
+import psycopg2
+from psycopg2 import sql
+
+import Utility.DBConnector as Connector
+
+# runs the test modules on N worker processes, each with its own copy of the schema, so the suite time scales with
+# the cores instead of serializing on the one database of database.ini.
+#
+#   python -m Tools.ParallelTests --workers 4                           (Tests/*Test.py, one schema per worker)
+#   python -m Tools.ParallelTests --workers 4 --isolation database SimpleTest whattsappTest
+#
+# --isolation schema creates the schema test_worker_<i> in the configured database and points the worker's
+# connections at it through SOLUTION_DB_SCHEMA (search_path). --isolation database clones a database per worker
+# from --template (CREATE DATABASE ... TEMPLATE, nobody may be connected to the template) and passes its name in
+# SOLUTION_DB_NAME. DBConnector reads both variables, so every connector of the worker (Solution, SharedDBConnector,
+# AsyncDBConnector, the tools) uses the worker's target. the schemas or databases are dropped at the end.
+# modules are the unit of distribution, spread by test count with the biggest modules first.
+
+
+def discover(patterns: List[str]) -> List[str]:
+    modules = []
+    for pattern in patterns:
+        if pattern.endswith(".py") or "*" in pattern:
+            paths = sorted(glob.glob(pattern))
+        else:
+            paths = [pattern]
+        modules.extend(path[:-3].replace(os.sep, ".") if path.endswith(".py") else path for path in paths)
+    return modules
+
+
+def count_tests(module: str) -> int:
+    try:
+        return unittest.defaultTestLoader.loadTestsFromName(module).countTestCases()
+    except Exception:
+        return 1
+
+
+# longest processing time first: each module goes to the worker with the fewest tests so far, modules without
+# tests (e.g. Tests/AbstractTest.py) are left out
+def partition(modules: List[str], workers: int) -> List[List[str]]:
+    buckets = [[] for _ in range(workers)]
+    loads = [0] * workers
+    counts = [(count_tests(module), module) for module in modules]
+    for count, module in sorted((item for item in counts if item[0] > 0), key=lambda item: (-item[0], item[1])):
+        worker = loads.index(min(loads))
+        buckets[worker].append(module)
+        loads[worker] += count
+    return [bucket for bucket in buckets if bucket]
+
+
+# a connection to the configured database itself, not to a worker's target
+def _admin_connection():
+    params = Connector.DBConnector.connection_params()
+    params.pop("options", None)
+    connection = psycopg2.connect(**params)
+    connection.autocommit = True
+    return connection
+
+
+def create_targets(isolation: str, workers: int, template: str, prefix: str) -> List[dict]:
+    targets = []
+    connection = _admin_connection()
+    try:
+        with connection.cursor() as cursor:
+            for worker in range(workers):
+                name = "%s_%d" % (prefix, worker)
+                if isolation == "schema":
+                    cursor.execute(sql.SQL("DROP SCHEMA IF EXISTS {name} CASCADE; CREATE SCHEMA {name}").format(
+                        name=sql.Identifier(name)))
+                    targets.append({"SOLUTION_DB_SCHEMA": name})
+                else:
+                    cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {name}").format(name=sql.Identifier(name)))
+                    cursor.execute(sql.SQL("CREATE DATABASE {name} TEMPLATE {template}").format(
+                        name=sql.Identifier(name), template=sql.Identifier(template)))
+                    targets.append({"SOLUTION_DB_NAME": name})
+    finally:
+        connection.close()
+    return targets
+
+
+def drop_targets(targets: List[dict]):
+    connection = _admin_connection()
+    try:
+        with connection.cursor() as cursor:
+            for target in targets:
+                if "SOLUTION_DB_SCHEMA" in target:
+                    cursor.execute(sql.SQL("DROP SCHEMA IF EXISTS {name} CASCADE").format(
+                        name=sql.Identifier(target["SOLUTION_DB_SCHEMA"])))
+                else:
+                    cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {name}").format(
+                        name=sql.Identifier(target["SOLUTION_DB_NAME"])))
+    finally:
+        connection.close()
+
+
+def run(modules: List[str], workers: int = 4, isolation: str = "schema", template: str = "template1",
+        prefix: str = "test_worker", verbose: bool = False) -> int:
+    buckets = partition(modules, workers)
+    targets = create_targets(isolation, len(buckets), template, prefix)
+    started = time.monotonic()
+    try:
+        processes = []
+        for bucket, target in zip(buckets, targets):
+            env = dict(os.environ, **target)
+            command = [sys.executable, "-m", "unittest"] + (["-v"] if verbose else []) + bucket
+            processes.append((bucket, time.monotonic(), subprocess.Popen(
+                command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)))
+        failed = 0
+        for worker, (bucket, worker_started, process) in enumerate(processes):
+            output, _ = process.communicate()
+            status = "ok" if process.returncode == 0 else "FAILED"
+            failed += process.returncode != 0
+            print("worker %d: %s in %.1fs (%s)" % (worker, status, time.monotonic() - worker_started,
+                                                  " ".join(bucket)), file=sys.stderr)
+            if process.returncode != 0 or verbose:
+                print(output, file=sys.stderr)
+    finally:
+        drop_targets(targets)
+    print("%d modules on %d workers in %.1fs, %d workers failed" % (
+        len(modules), len(buckets), time.monotonic() - started, failed), file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the test modules in parallel, one schema or database each.")
+    parser.add_argument("modules", nargs="*", default=["Tests/*Test.py"], help="module names, files or globs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--isolation", choices=("schema", "database"), default="schema")
+    parser.add_argument("--template", default="template1", help="database the worker databases are cloned from")
+    parser.add_argument("--prefix", default="test_worker", help="name prefix of the worker schemas/databases")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    return run(discover(args.modules), args.workers, args.isolation, args.template, args.prefix, args.verbose)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import argparse
+import collections
+import json
+import sys
+import time
+from typing import List
+
+import Solution
+from Tools.Benchmark import _percentile
+from Utility.CallTrace import decode, encode, load, same_result
+
+# re-issues a trace recorded with Solution.call_trace (or $SOLUTION_TRACE) against the database in database.ini
+# and checks every call returns what it returned when it was recorded.
+#
+#   SOLUTION_TRACE=trace.jsonl.gz python some_program.py
+#   python -m Tools.Replay trace.jsonl.gz --fresh --speed 10 --out replay.json
+#
+# --speed 1 keeps the original pacing, 10 runs ten times faster and 0 sends every call as soon as the previous one
+# returned. the trace is replayed by one thread in recorded order, so concurrent traffic is serialized. --fresh
+# recreates the schema first, which the trace needs unless it starts with create_tables or clear_tables itself.
+
+
+def replay(path: str, speed: float = 1.0, fresh: bool = False, max_mismatches: int = 20) -> dict:
+    Solution.query_cache.disable()
+    if fresh:
+        try:
+            Solution.drop_tables()
+        except Exception:
+            pass
+        Solution.create_tables()
+    latencies = collections.defaultdict(list)
+    recorded = collections.defaultdict(list)
+    mismatches: List[dict] = []
+    calls = mismatch_count = 0
+    started = time.monotonic()
+    for entry in load(path):
+        if speed > 0:
+            delay = entry["t"] / speed - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+        function = getattr(Solution, entry["fn"])
+        before = time.perf_counter()
+        error = result = None
+        try:
+            result = decode(encode(function(*entry["args"], **entry["kwargs"])))
+        except Exception as e:
+            error = type(e).__name__
+        latencies[entry["fn"]].append(time.perf_counter() - before)
+        recorded[entry["fn"]].append(entry["latency"])
+        calls += 1
+        if error != entry["error"] or (error is None and not same_result(entry["result"], result)):
+            mismatch_count += 1
+            if len(mismatches) < max_mismatches:
+                mismatches.append({"call": calls, "fn": entry["fn"], "args": encode(entry["args"]),
+                                   "expected": encode(entry["result"]), "actual": encode(result),
+                                   "expected_error": entry["error"], "error": error})
+    elapsed = time.monotonic() - started
+    return {
+        "calls": calls,
+        "seconds": elapsed,
+        "throughput": calls / elapsed if elapsed > 0 else None,
+        "mismatches": mismatch_count,
+        "first_mismatches": mismatches,
+        "functions": {name: _latency(latencies[name], recorded[name]) for name in sorted(latencies)},
+    }
+
+
+def _latency(replayed: List[float], recorded: List[float]) -> dict:
+    replayed, recorded = sorted(replayed), sorted(recorded)
+    return {
+        "calls": len(replayed),
+        "p50": _percentile(replayed, 0.50),
+        "p99": _percentile(replayed, 0.99),
+        "recorded_p50": _percentile(recorded, 0.50),
+        "recorded_p99": _percentile(recorded, 0.99),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a Solution call trace and verify its return values.")
+    parser.add_argument("trace")
+    parser.add_argument("--speed", type=float, default=1.0, help="pacing multiplier, 0 replays as fast as possible")
+    parser.add_argument("--fresh", action="store_true", help="recreate the schema before replaying")
+    parser.add_argument("--out", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    result = replay(args.trace, args.speed, args.fresh)
+    print("%d calls in %.1fs, %d mismatches" % (result["calls"], result["seconds"], result["mismatches"]),
+          file=sys.stderr)
+    for name, latency in result["functions"].items():
+        print("%-32s %8d %8.2f ms p50 (recorded %8.2f) %8.2f ms p99 (recorded %8.2f)" % (
+            name, latency["calls"], latency["p50"] * 1000, latency["recorded_p50"] * 1000, latency["p99"] * 1000,
+            latency["recorded_p99"] * 1000), file=sys.stderr)
+    for mismatch in result["first_mismatches"]:
+        print("MISMATCH #%d %s%s: expected %s got %s" % (
+            mismatch["call"], mismatch["fn"], tuple(mismatch["args"]),
+            mismatch["expected_error"] or mismatch["expected"], mismatch["error"] or mismatch["actual"]),
+            file=sys.stderr)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if result["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import asyncio
+import contextlib
+from typing import Union
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2 import errors, sql
+
+from Utility.DBConnector import DBConnector, ResultSet
+from Utility.Exceptions import DatabaseException
+from Utility.Instrumentation import instrumentation
+
+
+# waits for the asynchronous connection to finish its current operation without blocking the event loop
+async def _wait(connection):
+    loop = asyncio.get_running_loop()
+    while True:
+        state = connection.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            return
+        future = loop.create_future()
+
+        def ready():
+            if not future.done():
+                future.set_result(None)
+
+        fd = connection.fileno()
+        if state == psycopg2.extensions.POLL_READ:
+            loop.add_reader(fd, ready)
+            try:
+                await future
+            finally:
+                loop.remove_reader(fd)
+        elif state == psycopg2.extensions.POLL_WRITE:
+            loop.add_writer(fd, ready)
+            try:
+                await future
+            finally:
+                loop.remove_writer(fd)
+        else:
+            raise psycopg2.OperationalError("bad state from poll: %s" % state)
+
+
+class AsyncDBConnector:
+    # a psycopg2 connection in asynchronous mode, driven by the running asyncio event loop.
+    # asynchronous connections are always in autocommit mode, which matches DBConnector committing after every
+    # execute. a single connection runs one query at a time, share connections through AsyncConnectionPool
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    async def connect() -> "AsyncDBConnector":
+        try:
+            connection = psycopg2.connect(async_=True, **DBConnector.connection_params())
+            await _wait(connection)
+        except Exception:
+            raise DatabaseException.ConnectionInvalid("Could not connect to database")
+        return AsyncDBConnector(connection)
+
+    @property
+    def closed(self) -> bool:
+        return self.connection is None or self.connection.closed != 0
+
+    async def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    # same contract as DBConnector.execute: returns the number of rows effected and a ResultSet (for SELECT), or the
+    # fetched tuples with raw
+    async def execute(self, query: Union[str, sql.Composed], printSchema=False, name: str = None,
+                      raw: bool = False) -> (int, ResultSet):
+        if self.closed:
+            raise DatabaseException.ConnectionInvalid("Connection Invalid")
+        event = None
+        if instrumentation.active:
+            event = instrumentation.start(name or "unnamed", query, self)
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query)
+            await _wait(self.connection)
+            row_effected = max(cursor.rowcount, 0)
+            if event is not None:
+                event.mark("execute")
+            if cursor.description is not None:
+                results = cursor.fetchall()
+                if event is not None:
+                    event.mark("fetch")
+                entries = results if raw else ResultSet(cursor.description, results)
+                if event is not None and not raw:
+                    event.mark("resultset")
+            else:
+                entries = [] if raw else ResultSet()
+        except BaseException as e:
+            if event is not None:
+                event.mark("execute")
+                instrumentation.finish(event, e)
+            raise self.__translate(e)
+        finally:
+            cursor.close()
+
+        if event is not None:
+            event.rows = row_effected
+            instrumentation.finish(event)
+
+        if printSchema:
+            print(entries)
+
+        return row_effected, entries
+
+    def __translate(self, e: BaseException) -> BaseException:
+        if isinstance(e, errors.lookup("23502")):
+            return DatabaseException.NOT_NULL_VIOLATION("NOT_NULL_VIOLATION")
+        if isinstance(e, errors.lookup("23503")):
+            return DatabaseException.FOREIGN_KEY_VIOLATION("FOREIGN_KEY_VIOLATION")
+        if isinstance(e, errors.lookup("23505")):
+            return DatabaseException.UNIQUE_VIOLATION("UNIQUE_VIOLATION")
+        if isinstance(e, errors.lookup("23514")):
+            return DatabaseException.CHECK_VIOLATION("CHECK_VIOLATION")
+        if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            return DatabaseException.ConnectionInvalid("Connection Invalid")
+        if isinstance(e, asyncio.CancelledError):
+            # the query may still be running, the connection cannot be reused
+            self.connection.close()
+        return e
+
+
+class AsyncConnectionPool:
+    # up to max_size AsyncDBConnectors shared by any number of coroutines, a coroutine waits for a free
+    # connection when all of them are checked out. connections that broke while checked out are discarded
+    def __init__(self, max_size: int = 10):
+        self.max_size = max_size
+        self.__idle = []
+        self.__size = 0
+        self.__available = None
+
+    async def acquire(self) -> AsyncDBConnector:
+        if self.__available is None:
+            self.__available = asyncio.Condition()
+        async with self.__available:
+            while not self.__idle and self.__size >= self.max_size:
+                await self.__available.wait()
+            if self.__idle:
+                return self.__idle.pop()
+            self.__size += 1
+        try:
+            return await AsyncDBConnector.connect()
+        except Exception:
+            async with self.__available:
+                self.__size -= 1
+                self.__available.notify()
+            raise
+
+    async def release(self, conn: AsyncDBConnector):
+        async with self.__available:
+            if conn.closed:
+                self.__size -= 1
+            else:
+                self.__idle.append(conn)
+            self.__available.notify()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def execute(self, query: Union[str, sql.Composed], printSchema=False, name: str = None,
+                      raw: bool = False) -> (int, ResultSet):
+        async with self.connection() as conn:
+            return await conn.execute(query, printSchema, name, raw)
+
+    # closes the idle connections, the pool can be used again afterwards (also from another event loop)
+    async def close(self):
+        if self.__available is None:
+            return
+        async with self.__available:
+            for conn in self.__idle:
+                await conn.close()
+            self.__size -= len(self.__idle)
+            self.__idle.clear()
+            if self.__size == 0:
+                self.__available = None
@@ -0,0 +1,195 @@
+import asyncio
+import contextvars
+import datetime
+import decimal
+import functools
+import gzip
+import json
+import math
+import threading
+import time
+from typing import Callable, Iterator
+
+from Utility.ReturnValue import ReturnValue
+
+from Business.Owner import Owner
+from Business.Customer import Customer
+from Business.Apartment import Apartment
+
+
+class CallTrace:
+    # opt-in recorder of the Solution API traffic. while started, every decorated call is appended to a JSON lines
+    # file (gzip compressed if the path ends with .gz) as
+    #   {"t": seconds since start(), "fn": name, "args": [...], "kwargs": {...}, "result": ..., "error": ...,
+    #    "latency": seconds}
+    # with Business objects, dates, tuples and ReturnValues tagged so load() gives back the original values.
+    # only the outermost decorated call is recorded, the calls it makes to other decorated functions are part of it
+    # and replaying it repeats them. when stopped the decorator only checks a flag, see Tools/Replay.py for
+    # re-issuing a trace
+    def __init__(self):
+        self.__file = None
+        self.__started = None
+        self.__lock = threading.Lock()
+        # set while a recorded call runs, per thread and asyncio task
+        self.__recording = contextvars.ContextVar("call_trace_recording", default=False)
+
+    @property
+    def active(self) -> bool:
+        return self.__file is not None
+
+    def start(self, path: str) -> "CallTrace":
+        with self.__lock:
+            if self.__file is None:
+                self.__file = gzip.open(path, "at") if path.endswith(".gz") else open(path, "a")
+                self.__started = time.monotonic()
+        return self
+
+    def stop(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    def record(self, name: str, args: tuple, kwargs: dict, started: float, latency: float, result=None,
+               error: BaseException = None):
+        entry = {
+            "t": started - self.__started,
+            "fn": name,
+            "args": [encode(arg) for arg in args],
+            "kwargs": {key: encode(value) for key, value in kwargs.items()},
+            "result": encode(result),
+            "error": None if error is None else type(error).__name__,
+            "latency": latency,
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.write(line)
+
+    # decorator for the API functions (plain or async)
+    def recorded(self, func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if self.__file is None or self.__recording.get():
+                    return await func(*args, **kwargs)
+                started = time.monotonic()
+                token = self.__recording.set(True)
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as e:
+                    self.record(func.__name__, args, kwargs, started, time.monotonic() - started, error=e)
+                    raise
+                finally:
+                    self.__recording.reset(token)
+                self.record(func.__name__, args, kwargs, started, time.monotonic() - started, result)
+                return result
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.__file is None or self.__recording.get():
+                    return func(*args, **kwargs)
+                started = time.monotonic()
+                token = self.__recording.set(True)
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as e:
+                    self.record(func.__name__, args, kwargs, started, time.monotonic() - started, error=e)
+                    raise
+                finally:
+                    self.__recording.reset(token)
+                self.record(func.__name__, args, kwargs, started, time.monotonic() - started, result)
+                return result
+        return wrapper
+
+
+def encode(value):
+    if isinstance(value, ReturnValue):
+        return {"$rv": value.name}
+    if isinstance(value, Owner):
+        return _dirty(value, {"$owner": [value.get_owner_id(), value.get_owner_name()]})
+    if isinstance(value, Customer):
+        return _dirty(value, {"$customer": [value.get_customer_id(), value.get_customer_name()]})
+    if isinstance(value, Apartment):
+        return _dirty(value, {"$apartment": [value.get_id(), value.get_address(), value.get_city(),
+                                             value.get_country(), encode(value.get_size())]})
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, tuple):
+        return {"$tuple": [encode(item) for item in value]}
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): encode(item) for key, item in value.items()}
+    return value
+
+
+def decode(value):
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "$rv" in value:
+        return ReturnValue[value["$rv"]]
+    if "$owner" in value:
+        return _redirty(Owner(*value["$owner"]), value)
+    if "$customer" in value:
+        return _redirty(Customer(*value["$customer"]), value)
+    if "$apartment" in value:
+        return _redirty(Apartment(*decode(value["$apartment"])), value)
+    if "$datetime" in value:
+        return datetime.datetime.fromisoformat(value["$datetime"])
+    if "$date" in value:
+        return datetime.date.fromisoformat(value["$date"])
+    if "$tuple" in value:
+        return tuple(decode(item) for item in value["$tuple"])
+    return {key: decode(item) for key, item in value.items()}
+
+
+# the fields an update_* call would save are part of the argument
+def _dirty(obj, encoded: dict) -> dict:
+    if obj.dirty_fields():
+        encoded["$dirty"] = sorted(obj.dirty_fields())
+    return encoded
+
+
+def _redirty(obj, encoded: dict):
+    for field in encoded.get("$dirty", ()):
+        getattr(obj, "set_" + field)(getattr(obj, "get_" + field)())
+    return obj
+
+
+# the entries of a trace file with their arguments and results decoded
+def load(path: str) -> Iterator[dict]:
+    with (gzip.open(path, "rt") if path.endswith(".gz") else open(path)) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entry["args"] = decode(entry["args"])
+                entry["kwargs"] = decode(entry["kwargs"])
+                entry["result"] = decode(entry["result"])
+                yield entry
+
+
+# compares results field by field (Apartment.__eq__ ignores the size) and floats with a relative tolerance
+def same_result(expected, actual, rel_tol: float = 1e-9) -> bool:
+    if isinstance(expected, float) or isinstance(actual, float):
+        return isinstance(expected, (int, float)) and isinstance(actual, (int, float)) \
+            and math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=1e-9)
+    if isinstance(expected, (list, tuple)):
+        return type(expected) == type(actual) and len(expected) == len(actual) \
+            and all(same_result(e, a, rel_tol) for e, a in zip(expected, actual))
+    if isinstance(expected, (Owner, Customer, Apartment)):
+        return type(expected) == type(actual) and same_result(encode(expected), encode(actual), rel_tol)
+    if isinstance(expected, dict):
+        return isinstance(actual, dict) and expected.keys() == actual.keys() \
+            and all(same_result(expected[key], actual[key], rel_tol) for key in expected)
+    return expected == actual
+
+
+call_trace = CallTrace()
+
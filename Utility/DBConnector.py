@@ -1,8 +1,13 @@
 import psycopg2
+import psycopg2.pool
 from psycopg2 import errors, sql
 from configparser import ConfigParser
 from Utility.Exceptions import DatabaseException
+from Utility.Instrumentation import instrumentation
+from Utility.SlowQueryLog import SlowQueryLog
 import os
+import select
+import threading
 from typing import Union
 
 
@@ -71,17 +76,28 @@ class ResultSet:
 
 
 class DBConnector:
-    # constructor
-    def __init__(self):
+    # constructor, wraps the given connection (e.g. one checked out of a pool) or opens a new one
+    def __init__(self, connection=None):
+        event = None
         try:
-            # Obtain the configuration parameters
-            params = DBConnector.__config()
-            self.connection = psycopg2.connect(**params)
+            if connection is None:
+                if instrumentation.active:
+                    event = instrumentation.start("connect", None, self)
+                # Obtain the configuration parameters
+                params = DBConnector.__config()
+                connection = psycopg2.connect(**params)
+                if event is not None:
+                    event.mark("connect")
+                    instrumentation.finish(event)
+            self.connection = connection
             self.connection.autocommit = False
             self.cursor = self.connection.cursor()
         except Exception as e:
             self.connection = None
             self.cursor = None
+            if event is not None and "connect" not in event.phases:
+                event.mark("connect")
+                instrumentation.finish(event, e)
             raise DatabaseException.ConnectionInvalid("Could not connect to database")
 
     # close connection
@@ -109,29 +125,59 @@ class DBConnector:
 
     # executes the query, if it is SELECT you may ask to print the results with printSchema
     # returns the number of rows effected and a ResultSet (for SELECT)
-    def execute(self, query: Union[str, sql.Composed], printSchema=False) -> (int, ResultSet):
+    # name is the query template reported to the instrumentation, by default the calling function's name
+    # with raw the rows are returned as the list of tuples fetched from the cursor instead of a ResultSet
+    def execute(self, query: Union[str, sql.Composed], printSchema=False, name: str = None,
+                raw: bool = False) -> (int, ResultSet):
         if self.connection is None:
             raise DatabaseException.ConnectionInvalid("Connection Invalid")
 
+        event = None
+        if instrumentation.active:
+            event = instrumentation.start(name or "unnamed", query, self)
+
         # try execute the query
         try:
             self.cursor.execute(query)
             row_effected = max(self.cursor.rowcount, 0)
             self.commit()
         except errors.lookup("23502"):
-            raise DatabaseException.NOT_NULL_VIOLATION("NOT_NULL_VIOLATION")
+            error = DatabaseException.NOT_NULL_VIOLATION("NOT_NULL_VIOLATION")
         except errors.lookup("23503"):
-            raise DatabaseException.FOREIGN_KEY_VIOLATION("FOREIGN_KEY_VIOLATION")
+            error = DatabaseException.FOREIGN_KEY_VIOLATION("FOREIGN_KEY_VIOLATION")
         except errors.lookup("23505"):
-            raise DatabaseException.UNIQUE_VIOLATION("UNIQUE_VIOLATION")
+            error = DatabaseException.UNIQUE_VIOLATION("UNIQUE_VIOLATION")
         except errors.lookup("23514"):
-            raise DatabaseException.CHECK_VIOLATION("CHECK_VIOLATION")
+            error = DatabaseException.CHECK_VIOLATION("CHECK_VIOLATION")
+        except Exception as e:
+            if event is not None:
+                event.mark("execute")
+                instrumentation.finish(event, e)
+            raise
+        else:
+            error = None
+        if error is not None:
+            if event is not None:
+                event.mark("execute")
+                instrumentation.finish(event, error)
+            raise error
+        if event is not None:
+            event.mark("execute")
 
         # get entries in case of SELECT
         if self.cursor.description is not None:
-            entries = ResultSet(self.cursor.description, self.cursor.fetchall())
+            results = self.cursor.fetchall()
+            if event is not None:
+                event.mark("fetch")
+            entries = results if raw else ResultSet(self.cursor.description, results)
+            if event is not None and not raw:
+                event.mark("resultset")
         else:
-            entries = ResultSet()
+            entries = [] if raw else ResultSet()
+
+        if event is not None:
+            event.rows = row_effected
+            instrumentation.finish(event)
 
         # print SELECT entries
         if printSchema:
@@ -139,6 +185,17 @@ class DBConnector:
 
         return row_effected, entries
 
+    # logs every statement of any connector that takes at least threshold seconds, with the EXPLAIN ANALYZE plan
+    # of SELECTs, see Utility.SlowQueryLog. call disable() on the result to stop logging
+    @staticmethod
+    def log_slow_queries(threshold: float, path: str = None, explain: bool = True):
+        return SlowQueryLog(threshold, path, explain).enable()
+
+    # connection parameters from database.ini, for connections that are not made by DBConnector itself
+    @staticmethod
+    def connection_params() -> dict:
+        return DBConnector.__config()
+
     # grant credentials
     @staticmethod
     def __config(filename=os.path.join(os.path.join(os.getcwd(), "Utility"), 'database.ini'),
@@ -160,4 +217,189 @@ class DBConnector:
                 filename=os.path.join(os.path.join(os.path.dirname(os.getcwd()), 'Utility'), 'database.ini'))
             if db is None:
                 raise DatabaseException.database_ini_ERROR("Please modify database.ini file under Utility")
+        # the database or schema of this process' worker in a parallel test run, see Tools/ParallelTests.py
+        if os.environ.get("SOLUTION_DB_NAME"):
+            db["database"] = os.environ["SOLUTION_DB_NAME"]
+        if os.environ.get("SOLUTION_DB_SCHEMA"):
+            db["options"] = "-c search_path=%s" % os.environ["SOLUTION_DB_SCHEMA"]
         return db
+
+
+class SharedDBConnector:
+    # thread-safe connector that can be shared by all threads of a process instead of opening a connection per call.
+    # concurrency contract:
+    # - every thread works on its own connection checked out of a pool of at most max_connections, with its own
+    #   cursor. statements of different threads are never interleaved on one connection, so commit() and rollback()
+    #   only affect the calling thread's transaction.
+    # - the first acquire() (or execute()) of a thread checks a connection out, close() returns it to the pool once
+    #   it matched every acquire() of that thread, rolling back whatever the thread did not commit.
+    # - acquire() blocks while all connections are checked out by other threads.
+    # - a checked out connection belongs to its thread, results must not be shared through the connector itself.
+    # - close_all() closes the pool, it must only be called once no thread uses the connector anymore.
+    def __init__(self, min_connections: int = 1, max_connections: int = 10):
+        self.max_connections = max_connections
+        self.__pool = psycopg2.pool.ThreadedConnectionPool(
+            min_connections, max_connections, **DBConnector.connection_params())
+        self.__slots = threading.BoundedSemaphore(max_connections)
+        self.__local = threading.local()
+
+    # checks out a connection for the calling thread (if it has none yet) and returns the connector
+    def acquire(self) -> "SharedDBConnector":
+        if getattr(self.__local, "depth", 0) == 0:
+            self.__slots.acquire()
+            try:
+                self.__local.conn = DBConnector(self.__pool.getconn())
+            except Exception:
+                self.__slots.release()
+                raise DatabaseException.ConnectionInvalid("Could not connect to database")
+            self.__local.depth = 0
+        self.__local.depth += 1
+        return self
+
+    def __session(self) -> DBConnector:
+        if getattr(self.__local, "depth", 0) == 0:
+            self.acquire()
+        return self.__local.conn
+
+    def execute(self, query: Union[str, sql.Composed], printSchema=False, name: str = None,
+                raw: bool = False) -> (int, ResultSet):
+        return self.__session().execute(query, printSchema, name, raw)
+
+    def commit(self):
+        self.__session().commit()
+
+    def rollback(self):
+        self.__session().rollback()
+
+    # returns the calling thread's connection to the pool once every acquire() of the thread was closed
+    def close(self):
+        depth = getattr(self.__local, "depth", 0)
+        if depth == 0:
+            return
+        self.__local.depth = depth - 1
+        if self.__local.depth > 0:
+            return
+        conn = self.__local.conn
+        self.__local.conn = None
+        broken = conn.connection.closed != 0
+        try:
+            if not broken:
+                conn.cursor.close()
+                conn.connection.rollback()
+        except Exception:
+            broken = True
+        finally:
+            self.__pool.putconn(conn.connection, close=broken)
+            self.__slots.release()
+
+    def close_all(self):
+        self.__pool.closeall()
+
+
+class TransactionalDBConnector(DBConnector):
+    # one connection whose work is never committed, for rolling back a whole test instead of recreating the schema.
+    # plugs into Solution.use_shared_connector() like SharedDBConnector: every acquire() opens a savepoint, commit()
+    # (also called by execute() after every statement) releases it and opens the next one, and close() rolls back
+    # to it, so a Solution call sees the same commit/abort behaviour as on its own connection while everything
+    # stays in one transaction that rollback_all() undoes. single threaded only
+    def __init__(self, connection=None):
+        super().__init__(connection)
+        self.__depth = 0
+
+    def __savepoint(self, statement: str, error: str):
+        try:
+            self.cursor.execute(statement)
+        except Exception:
+            raise DatabaseException.ConnectionInvalid(error)
+
+    def acquire(self) -> "TransactionalDBConnector":
+        self.__savepoint("SAVEPOINT solution_call", "Could not start a savepoint")
+        self.__depth += 1
+        return self
+
+    def commit(self):
+        if self.__depth > 0:
+            self.__savepoint("RELEASE SAVEPOINT solution_call; SAVEPOINT solution_call", "Could not commit changes")
+
+    def rollback(self):
+        if self.__depth > 0:
+            self.__savepoint("ROLLBACK TO SAVEPOINT solution_call", "Could not rollback changes")
+
+    # ends the innermost Solution call, rolling back what it did not commit
+    def close(self):
+        if self.__depth > 0:
+            self.__depth -= 1
+            self.__savepoint("ROLLBACK TO SAVEPOINT solution_call; RELEASE SAVEPOINT solution_call",
+                             "Could not rollback changes")
+
+    # undoes everything done since the connector was opened (or since the last rollback_all)
+    def rollback_all(self):
+        self.__depth = 0
+        DBConnector.rollback(self)
+
+    def close_all(self):
+        try:
+            self.rollback_all()
+        finally:
+            DBConnector.close(self)
+
+
+class InvalidationListener:
+    # LISTENs on the channel the Solution triggers NOTIFY on (the table name as payload) and bumps the table in
+    # the local cache, so a process does not keep serving reads made stale by another process.
+    # runs on its own autocommit connection in a daemon thread. if the connection is lost, notifications may
+    # have been missed, so the whole cache is cleared once the listener reconnects
+    def __init__(self, cache, channel: str, on_notify=None, poll_interval: float = 1.0):
+        self.cache = cache
+        self.channel = channel
+        self.on_notify = on_notify
+        self.poll_interval = poll_interval
+        self.notifications = 0
+        self.__conn = None
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def start(self):
+        self.__connect()
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name="InvalidationListener", daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if self.__conn is not None:
+            self.__conn.close()
+            self.__conn = None
+
+    def __connect(self):
+        self.__conn = DBConnector()
+        self.__conn.connection.autocommit = True
+        self.__conn.cursor.execute(sql.SQL("LISTEN {channel}").format(channel=sql.Identifier(self.channel)))
+
+    def __run(self):
+        while not self.__stop.is_set():
+            try:
+                if self.__conn is None:
+                    self.__connect()
+                    self.cache.clear()
+                connection = self.__conn.connection
+                if select.select([connection], [], [], self.poll_interval) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    self.__handle(connection.notifies.pop(0).payload)
+            except Exception:
+                if self.__conn is not None:
+                    self.__conn.close()
+                    self.__conn = None
+                self.__stop.wait(self.poll_interval)
+
+    def __handle(self, payload: str):
+        self.cache.bump(payload)
+        self.notifications += 1
+        if self.on_notify is not None:
+            self.on_notify(payload)
@@ -0,0 +1,209 @@
+import bisect
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class QueryEvent:
+    # one instrumented DBConnector call. phases maps a phase name ("connect", "execute" = server execution and
+    # commit, "fetch" = fetchall, "resultset" = ResultSet construction) to its wall time in seconds
+    __slots__ = ("name", "query", "connector", "phases", "rows", "error", "started", "_last")
+
+    def __init__(self, name: str, query, connector):
+        self.name = name
+        self.query = query
+        self.connector = connector
+        self.phases: Dict[str, float] = {}
+        self.rows = 0
+        self.error: Optional[BaseException] = None
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    # closes the phase that started at the previous mark
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    @property
+    def duration(self) -> float:
+        return sum(self.phases.values())
+
+
+class LatencyHistogram:
+    # fixed exponential buckets from 50us to ~105s, percentiles are interpolated inside the bucket
+    BOUNDS = tuple(0.00005 * 2 ** i for i in range(22))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.BOUNDS[i - 1] if i > 0 else 0.0
+                high = self.BOUNDS[i] if i < len(self.BOUNDS) else self.max
+                value = low + (high - low) * (rank - seen) / count
+                return min(max(value, self.min), self.max)
+            seen += count
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class QueryInstrumentation:
+    # before/after hooks around DBConnector calls and per-(template, phase) latency histograms.
+    # the template name is the API name passed to execute() (e.g. "get_owner"), queries run without one
+    # are grouped as "unnamed". nothing is timed while there are no hooks and histograms are off
+    def __init__(self):
+        self.__hooks: List[Tuple[Optional[Callable], Optional[Callable]]] = []
+        self.__histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.__rows: Dict[str, int] = {}
+        self.__errors: Dict[str, int] = {}
+        self.__lock = threading.Lock()
+        self.histograms_enabled = False
+        self.active = False
+
+    def __update_active(self):
+        self.active = self.histograms_enabled or bool(self.__hooks)
+
+    # before(event) runs before the statement is sent, after(event) once it finished (event.error is set if
+    # it failed). returns a handle for remove_hook
+    def add_hook(self, before: Callable = None, after: Callable = None):
+        hook = (before, after)
+        with self.__lock:
+            self.__hooks.append(hook)
+            self.__update_active()
+        return hook
+
+    def remove_hook(self, hook):
+        with self.__lock:
+            if hook in self.__hooks:
+                self.__hooks.remove(hook)
+            self.__update_active()
+
+    def enable_histograms(self):
+        self.histograms_enabled = True
+        self.__update_active()
+
+    def disable_histograms(self):
+        self.histograms_enabled = False
+        self.__update_active()
+
+    def reset(self):
+        with self.__lock:
+            self.__histograms.clear()
+            self.__rows.clear()
+            self.__errors.clear()
+
+    def start(self, name: str, query, connector) -> QueryEvent:
+        event = QueryEvent(name, query, connector)
+        for before, _ in list(self.__hooks):
+            if before is not None:
+                before(event)
+        event.started = event._last = time.perf_counter()
+        return event
+
+    def finish(self, event: QueryEvent, error: BaseException = None):
+        event.error = error
+        if self.histograms_enabled:
+            with self.__lock:
+                for phase, seconds in event.phases.items():
+                    self.__histogram(event.name, phase).observe(seconds)
+                self.__histogram(event.name, "total").observe(event.duration)
+                self.__rows[event.name] = self.__rows.get(event.name, 0) + event.rows
+                if error is not None:
+                    self.__errors[event.name] = self.__errors.get(event.name, 0) + 1
+        for _, after in list(self.__hooks):
+            if after is not None:
+                after(event)
+
+    def __histogram(self, name: str, phase: str) -> LatencyHistogram:
+        histogram = self.__histograms.get((name, phase))
+        if histogram is None:
+            histogram = self.__histograms[(name, phase)] = LatencyHistogram()
+        return histogram
+
+    # {template: {"rows": n, "errors": n, "phases": {phase: {count, sum, min, max, p50, p95, p99}}}}
+    def snapshot(self) -> dict:
+        with self.__lock:
+            result = {}
+            for (name, phase), histogram in sorted(self.__histograms.items()):
+                template = result.setdefault(
+                    name, {"rows": self.__rows.get(name, 0), "errors": self.__errors.get(name, 0), "phases": {}})
+                template["phases"][phase] = histogram.summary()
+            return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP db_query_duration_seconds Wall time of DBConnector calls per query template and phase.",
+            "# TYPE db_query_duration_seconds histogram",
+        ]
+        with self.__lock:
+            histograms = sorted(self.__histograms.items())
+            rows = dict(self.__rows)
+            errors = dict(self.__errors)
+        for (name, phase), histogram in histograms:
+            labels = 'template="%s",phase="%s"' % (_escape(name), _escape(phase))
+            cumulative = 0
+            for bound, count in zip(LatencyHistogram.BOUNDS, histogram.counts):
+                cumulative += count
+                lines.append('db_query_duration_seconds_bucket{%s,le="%g"} %d' % (labels, bound, cumulative))
+            lines.append('db_query_duration_seconds_bucket{%s,le="+Inf"} %d' % (labels, histogram.count))
+            lines.append("db_query_duration_seconds_sum{%s} %r" % (labels, histogram.sum))
+            lines.append("db_query_duration_seconds_count{%s} %d" % (labels, histogram.count))
+        lines.append("# HELP db_query_rows_total Rows returned or affected per query template.")
+        lines.append("# TYPE db_query_rows_total counter")
+        for name in sorted(rows):
+            lines.append('db_query_rows_total{template="%s"} %d' % (_escape(name), rows[name]))
+        lines.append("# HELP db_query_errors_total Failed calls per query template.")
+        lines.append("# TYPE db_query_errors_total counter")
+        for name in sorted(errors):
+            lines.append('db_query_errors_total{template="%s"} %d' % (_escape(name), errors[name]))
+        return "\n".join(lines) + "\n"
+
+    # writes the histograms to a local file, format is "json" or "prometheus"
+    def dump(self, path: str, format: str = "json"):
+        if format == "json":
+            text = self.to_json()
+        elif format == "prometheus":
+            text = self.to_prometheus()
+        else:
+            raise ValueError("unknown format: %s" % format)
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# the instrumentation every DBConnector reports to
+instrumentation = QueryInstrumentation()
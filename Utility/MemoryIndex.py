@@ -0,0 +1,79 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterator, List
+
+
+class SortedIndex:
+    # set of keys kept in order, for the lookups the database answers with a btree: membership, in-order walks
+    # and keyset pages (the keys after a given one). adding and removing cost a bisection and a list shift
+    def __init__(self, keys=()):
+        self.__keys: List = sorted(set(keys))
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.__keys)
+
+    def __contains__(self, key) -> bool:
+        position = bisect_left(self.__keys, key)
+        return position < len(self.__keys) and self.__keys[position] == key
+
+    def add(self, key):
+        if key not in self:
+            insort(self.__keys, key)
+
+    def discard(self, key):
+        position = bisect_left(self.__keys, key)
+        if position < len(self.__keys) and self.__keys[position] == key:
+            del self.__keys[position]
+
+    # the keys greater than after (all of them for None), at most limit of them (all of them for None)
+    def page(self, after=None, limit: int = None) -> List:
+        start = 0 if after is None else bisect_right(self.__keys, after)
+        return self.__keys[start:] if limit is None else self.__keys[start:start + limit]
+
+
+class IntervalIndex:
+    # the [start, end) intervals of one apartment's stays with the item of each, ordered by start.
+    # stays of an apartment never overlap (customer_made_reservation refuses them), so ordered by start they are
+    # ordered by end as well and the interval tree queries are two bisections: the stays overlapping [start, end)
+    # are the ones ending after start up to the last one starting before end. empty stays ([d, d)) fit in between
+    def __init__(self):
+        self.__starts: List = []
+        self.__ends: List = []
+        self.__items: List = []
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.__items)
+
+    def __range(self, start, end) -> range:
+        return range(bisect_right(self.__ends, start), bisect_left(self.__starts, end))
+
+    def overlaps(self, start, end) -> bool:
+        return len(self.__range(start, end)) > 0
+
+    # items of the intervals overlapping [start, end), in order
+    def overlapping(self, start, end) -> List:
+        return [self.__items[i] for i in self.__range(start, end)]
+
+    # items of the intervals starting on start
+    def starting(self, start) -> List:
+        return self.__items[bisect_left(self.__starts, start):bisect_right(self.__starts, start)]
+
+    def add(self, start, end, item):
+        position = bisect_right(self.__starts, start)
+        # the empty stays starting on start go before the stay of the same start, keeping the ends in order
+        while position > 0 and self.__starts[position - 1] == start and self.__ends[position - 1] > end:
+            position -= 1
+        self.__starts.insert(position, start)
+        self.__ends.insert(position, end)
+        self.__items.insert(position, item)
+
+    def remove(self, start, item):
+        for position in range(bisect_left(self.__starts, start), bisect_right(self.__starts, start)):
+            if self.__items[position] is item:
+                del self.__starts[position], self.__ends[position], self.__items[position]
+                return
@@ -0,0 +1,138 @@
+import hashlib
+import re
+from typing import List, Optional, Sequence, Union
+
+from psycopg2 import sql
+
+import Utility.DBConnector as Connector
+from Utility.SlowQueryLog import WriteCall
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    # one step of the schema. its statements run in one transaction together with recording the step, unless
+    # concurrent is set: then every statement runs on its own in autocommit (CREATE INDEX CONCURRENTLY cannot run
+    # inside a transaction) and the step is recorded after the last one, so a step that failed half way is retried
+    # from the start and its statements must be idempotent (IF NOT EXISTS)
+    def __init__(self, version: int, name: str, statements: Union[str, Sequence[str]], concurrent: bool = False):
+        self.version = version
+        self.name = name
+        self.statements = [statements] if isinstance(statements, str) else list(statements)
+        self.concurrent = concurrent
+
+    # whitespace is not significant, re-indenting a step does not count as changing it
+    @property
+    def checksum(self) -> str:
+        text = "\n".join(" ".join(statement.split()) for statement in self.statements)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+
+LOCK = "SELECT pg_advisory_{action}(hashtext(current_schema() || '.schemaversion'))"
+
+
+CREATE_INDEX = re.compile(r"\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.I)
+
+
+# the name of the index a CREATE INDEX CONCURRENTLY statement builds (lower case, as unquoted names are stored)
+def index_name(statement: str) -> Optional[str]:
+    match = CREATE_INDEX.match(statement)
+    return match.group(1).lower() if match else None
+
+
+# a WriteCall, so that SlowQueryLog does not take or release the lock a second time under EXPLAIN ANALYZE
+def lock_statement(action: str) -> WriteCall:
+    return WriteCall([sql.SQL(LOCK.format(action=action))])
+
+
+class Migrator:
+    # applies the migrations that are missing from the SchemaVersion table (version, name, checksum, applied at).
+    # the table's comment holds '<version>:<digest of every checksum>' of the newest schema, so an up to date
+    # database costs one catalog lookup. otherwise, under an advisory lock, the checksums of the applied steps are
+    # verified (a changed or unknown step raises MigrationError, edit a schema by adding a step) and the missing
+    # steps are applied in order.
+    # concurrent steps run on a connection of their own and wait for the transactions open on their tables, so the
+    # connector passed to migrate() must not keep one open (TransactionalDBConnector)
+    def __init__(self, migrations: Sequence[Migration]):
+        versions = [migration.version for migration in migrations]
+        if versions != sorted(set(versions)):
+            raise ValueError("migration versions must be unique and ascending")
+        self.migrations = list(migrations)
+
+    def head(self) -> str:
+        digest = hashlib.sha256(",".join(m.checksum for m in self.migrations).encode()).hexdigest()
+        return "%d:%s" % (self.migrations[-1].version if self.migrations else 0, digest)
+
+    def is_current(self, conn) -> bool:
+        _, result = conn.execute(
+            "SELECT obj_description(to_regclass('schemaversion'), 'pg_class') AS Head", name="schema_version")
+        return result[0]["Head"] == self.head()
+
+    # returns the versions it applied
+    def migrate(self, conn) -> List[int]:
+        if self.is_current(conn):
+            return []
+        conn.execute(lock_statement("lock"), name="schema_version")
+        try:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS SchemaVersion (
+                Version INT PRIMARY KEY,
+                Name TEXT NOT NULL,
+                Checksum TEXT NOT NULL,
+                AppliedAt TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """, name="schema_version")
+            _, result = conn.execute("SELECT Version, Checksum FROM SchemaVersion", name="schema_version")
+            applied = {row["Version"]: row["Checksum"] for row in result}
+            known = {migration.version: migration for migration in self.migrations}
+            for version, checksum in sorted(applied.items()):
+                if version not in known:
+                    raise MigrationError("schema version %d is newer than this code" % version)
+                if known[version].checksum != checksum:
+                    raise MigrationError("schema version %d (%s) was changed after it was applied"
+                                         % (version, known[version].name))
+            done = []
+            for migration in self.migrations:
+                if migration.version not in applied:
+                    self.__apply(conn, migration)
+                    done.append(migration.version)
+            conn.execute(sql.SQL("COMMENT ON TABLE SchemaVersion IS {head}").format(head=sql.Literal(self.head())),
+                         name="schema_version")
+            conn.commit()
+            return done
+        finally:
+            conn.rollback()
+            conn.execute(lock_statement("unlock"), name="schema_version")
+
+    @staticmethod
+    def __apply(conn, migration: Migration):
+        record = sql.SQL("INSERT INTO SchemaVersion (Version, Name, Checksum) VALUES ({version}, {name}, {checksum});"
+                         ).format(version=sql.Literal(migration.version), name=sql.Literal(migration.name),
+                                  checksum=sql.Literal(migration.checksum))
+        if not migration.concurrent:
+            conn.execute(sql.Composed([sql.SQL(s) for s in migration.statements] + [record]), name=migration.name)
+            conn.commit()
+            return
+        online = Connector.DBConnector()
+        try:
+            online.connection.autocommit = True
+            for statement in migration.statements:
+                # an earlier build of this index that failed left it INVALID, which IF NOT EXISTS would keep.
+                # invalid indexes the step does not build (e.g. one being built by someone else) are left alone
+                name = index_name(statement)
+                if name is not None:
+                    rows, _ = online.execute(sql.SQL("""
+                    SELECT 1 FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indexrelid
+                    WHERE NOT i.indisvalid AND c.relnamespace = current_schema()::regnamespace AND c.relname = {name}
+                    """).format(name=sql.Literal(name)), name="schema_version")
+                    if rows:
+                        online.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {name}").format(
+                            name=sql.Identifier(name)), name=migration.name)
+                online.execute(statement, name=migration.name)
+        finally:
+            online.close()
+        conn.execute(record, name=migration.name)
+        conn.commit()
@@ -0,0 +1,178 @@
+import asyncio
+import contextvars
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class QueryCache:
+    # in-process LRU/TTL cache of read results.
+    # every entry is tagged with the tables it was read from and the version each table had before the read,
+    # a write bumps the versions of the tables it touched so dependent entries are dropped on their next lookup.
+    # the cache is disabled until enable() is called, other processes writing to the database are not seen.
+    # a read that fails returns a fallback value (bad object, [], ERROR), it calls failed() so that it is not cached
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 60.0, enabled: bool = False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.__entries = OrderedDict()
+        self.__versions: Dict[str, int] = {}
+        self.__lock = threading.Lock()
+        self.__stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        self.__failed = contextvars.ContextVar("query_cache_failed", default=False)
+
+    def enable(self, max_entries: int = None, ttl: Optional[float] = -1):
+        with self.__lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if ttl != -1:
+                self.ttl = ttl
+            self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self.clear()
+
+    # returns (True, value) on a hit and (False, None) on a miss
+    def get(self, key: Hashable) -> Tuple[bool, object]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.__stats["misses"] += 1
+                return False, None
+            value, expires_at, versions = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.__entries[key]
+                self.__stats["expirations"] += 1
+                self.__stats["misses"] += 1
+                return False, None
+            if any(self.__versions.get(table, 0) != version for table, version in versions):
+                del self.__entries[key]
+                self.__stats["invalidations"] += 1
+                self.__stats["misses"] += 1
+                return False, None
+            self.__entries.move_to_end(key)
+            self.__stats["hits"] += 1
+        return True, copy.deepcopy(value)
+
+    # versions must be taken with snapshot() before the value was read, so a write that lands during the read
+    # leaves the entry already stale instead of caching old data under the new versions
+    def put(self, key: Hashable, value, versions: Tuple[Tuple[str, int], ...]):
+        value = copy.deepcopy(value)
+        with self.__lock:
+            expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+            self.__entries[key] = (value, expires_at, versions)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.__stats["evictions"] += 1
+
+    def snapshot(self, tables: Iterable[str]) -> Tuple[Tuple[str, int], ...]:
+        with self.__lock:
+            return tuple((table.lower(), self.__versions.get(table.lower(), 0)) for table in tables)
+
+    # invalidates every entry that depends on one of the tables, table names are case insensitive
+    def bump(self, *tables: str):
+        with self.__lock:
+            for table in tables:
+                table = table.lower()
+                self.__versions[table] = self.__versions.get(table, 0) + 1
+
+    def clear(self):
+        with self.__lock:
+            self.__stats["invalidations"] += len(self.__entries)
+            self.__entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats["size"] = len(self.__entries)
+        return stats
+
+    def reset_stats(self):
+        with self.__lock:
+            for name in self.__stats:
+                self.__stats[name] = 0
+
+    # marks the result of the running cached function (and of the cached functions calling it) as not to be cached
+    def failed(self):
+        self.__failed.set(True)
+
+    def __begin(self) -> contextvars.Token:
+        return self.__failed.set(False)
+
+    # returns whether the read begun with token called failed(), a failure is passed on to the enclosing read
+    def __end(self, token: contextvars.Token) -> bool:
+        failed = self.__failed.get()
+        self.__failed.reset(token)
+        if failed:
+            self.__failed.set(True)
+        return failed
+
+    # decorator for read functions (plain or async), the cache key is the function name and its arguments
+    def cached(self, *tables: str) -> Callable:
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    key = (func.__name__, args, tuple(sorted(kwargs.items())))
+                    hit, value = self.get(key)
+                    if hit:
+                        return value
+                    versions = self.snapshot(tables)
+                    token = self.__begin()
+                    try:
+                        value = await func(*args, **kwargs)
+                    finally:
+                        failed = self.__end(token)
+                    if not failed:
+                        self.put(key, value, versions)
+                    return value
+            else:
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return func(*args, **kwargs)
+                    key = (func.__name__, args, tuple(sorted(kwargs.items())))
+                    hit, value = self.get(key)
+                    if hit:
+                        return value
+                    versions = self.snapshot(tables)
+                    token = self.__begin()
+                    try:
+                        value = func(*args, **kwargs)
+                    finally:
+                        failed = self.__end(token)
+                    if not failed:
+                        self.put(key, value, versions)
+                    return value
+            wrapper.tables = tables
+            return wrapper
+        return decorator
+
+    # decorator for write functions (plain or async), bumps the tables the function may change
+    # (including ON DELETE CASCADE)
+    def invalidates(self, *tables: str) -> Callable:
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.bump(*tables)
+            else:
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        self.bump(*tables)
+            wrapper.tables = tables
+            return wrapper
+        return decorator
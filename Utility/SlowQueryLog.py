@@ -0,0 +1,113 @@
+import collections
+import datetime
+import json
+import threading
+from typing import List, Optional
+
+import psycopg2.extensions
+from psycopg2 import sql
+
+from Utility.Instrumentation import QueryEvent, instrumentation
+
+
+class WriteCall(sql.Composed):
+    # a statement that reads like a SELECT but has side effects, such as the stored function calls of
+    # Solution.write_function_query or the advisory locks of the Migrator. SlowQueryLog does not re-run these under
+    # EXPLAIN ANALYZE
+    pass
+
+
+class SlowQueryLog:
+    # instrumentation hook logging every DBConnector statement that took at least threshold seconds: the rendered
+    # SQL, the literal values composed into it, the per-phase durations and, for SELECTs that are not a WriteCall,
+    # the plan of a re-run under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON). the re-run is rolled back (to a savepoint,
+    # released afterwards, if the connection is inside a transaction) and runs the statement a second time, so keep the threshold well
+    # above the normal latency.
+    # entries are kept in memory (the last max_entries) and appended as JSON lines to path if one is given
+    def __init__(self, threshold: float, path: Optional[str] = None, explain: bool = True, max_entries: int = 1000):
+        self.threshold = threshold
+        self.path = path
+        self.explain = explain
+        self.entries = collections.deque(maxlen=max_entries)
+        self.__lock = threading.Lock()
+        self.__hook = None
+
+    def enable(self) -> "SlowQueryLog":
+        if self.__hook is None:
+            self.__hook = instrumentation.add_hook(after=self.__after)
+        return self
+
+    def disable(self):
+        if self.__hook is not None:
+            instrumentation.remove_hook(self.__hook)
+            self.__hook = None
+
+    def __after(self, event: QueryEvent):
+        if event.query is None or event.duration < self.threshold:
+            return
+        connection = getattr(event.connector, "connection", None)
+        rendered = _render(event.query, connection)
+        entry = {
+            "time": datetime.datetime.now().isoformat(),
+            "template": event.name,
+            "duration": event.duration,
+            "phases": dict(event.phases),
+            "rows": event.rows,
+            "error": None if event.error is None else str(event.error),
+            "sql": rendered,
+            "params": _literals(event.query),
+            "plan": None,
+        }
+        if self.explain and event.error is None and not isinstance(event.query, WriteCall) and _is_select(rendered):
+            entry["plan"] = self.__explain(connection, rendered)
+        with self.__lock:
+            self.entries.append(entry)
+            if self.path is not None:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+
+    @staticmethod
+    def __explain(connection, rendered: str):
+        # only plain (synchronous) psycopg2 connections can be used from inside the hook
+        if not isinstance(connection, psycopg2.extensions.connection) or connection.async_ or connection.closed:
+            return None
+        idle = connection.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        cursor = connection.cursor()
+        try:
+            if not idle:
+                cursor.execute("SAVEPOINT slow_query_explain")
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + rendered.strip().rstrip(";"))
+            plan = cursor.fetchone()[0]
+        except Exception as e:
+            plan = {"error": str(e)}
+        finally:
+            try:
+                if idle:
+                    connection.rollback()
+                else:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                    cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            finally:
+                cursor.close()
+        return plan
+
+
+def _render(query, connection) -> str:
+    if isinstance(query, sql.Composable):
+        try:
+            return query.as_string(connection)
+        except Exception:
+            return repr(query)
+    return str(query)
+
+
+def _literals(query) -> List:
+    if isinstance(query, sql.Literal):
+        return [query.wrapped]
+    if isinstance(query, sql.Composed):
+        return [value for part in query.seq for value in _literals(part)]
+    return []
+
+
+def _is_select(rendered: str) -> bool:
+    return rendered.lstrip()[:6].upper() == "SELECT" or rendered.lstrip()[:4].upper() == "WITH"